@@ -3,12 +3,17 @@ import { Link } from "react-router-dom";
 
 function Home() {
   const [restaurants, setRestaurants] = useState([]);
+  const [query, setQuery] = useState("");
 
   useEffect(() => {
-    fetch("/restaurants")
-      .then((r) => r.json())
+    // Search server-side instead of loading every restaurant and filtering here.
+    const url = query.trim()
+      ? `/search?type=restaurant&q=${encodeURIComponent(query)}`
+      : "/restaurants";
+    fetch(url)
+      .then((r) => (r.ok ? r.json() : []))
       .then(setRestaurants);
-  }, []);
+  }, [query]);
 
   function handleDelete(id) {
     fetch(`/restaurants/${id}`, {
@@ -24,6 +29,12 @@ function Home() {
 
   return (
     <section className="container">
+      <input
+        type="search"
+        placeholder="Search restaurants"
+        value={query}
+        onChange={(e) => setQuery(e.target.value)}
+      />
       {restaurants.map((restaurant) => (
         <div key={restaurant.id} className="card">
           <h2>
@@ -90,13 +90,28 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # The FTS5 tables (and their shadow tables) are managed by hand in
+    # migrations; keep autogenerate from proposing to drop them.
+    def include_name(name, type_, parent_names):
+        return not (type_ == 'table' and '_fts' in name)
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_name") is None:
+        conf_args["include_name"] = include_name
 
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            # The app turns foreign keys on for every connection, but batch
+            # mode rebuilds tables (DROP + rename) that other tables still
+            # reference. The pragma is a no-op inside a transaction, so
+            # end the one SQLAlchemy has begun before configuring.
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            connection.commit()
+
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
@@ -106,6 +121,10 @@ def run_migrations_online():
         with context.begin_transaction():
             context.run_migrations()
 
+        if connection.dialect.name == 'sqlite':
+            connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+            connection.commit()
+
 
 if context.is_offline_mode():
     run_migrations_offline()
@@ -0,0 +1,80 @@
+"""price summary tables maintained by triggers
+
+Revision ID: 0a9e5d3c71b4
+Revises: f2b86c0d7a35
+Create Date: 2026-10-18 16:48:05.214967
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a9e5d3c71b4'
+down_revision = 'f2b86c0d7a35'
+branch_labels = None
+depends_on = None
+
+# Copied from price_stats.trigger_ddl at the time of writing.
+SUMMARIES = (
+    ('pizza_price_stats', 'pizza_id'),
+    ('restaurant_price_stats', 'restaurant_id'),
+)
+TRIGGERS = ('restaurant_pizzas_stats_ai', 'restaurant_pizzas_stats_ad', 'restaurant_pizzas_stats_au')
+
+
+def _add(table, key, row):
+    return (
+        f"INSERT INTO {table} ({key}, offers, price_sum, min_price, max_price) "
+        f"VALUES ({row}.{key}, 1, {row}.price, {row}.price, {row}.price) "
+        f"ON CONFLICT({key}) DO UPDATE SET offers = offers + 1, "
+        f"price_sum = price_sum + excluded.price_sum, "
+        f"min_price = MIN(min_price, excluded.min_price), "
+        f"max_price = MAX(max_price, excluded.max_price);"
+    )
+
+
+def _remove(table, key, row):
+    return (
+        f"DELETE FROM {table} WHERE {key} = {row}.{key} AND offers <= 1; "
+        f"UPDATE {table} SET offers = offers - 1, price_sum = price_sum - {row}.price, "
+        f"min_price = CASE WHEN {row}.price > min_price THEN min_price "
+        f"ELSE (SELECT MIN(price) FROM restaurant_pizzas WHERE {key} = {row}.{key}) END, "
+        f"max_price = CASE WHEN {row}.price < max_price THEN max_price "
+        f"ELSE (SELECT MAX(price) FROM restaurant_pizzas WHERE {key} = {row}.{key}) END "
+        f"WHERE {key} = {row}.{key};"
+    )
+
+
+def upgrade():
+    for table, key in SUMMARIES:
+        op.create_table(
+            table,
+            sa.Column(key, sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('offers', sa.Integer(), nullable=False),
+            sa.Column('price_sum', sa.Integer(), nullable=False),
+            sa.Column('min_price', sa.Integer(), nullable=False),
+            sa.Column('max_price', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint(key),
+        )
+        op.execute(
+            f"INSERT INTO {table} ({key}, offers, price_sum, min_price, max_price) "
+            f"SELECT {key}, COUNT(*), SUM(price), MIN(price), MAX(price) FROM restaurant_pizzas GROUP BY {key}"
+        )
+
+    adds = " ".join(_add(table, key, "new") for table, key in SUMMARIES)
+    removes = " ".join(_remove(table, key, "old") for table, key in SUMMARIES)
+    op.execute("CREATE TRIGGER restaurant_pizzas_stats_ai AFTER INSERT ON restaurant_pizzas "
+               f"BEGIN {adds} END")
+    op.execute("CREATE TRIGGER restaurant_pizzas_stats_ad AFTER DELETE ON restaurant_pizzas "
+               f"BEGIN {removes} END")
+    op.execute("CREATE TRIGGER restaurant_pizzas_stats_au "
+               "AFTER UPDATE OF price, pizza_id, restaurant_id ON restaurant_pizzas "
+               f"BEGIN {removes} {adds} END")
+
+
+def downgrade():
+    for trigger in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for table, _ in SUMMARIES:
+        op.drop_table(table)
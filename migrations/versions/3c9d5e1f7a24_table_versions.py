@@ -0,0 +1,54 @@
+"""per-table write versions maintained by triggers
+
+Revision ID: 3c9d5e1f7a24
+Revises: 6e2c4b8a9f13
+Create Date: 2026-10-18 21:05:37.418206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9d5e1f7a24'
+down_revision = '6e2c4b8a9f13'
+branch_labels = None
+depends_on = None
+
+# Copied from conditional.version_trigger_ddl at the time of writing.
+TABLES = ('restaurants', 'pizzas', 'restaurant_pizzas')
+OPERATIONS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def _bump(table):
+    return (
+        "INSERT INTO table_versions (name, version, updated_at) "
+        f"VALUES ('{table}', 1, strftime('%Y-%m-%d %H:%M:%f', 'now')) "
+        "ON CONFLICT(name) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at;"
+    )
+
+
+def upgrade():
+    op.create_table(
+        'table_versions',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    for table in TABLES:
+        for operation in OPERATIONS:
+            op.execute(f"CREATE TRIGGER {table}_version_a{operation[0].lower()} AFTER {operation} ON {table} "
+                       f"BEGIN {_bump(table)} END")
+        # Start from the newest existing row, so Last-Modified doesn't jump forward.
+        op.execute(
+            "INSERT INTO table_versions (name, version, updated_at) "
+            f"SELECT '{table}', 1, COALESCE(MAX(updated_at), strftime('%Y-%m-%d %H:%M:%f', 'now')) FROM {table}"
+        )
+
+
+def downgrade():
+    for table in TABLES:
+        for operation in OPERATIONS:
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_version_a{operation[0].lower()}")
+    op.drop_table('table_versions')
@@ -0,0 +1,33 @@
+"""add updated_at to restaurants, pizzas and restaurant_pizzas
+
+Revision ID: 5b1e7c2d9a41
+Revises: 930453bf4358
+Create Date: 2026-10-18 09:12:04.518233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1e7c2d9a41'
+down_revision = '930453bf4358'
+branch_labels = None
+depends_on = None
+
+TABLES = ('restaurants', 'pizzas', 'restaurant_pizzas')
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP")
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
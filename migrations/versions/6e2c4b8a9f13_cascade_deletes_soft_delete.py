@@ -0,0 +1,60 @@
+"""on delete cascade for restaurant_pizzas; restaurants.deleted_at
+
+Revision ID: 6e2c4b8a9f13
+Revises: 0a9e5d3c71b4
+Create Date: 2026-10-18 18:12:40.663091
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e2c4b8a9f13'
+down_revision = '0a9e5d3c71b4'
+branch_labels = None
+depends_on = None
+
+
+def _triggers(table):
+    # Batch mode rebuilds SQLite tables, which drops their triggers (price
+    # summaries, search index); callers save them first and restore them after.
+    return op.get_bind().exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table,)
+    ).scalars().all()
+
+
+def _recreate_foreign_keys(ondelete):
+    # SQLite can't alter a constraint, so batch mode rebuilds the table.
+    triggers = _triggers('restaurant_pizzas')
+
+    with op.batch_alter_table('restaurant_pizzas', recreate='always') as batch_op:
+        batch_op.drop_constraint('fk_restaurant_pizzas_restaurant_id_restaurants', type_='foreignkey')
+        batch_op.drop_constraint('fk_restaurant_pizzas_pizza_id_pizzas', type_='foreignkey')
+        batch_op.create_foreign_key('fk_restaurant_pizzas_restaurant_id_restaurants',
+                                    'restaurants', ['restaurant_id'], ['id'], ondelete=ondelete)
+        batch_op.create_foreign_key('fk_restaurant_pizzas_pizza_id_pizzas',
+                                    'pizzas', ['pizza_id'], ['id'], ondelete=ondelete)
+
+    for sql in triggers:
+        op.execute(sql)
+
+
+def upgrade():
+    _recreate_foreign_keys('CASCADE')
+
+    with op.batch_alter_table('restaurants') as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_restaurants_deleted_at', 'restaurants', ['deleted_at'],
+                    sqlite_where=sa.text('deleted_at IS NOT NULL'))
+
+
+def downgrade():
+    op.drop_index('ix_restaurants_deleted_at', table_name='restaurants')
+    triggers = _triggers('restaurants')
+    with op.batch_alter_table('restaurants') as batch_op:
+        batch_op.drop_column('deleted_at')
+    for sql in triggers:
+        op.execute(sql)
+
+    _recreate_foreign_keys(None)
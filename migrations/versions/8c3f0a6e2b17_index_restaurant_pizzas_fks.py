@@ -0,0 +1,28 @@
+"""index restaurant_pizzas foreign keys
+
+Revision ID: 8c3f0a6e2b17
+Revises: 5b1e7c2d9a41
+Create Date: 2026-10-18 10:41:37.092114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c3f0a6e2b17'
+down_revision = '5b1e7c2d9a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('restaurant_pizzas') as batch_op:
+        batch_op.create_index('ix_restaurant_pizzas_restaurant_id_pizza_id', ['restaurant_id', 'pizza_id'])
+        batch_op.create_index('ix_restaurant_pizzas_pizza_id', ['pizza_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('restaurant_pizzas') as batch_op:
+        batch_op.drop_index('ix_restaurant_pizzas_pizza_id')
+        batch_op.drop_index('ix_restaurant_pizzas_restaurant_id_pizza_id')
@@ -0,0 +1,69 @@
+"""normalize pizza ingredients
+
+Revision ID: d41a7e93c5f0
+Revises: 8c3f0a6e2b17
+Create Date: 2026-10-18 14:02:11.508317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41a7e93c5f0'
+down_revision = '8c3f0a6e2b17'
+branch_labels = None
+depends_on = None
+
+
+def _normalize(name):
+    # Same rule as ingredients.normalize, inlined so the migration doesn't
+    # change behaviour if the application code does.
+    return " ".join(name.split()).casefold()
+
+
+def upgrade():
+    ingredients = op.create_table(
+        'ingredients',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    pizza_ingredients = op.create_table(
+        'pizza_ingredients',
+        sa.Column('pizza_id', sa.Integer(), nullable=False),
+        sa.Column('ingredient_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['pizza_id'], ['pizzas.id'],
+                                name=op.f('fk_pizza_ingredients_pizza_id_pizzas'), ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['ingredient_id'], ['ingredients.id'],
+                                name=op.f('fk_pizza_ingredients_ingredient_id_ingredients'), ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('pizza_id', 'ingredient_id'),
+    )
+    op.create_index('ix_pizza_ingredients_ingredient_id_pizza_id', 'pizza_ingredients',
+                    ['ingredient_id', 'pizza_id'])
+
+    # Backfill from the existing free-text column.
+    connection = op.get_bind()
+    links = {}
+    for pizza_id, text in connection.execute(sa.text("SELECT id, ingredients FROM pizzas")):
+        names = {_normalize(part) for part in (text or "").split(",")} - {""}
+        links[pizza_id] = names
+
+    names = sorted(set().union(*links.values())) if links else []
+    ids = {name: id for id, name in enumerate(names, start=1)}
+    if ids:
+        op.bulk_insert(ingredients, [{"id": id, "name": name} for name, id in ids.items()])
+    rows = [
+        {"pizza_id": pizza_id, "ingredient_id": ids[name]}
+        for pizza_id, pizza_names in links.items()
+        for name in pizza_names
+    ]
+    if rows:
+        op.bulk_insert(pizza_ingredients, rows)
+
+
+def downgrade():
+    op.drop_index('ix_pizza_ingredients_ingredient_id_pizza_id', table_name='pizza_ingredients')
+    op.drop_table('pizza_ingredients')
+    op.drop_table('ingredients')
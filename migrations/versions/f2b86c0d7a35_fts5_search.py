@@ -0,0 +1,56 @@
+"""fts5 search over restaurants and pizzas
+
+Revision ID: f2b86c0d7a35
+Revises: d41a7e93c5f0
+Create Date: 2026-10-18 15:26:48.730912
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b86c0d7a35'
+down_revision = 'd41a7e93c5f0'
+branch_labels = None
+depends_on = None
+
+# Copied from search.fts_ddl at the time of writing, so later changes there
+# don't alter what this revision does.
+TABLES = {
+    'restaurants': ('name', 'address'),
+    'pizzas': ('name', 'ingredients'),
+}
+
+
+def _ddl(table, columns):
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+    ]
+
+
+def upgrade():
+    for table, columns in TABLES.items():
+        for statement in _ddl(table, columns):
+            op.execute(statement)
+        # Index the rows that already exist.
+        op.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    for table in TABLES:
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {table}_fts")
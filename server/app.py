@@ -1,99 +1,255 @@
 #!/usr/bin/env python3
 from models import db, Restaurant, RestaurantPizza, Pizza
-from flask_migrate import Migrate
-from flask import Flask, jsonify, request
-from flask_restful import Api
+from batch_reads import RESTAURANT_INCLUDES, load_pizzas, load_restaurants, parse_ids, parse_includes
+from bulk import BatchError, create_restaurant_with_menu, insert_restaurant_pizzas_each, parse_records, validate_records
+from cache import configure_cache, invalidate_pizzas, invalidate_restaurants, read_cache
+from db_config import DATABASE, configure_engines, engine_options
+from group_commit import configure_group_commit
+from ingredients import ingredient_filter, parse_ingredient_args
+from compression import init_compression
+from conditional import collection_version, conditional, pizza_version, restaurant_version, restaurants_version
+from json_provider import json_provider_class
+from price_stats import price_stats_command, pizza_prices, restaurant_stats
+from replicas import configure_replicas, read_replica
+from profiling import init_profiling
+from pagination import next_link, paginated_response, parse_page_args
+from pizza_cache import configure_pizza_cache, lookup_pizza
+from search import parse_search_args, search
+from seeding import seed_command
+from soft_delete import configure_soft_delete, purge_command, soft_delete_restaurant
+from serializers import dump_menu_item, menu_stmt, request_schemas, select_schemas
+from flask import Blueprint, Flask, current_app, jsonify, request
 import os
+from concurrent import futures
+from sqlalchemy import delete
 from sqlalchemy.exc import IntegrityError
 
-BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-DATABASE = os.environ.get("DB_URI", f"sqlite:///{os.path.join(BASE_DIR, 'app.db')}")
+api = Blueprint("api", __name__)
+
+
+def create_app(config=None, migrations=True):
+    """Build the Flask app.
+
+    ``config`` overrides the environment-derived settings below.
+    ``migrations`` registers Flask-Migrate for the ``flask db`` commands;
+    servers pass False so alembic is never imported at request time.
+    """
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(DATABASE)
+    app.config["DB_PROFILE"] = os.environ.get("DB_PROFILE", "production")
+    app.config["READ_CACHE_ENABLED"] = os.environ.get("READ_CACHE_ENABLED", "1") == "1"
+    app.config["READ_CACHE_TTL"] = float(os.environ.get("READ_CACHE_TTL", 30))
+    app.config["READ_CACHE_MAXSIZE"] = int(os.environ.get("READ_CACHE_MAXSIZE", 1024))
+    app.config["READ_CACHE_REDIS_URL"] = os.environ.get("READ_CACHE_REDIS_URL")
+    app.config["PROFILING_ENABLED"] = os.environ.get("PROFILING_ENABLED", "1") == "1"
+    app.config["PROFILE_SLOW_REQUEST_MS"] = os.environ.get("PROFILE_SLOW_REQUEST_MS")
+    app.config["PROFILE_DIR"] = os.environ.get("PROFILE_DIR", "profiles")
+    app.config["INGREDIENT_INDEX_ENABLED"] = os.environ.get("INGREDIENT_INDEX_ENABLED", "1") == "1"
+    app.config["SOFT_DELETE_ENABLED"] = os.environ.get("SOFT_DELETE_ENABLED") == "1"
+    app.config["PURGE_INTERVAL"] = float(os.environ.get("PURGE_INTERVAL", 60))
+    app.config["GROUP_COMMIT_ENABLED"] = os.environ.get("GROUP_COMMIT_ENABLED") == "1"
+    app.config["GROUP_COMMIT_MAX_BATCH"] = int(os.environ.get("GROUP_COMMIT_MAX_BATCH", 100))
+    app.config["GROUP_COMMIT_MAX_LATENCY_MS"] = float(os.environ.get("GROUP_COMMIT_MAX_LATENCY_MS", 5))
+    app.config["GROUP_COMMIT_TIMEOUT"] = float(os.environ.get("GROUP_COMMIT_TIMEOUT", 10))
+    app.config["PIZZA_CACHE_ENABLED"] = os.environ.get("PIZZA_CACHE_ENABLED", "1") == "1"
+    app.config["PIZZA_CACHE_MAX_AGE"] = float(os.environ.get("PIZZA_CACHE_MAX_AGE", 5))
+    app.config["READ_REPLICA_URIS"] = [uri for uri in os.environ.get("READ_REPLICA_URIS", "").split(",") if uri]
+    app.config["READ_REPLICA_POLICY"] = os.environ.get("READ_REPLICA_POLICY", "round_robin")
+    app.config["READ_REPLICA_MAX_LAG"] = float(os.environ.get("READ_REPLICA_MAX_LAG", 5))
+    app.config["READ_REPLICA_CHECK_INTERVAL"] = float(os.environ.get("READ_REPLICA_CHECK_INTERVAL", 1))
+    app.config["READ_YOUR_WRITES_SECONDS"] = float(os.environ.get("READ_YOUR_WRITES_SECONDS", 5))
+    app.config["COMPRESSION_ENABLED"] = os.environ.get("COMPRESSION_ENABLED", "1") == "1"
+    app.config["COMPRESSION_MIN_SIZE"] = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+    app.config["COMPRESSION_LEVELS"] = {
+        encoding: int(os.environ[f"COMPRESSION_{encoding.upper()}_LEVEL"])
+        for encoding in ("gzip", "br", "zstd") if f"COMPRESSION_{encoding.upper()}_LEVEL" in os.environ
+    }
+    if os.environ.get("COMPRESSION_ENCODINGS"):
+        app.config["COMPRESSION_ENCODINGS"] = os.environ["COMPRESSION_ENCODINGS"].split(",")
+    app.config.update(config or {})
+
+    app.json = json_provider_class()(app)
+    # Compact JSON unless JSON_PRETTY is set; any request can still ask for ?pretty=1.
+    app.json.compact = not os.environ.get("JSON_PRETTY")
+
+    if migrations:
+        from flask_migrate import Migrate
+
+        Migrate(app, db)
+
+    db.init_app(app)
+    configure_engines(app, db)
+    configure_replicas(app)
+
+    configure_cache(app)
+    configure_soft_delete(app)
+    configure_group_commit(app)
+    configure_pizza_cache(app)
+    if app.config["PROFILING_ENABLED"]:
+        init_profiling(app, db)
+    if app.config["COMPRESSION_ENABLED"]:
+        init_compression(app)
+
+    app.register_blueprint(api)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(price_stats_command)
+    app.cli.add_command(purge_command)
+    return app
+
+
+def __getattr__(name):
+    # ``app`` is built on first access so importing create_app alone (as the
+    # production launcher does) doesn't construct a second app.
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-app.json.compact = False
-
-migrate = Migrate(app, db)
-
-db.init_app(app)
-
-api = Api(app)
 
 # Routes
 
 # GET /restaurants
-@app.route("/restaurants", methods=["GET"])
+@api.route("/restaurants", methods=["GET"])
+@read_replica
+@conditional(restaurants_version, modified_since=False)
+@read_cache.cached("restaurants")
 def get_restaurants():
-    restaurants = Restaurant.query.all()
-    return jsonify([
-        {"id": restaurant.id, "name": restaurant.name, "address": restaurant.address}
-        for restaurant in restaurants
-    ]), 200
+    try:
+        ids = parse_ids(request.args)
+        includes = parse_includes(request.args, RESTAURANT_INCLUDES if ids is not None else ())
+        page = parse_page_args(request.args)
+        schemas = request_schemas()
+    except ValueError as e:
+        return jsonify({"errors": [str(e)]}), 400
+
+    if ids is not None:
+        return jsonify(load_restaurants(ids, includes, schemas)), 200
+
+    schema = schemas["restaurant"]
+    return paginated_response(select_schemas(schema), Restaurant.id, schema.dump, page)
 
 
 # GET /restaurants/<int:id>
-@app.route("/restaurants/<int:id>", methods=["GET"])
+@api.route("/restaurants/<int:id>", methods=["GET"])
+@read_replica
+@conditional(restaurant_version, modified_since=False)
+@read_cache.cached("restaurants:{id}")
 def get_restaurant(id):
-    restaurant = db.session.get(Restaurant, id)
-    if not restaurant:
+    try:
+        schemas = request_schemas()
+        # The menu and its pizzas are embedded unless include= says otherwise.
+        includes = (
+            parse_includes(request.args, RESTAURANT_INCLUDES)
+            if "include" in request.args else set(RESTAURANT_INCLUDES)
+        )
+    except ValueError as e:
+        return jsonify({"errors": [str(e)]}), 400
+
+    row = db.session.execute(
+        select_schemas(schemas["restaurant"]).where(Restaurant.id == id)
+    ).first()
+    if not row:
         return jsonify({"error": "Restaurant not found"}), 404
 
-    return jsonify({
-        "id": restaurant.id,
-        "name": restaurant.name,
-        "address": restaurant.address,
-        "restaurant_pizzas": [
-            {
-                "id": rp.id,
-                "price": rp.price,
-                "pizza_id": rp.pizza_id,
-                "restaurant_id": rp.restaurant_id,
-                "pizza": {
-                    "id": rp.pizza.id,
-                    "name": rp.pizza.name,
-                    "ingredients": rp.pizza.ingredients
-                }
-            }
-            for rp in restaurant.restaurant_pizzas
+    restaurant = schemas["restaurant"].dump(row)
+    if "restaurant_pizzas" in includes:
+        item_schema = schemas["restaurant_pizza"]
+        pizza_schema = schemas["pizza"] if "restaurant_pizzas.pizza" in includes else None
+        restaurant["restaurant_pizzas"] = [
+            dump_menu_item(menu_row, item_schema, pizza_schema)
+            for menu_row in db.session.execute(menu_stmt([id], item_schema, pizza_schema))
         ]
-    }), 200
+    return jsonify(restaurant), 200
+
+
+# GET /restaurants/<int:id>/stats
+@api.route("/restaurants/<int:id>/stats", methods=["GET"])
+def get_restaurant_stats(id):
+    stats = restaurant_stats(id)
+    if stats is None:
+        return jsonify({"error": "Restaurant not found"}), 404
+    return jsonify(stats), 200
 
 
 # DELETE /restaurants/<int:id>
-@app.route("/restaurants/<int:id>", methods=["DELETE"])
+@api.route("/restaurants/<int:id>", methods=["DELETE"])
 def delete_restaurant(id):
-    restaurant = db.session.get(Restaurant, id)
-    if not restaurant:
+    # One statement either way: the menu goes via ON DELETE CASCADE, or, with
+    # soft deletes, later via the purge worker.
+    soft = current_app.config["SOFT_DELETE_ENABLED"]
+    if soft:
+        deleted = soft_delete_restaurant(id)
+    else:
+        deleted = db.session.execute(
+            delete(Restaurant).where(Restaurant.id == id).returning(Restaurant.id)
+        ).first() is not None
+    if not deleted:
         return jsonify({"error": "Restaurant not found"}), 404
 
-    db.session.delete(restaurant)
     db.session.commit()
+    invalidate_restaurants([id])
+    if soft:
+        current_app.extensions["purge_worker"].notify()
     return "", 204
 
 
 # GET /pizzas
-@app.route("/pizzas", methods=["GET"])
+@api.route("/pizzas", methods=["GET"])
+@read_replica
+@conditional(lambda: collection_version(Pizza), modified_since=False)
+@read_cache.cached("pizzas")
 def get_pizzas():
-    pizzas = Pizza.query.all()
-    return jsonify([
-        {"id": pizza.id, "name": pizza.name, "ingredients": pizza.ingredients}
-        for pizza in pizzas
-    ]), 200
+    try:
+        ids = parse_ids(request.args)
+        page = parse_page_args(request.args)
+        schema = request_schemas()["pizza"]
+    except ValueError as e:
+        return jsonify({"errors": [str(e)]}), 400
+
+    if ids is not None:
+        return jsonify(load_pizzas(ids, request_schemas())), 200
+
+    stmt = select_schemas(schema)
+    includes = parse_ingredient_args(request.args, "ingredient")
+    excludes = parse_ingredient_args(request.args, "exclude")
+    if includes or excludes:
+        stmt = stmt.where(*ingredient_filter(
+            includes, excludes, current_app.config["INGREDIENT_INDEX_ENABLED"]))
+
+    return paginated_response(stmt, Pizza.id, schema.dump, page)
 
 
 # GET /pizzas/<int:id>
-@app.route("/pizzas/<int:id>", methods=["GET"])
+@api.route("/pizzas/<int:id>", methods=["GET"])
+@read_replica
+@conditional(pizza_version)
+@read_cache.cached("pizzas:{id}")
 def get_pizza(id):
-    pizza = db.session.get(Pizza, id)
-    if not pizza:
+    try:
+        schema = request_schemas()["pizza"]
+    except ValueError as e:
+        return jsonify({"errors": [str(e)]}), 400
+
+    row = db.session.execute(select_schemas(schema).where(Pizza.id == id)).first()
+    if not row:
         return jsonify({"error": "Pizza not found"}), 404
 
-    return jsonify({"id": pizza.id, "name": pizza.name, "ingredients": pizza.ingredients}), 200
+    return jsonify(schema.dump(row)), 200
+
+
+# GET /pizzas/<int:id>/prices
+@api.route("/pizzas/<int:id>/prices", methods=["GET"])
+def get_pizza_prices(id):
+    prices = pizza_prices(id)
+    if prices is None:
+        return jsonify({"error": "Pizza not found"}), 404
+    return jsonify(prices), 200
 
 
 # POST /restaurant_pizzas
-@app.route("/restaurant_pizzas", methods=["POST"])
+@api.route("/restaurant_pizzas", methods=["POST"])
 def create_restaurant_pizza():
     data = request.get_json()
 
@@ -108,12 +264,16 @@ def create_restaurant_pizza():
     if not (1 <= price <= 30):
         return jsonify({"errors": ["validation errors"]}), 400
 
-    pizza = db.session.get(Pizza, pizza_id)
+    pizza = lookup_pizza(pizza_id)
     restaurant = db.session.get(Restaurant, restaurant_id)
 
     if not pizza or not restaurant:
         return jsonify({"errors": ["validation errors"]}), 400
 
+    writer = current_app.extensions.get("group_commit")
+    if writer is not None:
+        return _create_restaurant_pizza_grouped(writer, price, pizza, restaurant)
+
     try:
         restaurant_pizza = RestaurantPizza(price=price, pizza_id=pizza_id, restaurant_id=restaurant_id)
         db.session.add(restaurant_pizza)
@@ -124,11 +284,7 @@ def create_restaurant_pizza():
             "price": restaurant_pizza.price,
             "pizza_id": restaurant_pizza.pizza_id,
             "restaurant_id": restaurant_pizza.restaurant_id,
-            "pizza": {
-                "id": pizza.id,
-                "name": pizza.name,
-                "ingredients": pizza.ingredients
-            },
+            "pizza": pizza,
             "restaurant": {
                 "id": restaurant.id,
                 "name": restaurant.name,
@@ -138,74 +294,109 @@ def create_restaurant_pizza():
     except IntegrityError:
         db.session.rollback()
         return jsonify({"errors": ["validation errors"]}), 400
-    
 
-    #adding new resturant
-@app.route('/restaurants_pizza', methods=['POST'])
+
+def _create_restaurant_pizza_grouped(writer, price, pizza, restaurant):
+    # Same response as above, but the insert rides in the writer's next batch.
+    body = {
+        "price": price,
+        "pizza_id": pizza["id"],
+        "restaurant_id": restaurant.id,
+        "pizza": pizza,
+        "restaurant": {"id": restaurant.id, "name": restaurant.name, "address": restaurant.address},
+    }
+    # Give the connection back to the pool while waiting on the writer.
+    db.session.close()
+
+    future = writer.submit({"price": price, "pizza_id": pizza["id"], "restaurant_id": restaurant.id})
+    try:
+        id = future.result(timeout=current_app.config["GROUP_COMMIT_TIMEOUT"])
+    except IntegrityError:
+        return jsonify({"errors": ["validation errors"]}), 400
+    except futures.TimeoutError:
+        # The row may still be written when its batch gets to run.
+        return jsonify({"errors": ["write queue timed out"]}), 503
+    return jsonify({"id": id, **body}), 201
+
+
+# POST /restaurant_pizzas/batch
+@api.route("/restaurant_pizzas/batch", methods=["POST"])
+def create_restaurant_pizzas_batch():
+    try:
+        records = parse_records(request)
+    except BatchError as e:
+        return jsonify({"errors": [str(e)]}), e.status
+
+    rows, errors = validate_records(records)
+    created = []
+    for (index, values), result in zip(rows, insert_restaurant_pizzas_each(rows)):
+        if isinstance(result, IntegrityError):
+            # Its restaurant or pizza was deleted after validation.
+            errors[index] = ["restaurant or pizza no longer exists"]
+        else:
+            created.append({"index": index, "id": result, **values})
+    db.session.commit()
+    invalidate_restaurants({item["restaurant_id"] for item in created})
+
+    if not errors:
+        status = 201
+    elif created:
+        status = 207
+    else:
+        status = 400
+    return jsonify({
+        "created": created,
+        "errors": [{"index": index, "errors": errors[index]} for index in sorted(errors)],
+    }), status
+
+
+# POST /restaurants_pizza
+@api.route('/restaurants_pizza', methods=['POST'])
 def create_restaurant():
     data = request.get_json()
 
-  
     name = data.get('name')
     address = data.get('address')
-    restaurant_pizzas_data = data.get('restaurant_pizzas', [])
 
     # Validate required fields
     if not name or not address:
         return jsonify({"errors": ["'name' and 'address' are required"]}), 400
 
-    # Create the restaurant instance
-    restaurant = Restaurant(name=name, address=address)
-    db.session.add(restaurant)
-    db.session.commit()  
-
-    # Process nested restaurant_pizzas data
-    for rp_data in restaurant_pizzas_data:
-        price = rp_data.get('price')
-        pizza_data = rp_data.get('pizza')
-        if not pizza_data or 'id' not in pizza_data:
-            return jsonify({"errors": ["Pizza data with an 'id' is required for each restaurant pizza"]}), 400
-
-        # Option 1: If the pizza already exists in your database:
-        pizza = Pizza.query.get(pizza_data['id'])
-        if not pizza:
-            # Optionally, you might create a new Pizza if it doesn't exist
-            pizza = Pizza(name=pizza_data.get('name'), ingredients=pizza_data.get('ingredients'))
-            db.session.add(pizza)
-            db.session.commit()
-
-        # Option 2: Alternatively, if you expect the pizza to exist, return an error if not found.
-        # if not pizza:
-        #     return jsonify({"errors": [f"Pizza with id {pizza_data['id']} not found"]}), 400
-
-        # Validate price if needed
-        if price is None or not (1 <= price <= 30):
-            return jsonify({"errors": ["Price is required and must be between 1 and 30"]}), 400
-
-        # Create the RestaurantPizza association
-        restaurant_pizza = RestaurantPizza(price=price, pizza_id=pizza.id, restaurant_id=restaurant.id)
-        db.session.add(restaurant_pizza)
+    try:
+        restaurant, new_pizza_ids = create_restaurant_with_menu(
+            name, address, data.get('restaurant_pizzas', []))
+        db.session.commit()
+    except BatchError as e:
+        db.session.rollback()
+        return jsonify({"errors": [str(e)]}), e.status
 
-    db.session.commit()
+    invalidate_restaurants([restaurant["id"]])
+    if new_pizza_ids:
+        invalidate_pizzas(new_pizza_ids)
+    return jsonify(restaurant), 201
+
+
+# GET /search
+@api.route("/search", methods=["GET"])
+@conditional(lambda: tuple(collection_version(Restaurant)) + tuple(collection_version(Pizza)), modified_since=False)
+def search_all():
+    try:
+        expression, types, limit, offset = parse_search_args(request.args)
+    except ValueError as e:
+        return jsonify({"errors": [str(e)]}), 400
+
+    results, has_next = search(expression, types, limit, offset)
+    response = jsonify(results)
+    if has_next:
+        response.headers["Link"] = next_link(offset=offset + limit)
+    return response, 200
+
+
+# GET /cache/stats
+@api.route("/cache/stats", methods=["GET"])
+def get_cache_stats():
+    return jsonify(read_cache.stats()), 200
 
-    # Return the created restaurant (and optionally the associated pizzas)
-    return jsonify({
-        "id": restaurant.id,
-        "name": restaurant.name,
-        "address": restaurant.address,
-        "restaurant_pizzas": [
-            {
-                "id": rp.id,
-                "price": rp.price,
-                "pizza": {
-                    "id": rp.pizza.id,
-                    "name": rp.pizza.name,
-                    "ingredients": rp.pizza.ingredients
-                }
-            }
-            for rp in restaurant.restaurant_pizzas  # Assuming a relationship is set up in your model
-        ]
-    }), 201
 
 if __name__ == "__main__":
-    app.run(port=5555, debug=True)
+    create_app().run(port=5555, debug=True)
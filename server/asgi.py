@@ -0,0 +1,324 @@
+"""ASGI entry point serving the API with an async SQLAlchemy session.
+
+    uvicorn asgi:app --app-dir server --port 5556 --workers 4
+
+Routes, payloads and status codes match app.py for restaurants, pizzas and
+restaurant_pizzas, including ``ids=``, ``include=``, ``fields[...]``,
+``ingredient=``/``exclude=`` and the keyset pagination parameters. The
+models from models.py are reused as-is; only the session is different
+(AsyncSession over aiosqlite). The read cache, conditional GETs (ETag,
+Last-Modified), read replicas, response compression and Server-Timing
+are WSGI-only for now.
+
+With SOFT_DELETE_ENABLED=1, DELETE marks the restaurant as app.py does
+and soft_delete.py's criteria hide it from every read; there is no purge
+worker here, so run ``flask purge-deleted`` or a WSGI server alongside.
+"""
+import json
+import os
+import re
+from functools import partial
+from urllib.parse import parse_qsl, urlencode
+
+from sqlalchemy import delete, event, insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MultiDict
+
+from batch_reads import RESTAURANT_INCLUDES, load_pizzas, load_restaurants, parse_ids, parse_includes
+from db_config import DATABASE, engine_options, pragmas_for, set_sqlite_pragmas
+from ingredients import parse_ingredient_args, sql_filter
+from models import Restaurant, Pizza, RestaurantPizza, price_in_range
+from pagination import STREAM_BATCH_SIZE, parse_page_args
+from serializers import (
+    RESTAURANT, PIZZA, RESTAURANT_PIZZA, dump_menu_item, menu_stmt, parse_fieldsets, select_schemas,
+)
+from soft_delete import soft_delete_stmt
+
+SOFT_DELETE_ENABLED = os.environ.get("SOFT_DELETE_ENABLED") == "1"
+
+try:
+    import orjson
+
+    def dumps(obj):
+        return orjson.dumps(obj)
+except ImportError:  # pragma: no cover - optional speedup
+    def dumps(obj):
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def async_url(uri):
+    """Swap a sync SQLite URL onto the aiosqlite driver."""
+    url = make_url(uri)
+    if url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url
+
+
+engine = create_async_engine(async_url(DATABASE), **engine_options(DATABASE))
+if engine.dialect.name == "sqlite":
+    event.listen(
+        engine.sync_engine,
+        "connect",
+        partial(set_sqlite_pragmas, pragmas_for(engine.url, os.environ.get("DB_PROFILE", "production"))),
+    )
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+
+class Request:
+    def __init__(self, scope, body):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query = parse_qsl(scope.get("query_string", b"").decode(), keep_blank_values=True)
+        # As in Flask, a repeated parameter reads as its first value.
+        self.args = MultiDict(self.query)
+        self.body = body
+        host = dict(scope.get("headers", [])).get(b"host", b"").decode()
+        if not host:
+            host = "%s:%d" % tuple(scope["server"]) if scope.get("server") else "localhost"
+        self.base_url = f"{scope.get('scheme', 'http')}://{host}{scope.get('root_path', '')}{self.path}"
+
+    def json(self):
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError:
+            return None
+
+
+def next_link(request, **params):
+    """``Link`` header value for the next page, as pagination.next_link builds it."""
+    args = {}
+    for key, value in request.query:
+        args.setdefault(key, []).append(value)
+    for key, value in params.items():
+        args[key] = [str(value)]
+    query = urlencode([(key, value) for key, values in args.items() for value in values])
+    return f'<{request.base_url}?{query}>; rel="next"'
+
+
+# Handlers return (status, payload) or, for streamed lists, (status, async iterator),
+# optionally followed by a list of extra (name, value) headers.
+
+async def get_restaurants(session, request):
+    try:
+        ids = parse_ids(request.args)
+        includes = parse_includes(request.args, RESTAURANT_INCLUDES if ids is not None else ())
+        page = parse_page_args(request.args)
+        schemas = parse_fieldsets(request.args)
+    except ValueError as e:
+        return 400, {"errors": [str(e)]}
+
+    if ids is not None:
+        return 200, await session.run_sync(
+            lambda sync_session: load_restaurants(ids, includes, schemas, sync_session))
+
+    schema = schemas["restaurant"]
+    return await _list(session, request, select_schemas(schema), schema, Restaurant.id, page)
+
+
+async def get_pizzas(session, request):
+    try:
+        ids = parse_ids(request.args)
+        page = parse_page_args(request.args)
+        schemas = parse_fieldsets(request.args)
+    except ValueError as e:
+        return 400, {"errors": [str(e)]}
+
+    if ids is not None:
+        return 200, await session.run_sync(lambda sync_session: load_pizzas(ids, schemas, sync_session))
+
+    schema = schemas["pizza"]
+    stmt = select_schemas(schema)
+    includes = parse_ingredient_args(request.args, "ingredient")
+    excludes = parse_ingredient_args(request.args, "exclude")
+    if includes or excludes:
+        # The same rows app.py finds; its in-memory ingredient index is per WSGI process.
+        stmt = stmt.where(*sql_filter(includes, excludes))
+    return await _list(session, request, stmt, schema, Pizza.id, page)
+
+
+async def _list(session, request, stmt, schema, key_column, page):
+    stmt = stmt.order_by(key_column)
+    if page.after is not None:
+        stmt = stmt.where(key_column > page.after)
+    if page.stream:
+        return 200, _stream(session, stmt, schema.dump)
+    if page.limit is None:
+        return 200, [schema.dump(row) for row in await session.execute(stmt)]
+
+    # One extra row tells whether there is a next page, as in paginated_response().
+    items = [schema.dump(row) for row in await session.execute(stmt.limit(page.limit + 1))]
+    if len(items) <= page.limit:
+        return 200, items
+    items = items[:page.limit]
+    next_cursor = items[-1][key_column.key]
+    return 200, items, [
+        ("Link", next_link(request, limit=page.limit, after=next_cursor)),
+        ("X-Next-Cursor", str(next_cursor)),
+    ]
+
+
+async def _stream(session, stmt, serialize):
+    result = await session.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+    yield b"["
+    first = True
+    async for partition in result.partitions():
+        chunk = b",".join(dumps(serialize(row)) for row in partition)
+        yield chunk if first else b"," + chunk
+        first = False
+    yield b"]"
+
+
+async def get_restaurant(session, request, id):
+    try:
+        schemas = parse_fieldsets(request.args)
+        # The menu and its pizzas are embedded unless include= says otherwise.
+        includes = (
+            parse_includes(request.args, RESTAURANT_INCLUDES)
+            if "include" in request.args else set(RESTAURANT_INCLUDES)
+        )
+    except ValueError as e:
+        return 400, {"errors": [str(e)]}
+
+    row = (await session.execute(select_schemas(schemas["restaurant"]).where(Restaurant.id == id))).first()
+    if not row:
+        return 404, {"error": "Restaurant not found"}
+
+    restaurant = schemas["restaurant"].dump(row)
+    if "restaurant_pizzas" in includes:
+        item_schema = schemas["restaurant_pizza"]
+        pizza_schema = schemas["pizza"] if "restaurant_pizzas.pizza" in includes else None
+        restaurant["restaurant_pizzas"] = [
+            dump_menu_item(menu_row, item_schema, pizza_schema)
+            for menu_row in await session.execute(menu_stmt([id], item_schema, pizza_schema))
+        ]
+    return 200, restaurant
+
+
+async def delete_restaurant(session, request, id):
+    # One statement either way: the menu goes via ON DELETE CASCADE, or, with
+    # soft deletes, later via the purge.
+    if SOFT_DELETE_ENABLED:
+        stmt = soft_delete_stmt(id)
+    else:
+        stmt = delete(Restaurant).where(Restaurant.id == id).returning(Restaurant.id)
+    if (await session.execute(stmt)).first() is None:
+        return 404, {"error": "Restaurant not found"}
+
+    await session.commit()
+    return 204, None
+
+
+async def get_pizza(session, request, id):
+    try:
+        schema = parse_fieldsets(request.args)["pizza"]
+    except ValueError as e:
+        return 400, {"errors": [str(e)]}
+
+    row = (await session.execute(select_schemas(schema).where(Pizza.id == id))).first()
+    if not row:
+        return 404, {"error": "Pizza not found"}
+    return 200, schema.dump(row)
+
+
+async def create_restaurant_pizza(session, request):
+    data = request.json() or {}
+    price = data.get("price")
+    pizza_id = data.get("pizza_id")
+    restaurant_id = data.get("restaurant_id")
+
+    if price is None or pizza_id is None or restaurant_id is None or not price_in_range(price):
+        return 400, {"errors": ["validation errors"]}
+
+    pizza = (await session.execute(select_schemas(PIZZA).where(Pizza.id == pizza_id))).first()
+    restaurant = (await session.execute(select_schemas(RESTAURANT).where(Restaurant.id == restaurant_id))).first()
+    if not pizza or not restaurant:
+        return 400, {"errors": ["validation errors"]}
+
+    row = (await session.execute(
+        insert(RestaurantPizza)
+        .values(price=price, pizza_id=pizza_id, restaurant_id=restaurant_id)
+        .returning(*RESTAURANT_PIZZA.columns)
+    )).one()
+    await session.commit()
+
+    restaurant_pizza = RESTAURANT_PIZZA.dump(row)
+    restaurant_pizza["pizza"] = PIZZA.dump(pizza)
+    restaurant_pizza["restaurant"] = RESTAURANT.dump(restaurant)
+    return 201, restaurant_pizza
+
+
+ROUTES = [
+    ("GET", re.compile(r"/restaurants"), get_restaurants),
+    ("GET", re.compile(r"/restaurants/(?P<id>\d+)"), get_restaurant),
+    ("DELETE", re.compile(r"/restaurants/(?P<id>\d+)"), delete_restaurant),
+    ("GET", re.compile(r"/pizzas"), get_pizzas),
+    ("GET", re.compile(r"/pizzas/(?P<id>\d+)"), get_pizza),
+    ("POST", re.compile(r"/restaurant_pizzas"), create_restaurant_pizza),
+]
+
+
+def resolve(method, path):
+    allowed = False
+    for route_method, pattern, handler in ROUTES:
+        match = pattern.fullmatch(path)
+        if match:
+            if route_method == method:
+                return handler, {key: int(value) for key, value in match.groupdict().items()}
+            allowed = True
+    return (405 if allowed else 404), None
+
+
+async def read_body(receive):
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def send_json(send, status, payload, extra_headers=()):
+    headers = [(b"content-type", b"application/json")]
+    headers += [(name.lower().encode(), value.encode()) for name, value in extra_headers]
+    if status == 204:
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    if hasattr(payload, "__aiter__"):
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        async for chunk in payload:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    body = dumps(payload)
+    headers.append((b"content-length", str(len(body)).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+
+    handler, kwargs = resolve(scope["method"], scope["path"])
+    if kwargs is None:
+        error = "Not found" if handler == 404 else "Method not allowed"
+        return await send_json(send, handler, {"error": error})
+
+    request = Request(scope, await read_body(receive))
+    async with Session() as session:
+        await send_json(send, *await handler(session, request, **kwargs))
@@ -0,0 +1,93 @@
+from models import db, Restaurant, Pizza, RestaurantPizza
+from serializers import RESTAURANT, PIZZA, RESTAURANT_PIZZA, select_schemas
+
+MAX_IDS = 1000
+RESTAURANT_INCLUDES = ("restaurant_pizzas", "restaurant_pizzas.pizza")
+
+
+def parse_ids(args):
+    """Ids from ``?ids=1,2,3`` in request order without repeats, or None.
+
+    Raises ValueError with a client-facing message on bad input.
+    """
+    if "ids" not in args:
+        return None
+    parts = [part.strip() for part in args["ids"].split(",") if part.strip()]
+    if not parts or not all(part.isdigit() for part in parts):
+        raise ValueError("'ids' must be a comma-separated list of integers")
+    ids = list(dict.fromkeys(int(part) for part in parts))
+    if len(ids) > MAX_IDS:
+        raise ValueError(f"at most {MAX_IDS} 'ids' per request")
+    return ids
+
+
+def parse_includes(args, allowed=()):
+    """The set of ``?include=`` paths; including ``a.b`` implies ``a``."""
+    includes = set()
+    for path in filter(None, (part.strip() for part in args.get("include", "").split(","))):
+        if not allowed:
+            raise ValueError("'include' is only supported together with 'ids'")
+        if path not in allowed:
+            raise ValueError(f"'include' must be one or more of {', '.join(allowed)}")
+        includes.add(path)
+        includes.add(path.split(".")[0])
+    return includes
+
+
+def _schemas(schemas):
+    return schemas or {"restaurant": RESTAURANT, "pizza": PIZZA, "restaurant_pizza": RESTAURANT_PIZZA}
+
+
+def _by_id(session, schema, model, ids):
+    rows = session.execute(select_schemas(schema).where(model.id.in_(ids))).all()
+    return {item["id"]: item for item in map(schema.dump, rows)}
+
+
+def _ordered(found, ids):
+    return [found[id] for id in ids if id in found], [id for id in ids if id not in found]
+
+
+def load_restaurants(ids, includes=(), schemas=None, session=None):
+    """Body for ``GET /restaurants?ids=...``: at most one IN query per table.
+
+    Restaurants come back in request order, unknown ids under
+    ``missing``. With ``restaurant_pizzas.pizza`` each pizza appears once
+    in a top-level ``pizzas`` list however many menus list it; menu
+    entries refer to it by ``pizza_id``. ``schemas`` is a
+    ``parse_fieldsets()`` result narrowing each type's fields. ``session``
+    defaults to ``db.session``; asgi.py passes its own via ``run_sync``.
+    """
+    session = session or db.session
+    schemas = _schemas(schemas)
+    restaurants, missing = _ordered(_by_id(session, schemas["restaurant"], Restaurant, ids), ids)
+    body = {"restaurants": restaurants, "missing": missing}
+
+    if "restaurant_pizzas" in includes:
+        item_schema = schemas["restaurant_pizza"]
+        menus = {restaurant["id"]: [] for restaurant in restaurants}
+        pizza_ids = {}
+        # The grouping keys are selected after the requested fields so
+        # a sparse fieldset can still leave them out of the output.
+        rows = session.execute(
+            select_schemas(item_schema)
+            .add_columns(RestaurantPizza.restaurant_id, RestaurantPizza.pizza_id)
+            .where(RestaurantPizza.restaurant_id.in_(list(menus)))
+            .order_by(RestaurantPizza.id)
+        ) if menus else ()
+        for row in rows:
+            restaurant_id, pizza_id = row[len(item_schema):]
+            menus[restaurant_id].append(item_schema.dump(row))
+            pizza_ids[pizza_id] = None
+        for restaurant in restaurants:
+            restaurant["restaurant_pizzas"] = menus[restaurant["id"]]
+
+        if "restaurant_pizzas.pizza" in includes:
+            pizzas = _by_id(session, schemas["pizza"], Pizza, list(pizza_ids)) if pizza_ids else {}
+            body["pizzas"] = [pizzas[id] for id in pizza_ids if id in pizzas]
+    return body
+
+
+def load_pizzas(ids, schemas=None, session=None):
+    """Body for ``GET /pizzas?ids=...``, in request order."""
+    pizzas, missing = _ordered(_by_id(session or db.session, _schemas(schemas)["pizza"], Pizza, ids), ids)
+    return {"pizzas": pizzas, "missing": missing}
@@ -0,0 +1,38 @@
+"""Shared setup for the benchmark scripts in this directory.
+
+Each script runs against a throwaway SQLite file so it never touches
+server/app.db. Import this module before ``app`` so DB_URI is set first.
+"""
+import os
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+_tmpdir = tempfile.mkdtemp(prefix="pizza-bench-")
+os.environ.setdefault("DB_URI", f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}")
+
+
+def timed(fn, repeat=5):
+    """Best-of-``repeat`` wall time for ``fn()`` in seconds, and its last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def seed_menu(db, restaurants, pizzas, menu_size, seed=0):
+    """Create the schema and bulk-load deterministic data (see seeding.py).
+
+    Restaurant and pizza ids are 1..restaurants and 1..pizzas on a fresh
+    database; every restaurant lists ``menu_size`` pizzas.
+    """
+    from seeding import bulk_seed
+
+    db.create_all()
+    bulk_seed(restaurants, pizzas, menu_size, seed=seed, report=lambda message: None)
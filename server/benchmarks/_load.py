@@ -0,0 +1,162 @@
+"""Closed-loop load generation and server launching shared by the benchmarks."""
+import http.client
+import json
+import math
+import re
+import socket
+import subprocess
+import threading
+import time
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(latencies, seconds, errors=0, queries=None):
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / seconds if seconds else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+    if queries:
+        summary["queries_per_request"] = sum(queries) / len(queries)
+    return summary
+
+
+class HTTPTransport:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.conn = http.client.HTTPConnection(host, port, timeout=30)
+
+    def request(self, method, path, body=None):
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload else {}
+        try:
+            self.conn.request(method, path, body=payload, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+            return response.status, dict(response.getheaders())
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            return None, {}
+
+    def close(self):
+        self.conn.close()
+
+
+class FlaskTransport:
+    """In-process requests through the Flask test client."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, dict(response.headers)
+
+    def close(self):
+        pass
+
+
+def run_load(make_transport, requests, concurrency, seconds):
+    """Issue ``requests`` round-robin from ``concurrency`` threads for ``seconds``.
+
+    ``requests`` is a list of dicts with name, method, path and optional
+    json. Returns overall and per-name throughput and latency percentiles;
+    queries per request are read from the Server-Timing header when present.
+    Responses with status >= 500 (or no response) count as errors.
+    """
+    results = {}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def worker(offset):
+        transport = make_transport()
+        local = {}
+        i = offset
+        while time.monotonic() < stop:
+            spec = requests[i % len(requests)]
+            i += 1
+            start = time.perf_counter()
+            status, headers = transport.request(spec["method"], spec["path"], spec.get("json"))
+            elapsed = time.perf_counter() - start
+            latencies, errors, queries = local.setdefault(spec["name"], ([], [0], []))
+            if status is None or status >= 500:
+                errors[0] += 1
+                continue
+            latencies.append(elapsed)
+            match = QUERIES.search(headers.get("Server-Timing", ""))
+            if match:
+                queries.append(int(match.group(1)))
+        transport.close()
+        with lock:
+            for name, (latencies, errors, queries) in local.items():
+                total = results.setdefault(name, ([], [0], []))
+                total[0].extend(latencies)
+                total[1][0] += errors[0]
+                total[2].extend(queries)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    all_latencies = [value for latencies, _, _ in results.values() for value in latencies]
+    all_errors = sum(errors[0] for _, errors, _ in results.values())
+    summary = summarize(all_latencies, elapsed, all_errors)
+    summary["endpoints"] = {
+        name: summarize(latencies, elapsed, errors[0], queries)
+        for name, (latencies, errors, queries) in sorted(results.items())
+    }
+    return summary
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+class Server:
+    """Context manager running a server command until the block exits."""
+
+    def __init__(self, command, port, env=None, cwd=None):
+        self.command, self.port, self.env, self.cwd = command, port, env, cwd
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            self.command, env=self.env, cwd=self.cwd,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        wait_for_port(self.port)
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=30)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Requests/sec and latency percentiles: gunicorn (WSGI) vs uvicorn (ASGI).
+
+    python server/benchmarks/asgi_vs_wsgi_bench.py [--workers 4] [--concurrency 32] [--seconds 10]
+
+Both servers run the same worker count against the same seeded database.
+The WSGI app's read cache, pizza cache, ingredient index, profiling and
+compression are switched off so both do the same queries, except that every
+WSGI GET still runs the conditional-GET version query the ASGI app skips.
+"""
+import argparse
+import json
+import os
+import sys
+
+import _common
+from _load import HTTPTransport, Server, free_port, run_load
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--restaurants", type=int, default=200)
+    args = parser.parse_args()
+
+    from app import app
+    from models import db
+
+    with app.app_context():
+        _common.seed_menu(db, args.restaurants, 100, 30)
+
+    mix = [
+        {"name": "GET /restaurants", "method": "GET", "path": "/restaurants"},
+        {"name": "GET /pizzas", "method": "GET", "path": "/pizzas"},
+    ]
+    mix += [{"name": "GET /restaurants/<id>", "method": "GET", "path": f"/restaurants/{n + 1}"}
+            for n in range(0, args.restaurants, 7)]
+    mix += [{"name": "GET /pizzas/<id>", "method": "GET", "path": f"/pizzas/{n + 1}"}
+            for n in range(0, 100, 11)]
+    mix += [{"name": "POST /restaurant_pizzas", "method": "POST", "path": "/restaurant_pizzas",
+             "json": {"price": 5, "pizza_id": 1, "restaurant_id": 1}}]
+
+    # Switch off the WSGI-only features so both servers do the same database work.
+    env = dict(os.environ, READ_CACHE_ENABLED="0", PIZZA_CACHE_ENABLED="0", INGREDIENT_INDEX_ENABLED="0",
+               PROFILING_ENABLED="0", COMPRESSION_ENABLED="0")
+    servers = {
+        "wsgi": lambda port: [sys.executable, "-m", "gunicorn", "--chdir", _common.SERVER_DIR,
+                              "-w", str(args.workers), "-b", f"127.0.0.1:{port}", "app:app"],
+        "asgi": lambda port: [sys.executable, "-m", "uvicorn", "--app-dir", _common.SERVER_DIR,
+                              "--workers", str(args.workers), "--port", str(port),
+                              "--log-level", "warning", "asgi:app"],
+    }
+    results = {}
+    for name, command in servers.items():
+        port = free_port()
+        transport = lambda: HTTPTransport("127.0.0.1", port)
+        with Server(command(port), port, env=env):
+            run_load(transport, mix, args.concurrency, 1)  # warm up
+            results[name] = run_load(transport, mix, args.concurrency, args.seconds)
+        r = results[name]
+        print(f"{name}: {r['rps']:8,.0f} req/s  p50 {r['p50_ms']:6.1f} ms  p99 {r['p99_ms']:6.1f} ms  errors {r['errors']}")
+    print("note: wsgi GETs include a conditional-GET version lookup that asgi skips")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""CPU time versus bytes saved per encoding and level for restaurant payloads.
+
+    python server/benchmarks/compression_bench.py [--menu-sizes 1,10,100,1000]
+
+Payloads are compact JSON, as served. "MB/s" is input throughput on one
+core. Skips brotli/zstd when those packages aren't installed.
+"""
+import argparse
+import json
+
+import _common
+from _common import timed
+
+from compression import ENCODERS
+from json_bench import restaurant_payload
+
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 6, 11), "zstd": (1, 3, 9, 19)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--menu-sizes", default="1,10,100,1000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for menu_size in (int(n) for n in args.menu_sizes.split(",")):
+        data = json.dumps(restaurant_payload(menu_size), separators=(",", ":")).encode()
+        print(f"menu_size={menu_size} ({len(data):,} bytes)")
+        for encoding, compress in ENCODERS.items():
+            for level in LEVELS[encoding]:
+                seconds, body = timed(lambda: compress(data, level), args.repeat)
+                saved = 1 - len(body) / len(data)
+                print(f"  {encoding:>4} {level:2d}: {seconds * 1e6:10.1f} us  {len(body):10,d} bytes "
+                      f"({saved:6.1%} saved)  {len(data) / seconds / 1e6:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
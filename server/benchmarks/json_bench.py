@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Encode time and size of a GET /restaurants/<id> payload per JSON provider.
+
+    python server/benchmarks/json_bench.py [--menu-sizes 10,100,1000]
+"""
+import argparse
+
+import _common
+from _common import timed
+
+from app import app
+from json_provider import CompactJSONProvider, OrjsonProvider, orjson
+
+
+def restaurant_payload(menu_size):
+    return {
+        "id": 1,
+        "name": "Karen's Pizza Shack",
+        "address": "1 Main St",
+        "restaurant_pizzas": [
+            {
+                "id": i,
+                "price": i % 30 + 1,
+                "pizza_id": i,
+                "restaurant_id": 1,
+                "pizza": {"id": i, "name": f"Pizza {i}", "ingredients": "Dough, Tomato Sauce, Cheese"},
+            }
+            for i in range(menu_size)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--menu-sizes", default="10,100,1000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    variants = [
+        ("stdlib pretty", CompactJSONProvider(app), True),
+        ("stdlib compact", CompactJSONProvider(app), False),
+    ]
+    if orjson is not None:
+        variants.append(("orjson compact", OrjsonProvider(app), False))
+
+    for menu_size in (int(n) for n in args.menu_sizes.split(",")):
+        payload = restaurant_payload(menu_size)
+        print(f"menu_size={menu_size}")
+        for name, provider, pretty in variants:
+            seconds, body = timed(lambda: provider.encode(payload, pretty=pretty), args.repeat)
+            size = len(body if isinstance(body, bytes) else body.encode())
+            print(f"  {name:>15}: {seconds * 1e6:10.1f} us  {size:10,d} bytes")
+
+
+if __name__ == "__main__":
+    main()
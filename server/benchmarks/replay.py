@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Replay a request mix against seeded data and report per-endpoint performance.
+
+    python server/benchmarks/replay.py [--mix server/benchmarks/mix.jsonl]
+        [--postman challenge-1-pizzas.postman_collection.json]
+        [--target client|server] [--concurrency 8] [--seconds 10]
+        [--restaurants 1000 --pizzas 200 --menu-size 20] [--output results.json]
+
+A mix is JSON Lines with name, method, path, optional json body and weight.
+``$restaurant_id``, ``$pizza_id`` and ``$price`` in the path or body are
+replaced by values drawn from the seeded data, with a fixed random seed so
+runs are reproducible. Requests from a Postman collection are added with
+weight 1. ``client`` drives the Flask test client in-process; ``server``
+starts gunicorn through gunicorn.conf.py. Output is one JSON document
+tagged with the current git commit so results can be compared over time.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import _common
+from _load import FlaskTransport, HTTPTransport, Server, free_port, run_load
+
+DEFAULT_MIX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mix.jsonl")
+
+
+def load_mix(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_postman(path):
+    with open(path) as f:
+        collection = json.load(f)
+
+    specs = []
+
+    def walk(items):
+        for item in items:
+            if "item" in item:
+                walk(item["item"])
+                continue
+            req = item["request"]
+            url = urlsplit(req["url"]["raw"] if isinstance(req["url"], dict) else req["url"])
+            body = req.get("body", {}).get("raw")
+            specs.append({
+                "name": f"{req['method']} {url.path} (postman)",
+                "method": req["method"],
+                "path": url.path + (f"?{url.query}" if url.query else ""),
+                "json": json.loads(body) if body else None,
+                "weight": 1,
+            })
+
+    walk(collection["item"])
+    return specs
+
+
+def expand(specs, count, restaurants, pizzas, seed):
+    """Draw ``count`` concrete requests from the weighted specs."""
+    rng = random.Random(seed)
+    values = lambda: {
+        "restaurant_id": rng.randint(1, restaurants),
+        "pizza_id": rng.randint(1, pizzas),
+        "price": rng.randint(1, 30),
+    }
+
+    def substitute(value, chosen):
+        if isinstance(value, str) and value.startswith("$") and value[1:] in chosen:
+            return chosen[value[1:]]
+        if isinstance(value, str):
+            for key, replacement in chosen.items():
+                value = value.replace(f"${key}", str(replacement))
+            return value
+        if isinstance(value, list):
+            return [substitute(item, values()) if isinstance(item, dict) else substitute(item, chosen) for item in value]
+        if isinstance(value, dict):
+            return {key: substitute(item, chosen) for key, item in value.items()}
+        return value
+
+    weights = [spec.get("weight", 1) for spec in specs]
+    requests = []
+    for spec in rng.choices(specs, weights=weights, k=count):
+        chosen = values()
+        requests.append({
+            "name": spec["name"],
+            "method": spec["method"],
+            "path": substitute(spec["path"], chosen),
+            "json": substitute(spec.get("json"), chosen),
+        })
+    return requests
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=_common.SERVER_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mix", action="append", help="JSONL mix file (repeatable)")
+    parser.add_argument("--postman", help="Postman collection to add to the mix")
+    parser.add_argument("--target", choices=("client", "server"), default="client")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers for --target server")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--restaurants", type=int, default=1000)
+    parser.add_argument("--pizzas", type=int, default=200)
+    parser.add_argument("--menu-size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    specs = []
+    for path in args.mix or [DEFAULT_MIX]:
+        specs.extend(load_mix(path))
+    if args.postman:
+        specs.extend(load_postman(args.postman))
+    requests = expand(specs, 5000, args.restaurants, args.pizzas, args.seed)
+
+    from app import create_app
+    from models import db
+
+    app = create_app(migrations=False)
+    with app.app_context():
+        _common.seed_menu(db, args.restaurants, args.pizzas, args.menu_size, args.seed)
+
+    if args.target == "client":
+        results = run_load(lambda: FlaskTransport(app), requests, args.concurrency, args.seconds)
+    else:
+        port = free_port()
+        env = dict(os.environ, GUNICORN_BIND=f"127.0.0.1:{port}", GUNICORN_WORKERS=str(args.workers))
+        command = [sys.executable, "-m", "gunicorn", "-c", os.path.join(_common.SERVER_DIR, "gunicorn.conf.py")]
+        with Server(command, port, env=env):
+            transport = lambda: HTTPTransport("127.0.0.1", port)
+            run_load(transport, requests, args.concurrency, 1)  # warm up
+            results = run_load(transport, requests, args.concurrency, args.seconds)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "target": args.target,
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
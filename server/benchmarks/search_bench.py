@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""GET /search (FTS5) versus scanning all restaurants and filtering.
+
+    python server/benchmarks/search_bench.py [--restaurants 1000000] [--queries smith,group]
+
+"client filter" is what client/src/components/Home.js had to do: load
+every restaurant and substring-match in the caller. "LIKE scan" pushes
+the same filter into SQLite, which still reads every row and, having no
+ranking, has to return every match. FTS5 returns the best 20. The seed
+time is mostly Faker; pass a smaller --restaurants for a quick run.
+"""
+import argparse
+import time
+
+import _common
+from _common import seed_menu, timed
+
+from app import app
+from models import db, Restaurant
+from search import match_expression, search
+from serializers import RESTAURANT, select_schemas
+from sqlalchemy import or_
+
+
+def client_filter(query):
+    rows = db.session.execute(select_schemas(RESTAURANT)).all()
+    needle = query.casefold()
+    return [
+        restaurant for restaurant in map(RESTAURANT.dump, rows)
+        if needle in restaurant["name"].casefold() or needle in restaurant["address"].casefold()
+    ]
+
+
+def like_scan(query):
+    pattern = f"%{query}%"
+    return db.session.execute(
+        select_schemas(RESTAURANT)
+        .where(or_(Restaurant.name.like(pattern), Restaurant.address.like(pattern)))
+    ).all()
+
+
+def fts(query):
+    return search(match_expression(query), ("restaurant",), 20)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--restaurants", type=int, default=1_000_000)
+    parser.add_argument("--pizzas", type=int, default=1000)
+    parser.add_argument("--queries", default="smith,group,ste,xylophone")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with app.app_context():
+        start = time.perf_counter()
+        seed_menu(db, args.restaurants, args.pizzas, menu_size=0)
+        print(f"seeded {args.restaurants:,} restaurants (FTS triggers on) in {time.perf_counter() - start:.1f}s")
+
+        for query in args.queries.split(","):
+            print(f"q={query!r}")
+            for name, fn in (("client filter", client_filter), ("LIKE scan", like_scan), ("FTS5", fts)):
+                seconds, results = timed(lambda: fn(query), args.repeat)
+                print(f"  {name:>13}: {seconds * 1000:10.2f} ms  {len(results):8,d} results")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Rows/sec for the column-projected serializers versus ORM-based paths.
+
+    python server/benchmarks/serialization_bench.py [--restaurants N] [--menu-size M]
+"""
+import argparse
+
+import _common
+from _common import timed
+
+from app import app
+from models import db, Restaurant, RestaurantPizza
+from serializers import RESTAURANT, dump_menu_item, menu_stmt, select_schemas
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+# What the ORM paths would need to stay at a constant number of statements:
+# one SELECT ... IN for the menus, with the pizza joined onto each row.
+MENU_LOADER = selectinload(Restaurant.restaurant_pizzas).joinedload(RestaurantPizza.pizza)
+
+
+def orm_to_dict():
+    db.session.expunge_all()
+    restaurants = db.session.execute(
+        select(Restaurant).options(MENU_LOADER)
+    ).scalars().all()
+    return [restaurant.to_dict() for restaurant in restaurants]
+
+
+def orm_hand_built():
+    db.session.expunge_all()
+    restaurants = db.session.execute(
+        select(Restaurant).options(MENU_LOADER)
+    ).scalars().all()
+    return [
+        {
+            "id": restaurant.id,
+            "name": restaurant.name,
+            "address": restaurant.address,
+            "restaurant_pizzas": [
+                {
+                    "id": rp.id,
+                    "price": rp.price,
+                    "pizza_id": rp.pizza_id,
+                    "restaurant_id": rp.restaurant_id,
+                    "pizza": {
+                        "id": rp.pizza.id,
+                        "name": rp.pizza.name,
+                        "ingredients": rp.pizza.ingredients,
+                    },
+                }
+                for rp in restaurant.restaurant_pizzas
+            ],
+        }
+        for restaurant in restaurants
+    ]
+
+
+def projected():
+    restaurants = {
+        row[0]: dict(RESTAURANT.dump(row), restaurant_pizzas=[])
+        for row in db.session.execute(select_schemas(RESTAURANT))
+    }
+    for row in db.session.execute(menu_stmt(list(restaurants))):
+        item = dump_menu_item(row)
+        restaurants[item["restaurant_id"]]["restaurant_pizzas"].append(item)
+    return list(restaurants.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--restaurants", type=int, default=200)
+    parser.add_argument("--pizzas", type=int, default=100)
+    parser.add_argument("--menu-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        _common.seed_menu(db, args.restaurants, args.pizzas, args.menu_size)
+        rows = args.restaurants * (args.menu_size + 1)
+        print(f"{rows} rows per run, best of {args.repeat}")
+        for name, fn in (("to_dict", orm_to_dict), ("hand-built", orm_hand_built), ("projected", projected)):
+            seconds, _ = timed(fn, args.repeat)
+            print(f"{name:>12}: {seconds * 1000:8.1f} ms  {rows / seconds:12,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Read throughput with parallel writers, per SQLite profile (DB_PROFILE).
+
+    python server/benchmarks/sqlite_concurrency_bench.py [--readers 8] [--writers 2] [--seconds 5]
+
+Each profile runs in its own process against a fresh database so PRAGMAs
+(notably journal_mode) don't leak between runs.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import _common
+
+from db_config import PROFILES
+
+
+def worker(args):
+    from app import app
+    from models import db
+
+    with app.app_context():
+        _common.seed_menu(db, 100, 50, 20)
+
+    stop = time.monotonic() + args.seconds
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def reader(n):
+        client = app.test_client()
+        while time.monotonic() < stop:
+            # Any query string bypasses the read cache, so every read hits SQLite.
+            status = client.get(f"/restaurants/{n % 100 + 1}?nocache=1").status_code
+            with lock:
+                counts["reads" if status == 200 else "errors"] += 1
+
+    def writer(n):
+        client = app.test_client()
+        i = 0
+        while time.monotonic() < stop:
+            i += 1
+            status = client.post("/restaurant_pizzas", json={
+                "price": i % 30 + 1, "pizza_id": i % 50 + 1, "restaurant_id": (n + i) % 100 + 1,
+            }).status_code
+            with lock:
+                counts["writes" if status == 201 else "errors"] += 1
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(json.dumps(counts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    for profile in PROFILES:
+        env = dict(os.environ, DB_PROFILE=profile,
+                   DB_URI=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+        output = subprocess.run(
+            [sys.executable, __file__, "--worker", f"--readers={args.readers}",
+             f"--writers={args.writers}", f"--seconds={args.seconds}"],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        counts = json.loads(output.strip().splitlines()[-1])
+        print(f"{profile:>12}: {counts['reads'] / args.seconds:10,.0f} reads/s  "
+              f"{counts['writes'] / args.seconds:8,.0f} writes/s  {counts['errors']} errors")
+
+
+if __name__ == "__main__":
+    main()
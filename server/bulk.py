@@ -0,0 +1,194 @@
+import json
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from ingredients import sync_pizza_ingredients
+from models import db, Restaurant, Pizza, RestaurantPizza, MIN_PRICE, MAX_PRICE, price_in_range
+
+MAX_BATCH_ITEMS = 10000
+FIELDS = ("price", "pizza_id", "restaurant_id")
+
+
+class BatchError(Exception):
+    """The request body as a whole can't be processed."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_records(request):
+    """Read restaurant_pizza records from a JSON array or an NDJSON body."""
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        records = []
+        for line_no, line in enumerate(request.stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                raise BatchError(f"line {line_no} is not valid JSON")
+            if len(records) > MAX_BATCH_ITEMS:
+                raise BatchError(f"at most {MAX_BATCH_ITEMS} records per batch", 413)
+        return records
+
+    records = request.get_json(silent=True)
+    if not isinstance(records, list):
+        raise BatchError("body must be a JSON array or NDJSON")
+    if len(records) > MAX_BATCH_ITEMS:
+        raise BatchError(f"at most {MAX_BATCH_ITEMS} records per batch", 413)
+    return records
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def validate_records(records):
+    """Split records into insertable rows and per-item errors.
+
+    Shape and price checks run over the whole batch first; foreign keys
+    are then checked with one IN query per table for all remaining items.
+    """
+    errors = {}
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors[index] = ["record must be an object"]
+            continue
+        problems = [f"'{field}' must be an integer" for field in FIELDS if not _is_int(record.get(field))]
+        if not problems and not price_in_range(record["price"]):
+            problems.append(f"'price' must be between {MIN_PRICE} and {MAX_PRICE}")
+        if problems:
+            errors[index] = problems
+
+    candidates = [index for index in range(len(records)) if index not in errors]
+    pizza_ids = {records[index]["pizza_id"] for index in candidates}
+    restaurant_ids = {records[index]["restaurant_id"] for index in candidates}
+    known_pizzas = set(db.session.execute(
+        select(Pizza.id).where(Pizza.id.in_(pizza_ids))
+    ).scalars()) if pizza_ids else set()
+    known_restaurants = set(db.session.execute(
+        select(Restaurant.id).where(Restaurant.id.in_(restaurant_ids))
+    ).scalars()) if restaurant_ids else set()
+
+    rows = []
+    for index in candidates:
+        record = records[index]
+        problems = []
+        if record["pizza_id"] not in known_pizzas:
+            problems.append(f"pizza {record['pizza_id']} not found")
+        if record["restaurant_id"] not in known_restaurants:
+            problems.append(f"restaurant {record['restaurant_id']} not found")
+        if problems:
+            errors[index] = problems
+        else:
+            rows.append((index, {field: record[field] for field in FIELDS}))
+    return rows, errors
+
+
+def insert_restaurant_pizzas(rows):
+    """Insert validated rows with one executemany; return their new ids in order."""
+    if not rows:
+        return []
+    result = db.session.execute(
+        insert(RestaurantPizza).returning(RestaurantPizza.id, sort_by_parameter_order=True),
+        [values for _, values in rows],
+    )
+    return list(result.scalars())
+
+
+def insert_restaurant_pizzas_each(rows):
+    """Like insert_restaurant_pizzas, but a row violating a constraint gets its IntegrityError instead of an id.
+
+    Tries the single executemany first; if it fails, the transaction is
+    rolled back and the rows are retried one savepoint each. Validated rows
+    can still fail when a restaurant or pizza is deleted concurrently.
+    """
+    try:
+        return insert_restaurant_pizzas(rows)
+    except IntegrityError:
+        db.session.rollback()
+    results = []
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                results.append(insert_restaurant_pizzas([row])[0])
+        except IntegrityError as e:
+            results.append(e)
+    return results
+
+
+def create_restaurant_with_menu(name, address, items):
+    """Create a restaurant and its menu in the current transaction.
+
+    Every item is validated before anything is written. Pizzas referenced
+    by id are resolved with one IN query; ids that don't exist are created
+    from the item's name/ingredients with one bulk insert (once per id).
+    Returns the response body, built from the values written rather than
+    by reloading relationships, and the ids of any pizzas it created.
+    Raises BatchError on invalid input.
+    """
+    if not isinstance(items, list):
+        raise BatchError("'restaurant_pizzas' must be a list")
+    for item in items:
+        pizza_data = item.get("pizza") if isinstance(item, dict) else None
+        if not isinstance(pizza_data, dict) or not _is_int(pizza_data.get("id")):
+            raise BatchError("Pizza data with an integer 'id' is required for each restaurant pizza")
+        price = item.get("price")
+        if not _is_int(price) or not price_in_range(price):
+            raise BatchError(f"Price is required and must be between {MIN_PRICE} and {MAX_PRICE}")
+
+    requested = {}
+    for item in items:
+        requested.setdefault(item["pizza"]["id"], item["pizza"])
+
+    pizzas = {
+        row.id: {"id": row.id, "name": row.name, "ingredients": row.ingredients}
+        for row in db.session.execute(
+            select(Pizza.id, Pizza.name, Pizza.ingredients).where(Pizza.id.in_(requested))
+        )
+    } if requested else {}
+
+    missing = [pizza_id for pizza_id in requested if pizza_id not in pizzas]
+    for pizza_id in missing:
+        if not requested[pizza_id].get("name") or not requested[pizza_id].get("ingredients"):
+            raise BatchError(f"Pizza {pizza_id} not found; 'name' and 'ingredients' are required to create it")
+
+    if missing:
+        new_rows = [
+            {"name": requested[pizza_id]["name"], "ingredients": requested[pizza_id]["ingredients"]}
+            for pizza_id in missing
+        ]
+        new_ids = db.session.execute(
+            insert(Pizza).returning(Pizza.id, sort_by_parameter_order=True), new_rows
+        ).scalars()
+        for pizza_id, new_id, values in zip(missing, new_ids, new_rows):
+            pizzas[pizza_id] = {"id": new_id, **values}
+        sync_pizza_ingredients(
+            db.session.connection(),
+            [(pizzas[pizza_id]["id"], pizzas[pizza_id]["ingredients"]) for pizza_id in missing],
+        )
+
+    restaurant_id = db.session.execute(
+        insert(Restaurant).values(name=name, address=address).returning(Restaurant.id)
+    ).scalar_one()
+
+    menu = [
+        {"price": item["price"], "pizza": pizzas[item["pizza"]["id"]]}
+        for item in items
+    ]
+    rp_ids = insert_restaurant_pizzas([
+        (index, {"price": entry["price"], "pizza_id": entry["pizza"]["id"], "restaurant_id": restaurant_id})
+        for index, entry in enumerate(menu)
+    ])
+
+    return {
+        "id": restaurant_id,
+        "name": name,
+        "address": address,
+        "restaurant_pizzas": [
+            {"id": rp_id, **entry} for rp_id, entry in zip(rp_ids, menu)
+        ],
+    }, [pizzas[pizza_id]["id"] for pizza_id in missing]
@@ -0,0 +1,291 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import Restaurant, Pizza, RestaurantPizza
+from profiling import gauge_lines, registry
+
+MISSING = object()
+
+
+class CacheBackend:
+    """Interface for read-cache storage.
+
+    Values are opaque bytes. Backends count their own hits and misses so
+    ``stats`` can be reported the same way whichever one is configured.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, *keys):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+
+class LRUTTLCache(CacheBackend):
+    """In-process LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "backend": "lru",
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class RedisBackend(CacheBackend):
+    """Backend over a redis-py compatible client (redis.Redis, fakeredis, ...).
+
+    Shared between worker processes, so invalidations made by one worker
+    are seen by all of them. Eviction is left to the server's maxmemory
+    policy and isn't counted here.
+    """
+
+    def __init__(self, client, ttl=30.0, namespace="pizza-cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.namespace = namespace
+        self.hits = self.misses = self.invalidations = 0
+
+    def get(self, key):
+        value = self.client.get(self.namespace + key)
+        if value is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.client.set(self.namespace + key, value, px=int(self.ttl * 1000))
+
+    def delete(self, *keys):
+        if keys:
+            self.invalidations += self.client.delete(*(self.namespace + key for key in keys))
+
+    def delete_prefix(self, prefix):
+        keys = list(self.client.scan_iter(match=f"{self.namespace}{prefix}*"))
+        if keys:
+            self.invalidations += self.client.delete(*keys)
+
+    def clear(self):
+        self.delete_prefix("")
+
+    def stats(self):
+        return {
+            "backend": "redis",
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+class ReadCache:
+    """Caches encoded JSON bodies of read endpoints.
+
+    Keys are ``"<endpoint>"`` for collections and ``"<endpoint>:<id>"`` for
+    single resources. Only plain requests (no query string) and 200
+    responses are cached, so paginated, streamed and pretty-printed
+    variants always go to the database.
+
+    Each body is stored with the ETag that @conditional computed from the
+    database for it (``g.etag``), and is only served while the database
+    still yields that ETag. Invalidation is per process (unless the Redis
+    backend is used), so a worker that missed another worker's write
+    would otherwise keep serving the old body under the new ETag until
+    the TTL ran out.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or LRUTTLCache()
+        self.stale = 0
+
+    def cached(self, key_template):
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**kwargs):
+                if not current_app.config.get("READ_CACHE_ENABLED", True) or request.args:
+                    return view(**kwargs)
+
+                key = key_template.format(**kwargs)
+                stamp = g.get("etag", "").encode()
+                entry = self.backend.get(key)
+                if entry is not MISSING:
+                    entry_stamp, _, body = entry.partition(b"\n")
+                    if entry_stamp == stamp:
+                        response = current_app.response_class(body, mimetype="application/json")
+                        response.headers["X-Cache"] = "HIT"
+                        return response
+                    self.stale += 1
+
+                response = make_response(view(**kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    self.backend.set(key, stamp + b"\n" + response.get_data())
+                response.headers["X-Cache"] = "MISS"
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, keys=(), prefixes=()):
+        if keys:
+            self.backend.delete(*keys)
+        for prefix in prefixes:
+            self.backend.delete_prefix(prefix)
+
+    def stats(self):
+        return {**self.backend.stats(), "stale": self.stale}
+
+
+read_cache = ReadCache()
+
+
+def configure_cache(app):
+    """Pick the read-cache backend from the app config.
+
+    READ_CACHE_REDIS_URL selects the shared Redis backend; otherwise an
+    in-process LRU sized by READ_CACHE_MAXSIZE is used. READ_CACHE_TTL is
+    the entry lifetime in seconds for either.
+    """
+    ttl = float(app.config.get("READ_CACHE_TTL", 30))
+    redis_url = app.config.get("READ_CACHE_REDIS_URL")
+    if redis_url:
+        import redis
+
+        read_cache.backend = RedisBackend(redis.Redis.from_url(redis_url), ttl=ttl)
+    else:
+        read_cache.backend = LRUTTLCache(int(app.config.get("READ_CACHE_MAXSIZE", 1024)), ttl)
+
+
+def invalidation_keys(target):
+    """Cache keys and key prefixes made stale by a change to ``target``."""
+    if isinstance(target, Restaurant):
+        return ("restaurants", f"restaurants:{target.id}"), ()
+    if isinstance(target, Pizza):
+        # Pizzas are embedded in every restaurant detail that lists them.
+        return ("pizzas", f"pizzas:{target.id}"), ("restaurants:",)
+    if isinstance(target, RestaurantPizza):
+        return (f"restaurants:{target.restaurant_id}",), ()
+    return (), ()
+
+
+def invalidate_restaurants(ids):
+    """For writes that bypass the ORM (Core inserts/updates)."""
+    read_cache.invalidate(keys=["restaurants", *(f"restaurants:{id}" for id in ids)])
+
+
+def invalidate_pizzas(ids):
+    """For writes that bypass the ORM (Core inserts/updates)."""
+    read_cache.invalidate(keys=["pizzas", *(f"pizzas:{id}" for id in ids)], prefixes=["restaurants:"])
+
+
+def _on_change(mapper, connection, target):
+    keys, prefixes = invalidation_keys(target)
+    read_cache.invalidate(keys, prefixes)
+    # A reader on another connection can still repopulate the cache with the
+    # pre-commit state between flush and commit, so invalidate again after.
+    session = Session.object_session(target)
+    if session is not None:
+        pending = session.info.setdefault("read_cache_pending", ([], []))
+        pending[0].extend(keys)
+        pending[1].extend(prefixes)
+
+
+def _after_commit(session):
+    keys, prefixes = session.info.pop("read_cache_pending", ((), ()))
+    if keys or prefixes:
+        read_cache.invalidate(set(keys), set(prefixes))
+
+
+def _after_rollback(session):
+    session.info.pop("read_cache_pending", None)
+
+
+for _model in (Restaurant, Pizza, RestaurantPizza):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _on_change)
+
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_rollback", _after_rollback)
+
+
+def _metrics():
+    stats = read_cache.stats()
+    return gauge_lines(
+        "read_cache",
+        "Read cache counters and size by kind.",
+        [((("backend", stats["backend"]), ("kind", kind)), value)
+         for kind, value in stats.items() if kind != "backend"],
+    )
+
+
+registry.collectors.append(_metrics)
@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import time
+
+from flask import request
+
+from cache import MISSING, LRUTTLCache
+from profiling import Counter, gauge_lines, record, registry
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html", "text/csv")
+
+# Server preference when the client rates several encodings equally.
+ENCODERS = {}
+if brotli is not None:
+    ENCODERS["br"] = lambda data, level: brotli.compress(data, quality=level, mode=brotli.MODE_TEXT)
+if zstandard is not None:
+    ENCODERS["zstd"] = lambda data, level: zstandard.ZstdCompressor(level=level).compress(data)
+ENCODERS["gzip"] = lambda data, level: gzip.compress(data, compresslevel=level, mtime=0)
+
+DEFAULT_LEVELS = {"br": 4, "zstd": 3, "gzip": 6}
+
+bytes_in = registry.register(Counter(
+    "compression_input_bytes_total", "Response bytes before compression.", ("encoding",)))
+bytes_out = registry.register(Counter(
+    "compression_output_bytes_total", "Response bytes after compression.", ("encoding",)))
+
+
+def etag_variants(etag):
+    """``etag`` and the per-encoding ETags compressed responses carry."""
+    return [etag] + [f"{etag}-{encoding}" for encoding in ENCODERS]
+
+
+class Compressor:
+    """Negotiated Content-Encoding for response bodies.
+
+    Compressed bodies are kept in an LRU keyed by a digest of the
+    uncompressed body, so identical responses (read-cache hits, popular
+    list pages) are compressed once per encoding.
+    """
+
+    def __init__(self, min_size=1024, levels=None, encodings=None, cache_size=256, cache_ttl=300.0):
+        self.min_size = min_size
+        self.levels = {**DEFAULT_LEVELS, **(levels or {})}
+        self.encodings = [encoding for encoding in (encodings or ENCODERS) if encoding in ENCODERS]
+        self.cache = LRUTTLCache(cache_size, cache_ttl) if cache_size else None
+
+    def choose(self, accept_encodings):
+        if not accept_encodings:
+            return None
+        return accept_encodings.best_match(self.encodings)
+
+    def compress(self, data, encoding):
+        level = self.levels[encoding]
+        if self.cache is None:
+            return ENCODERS[encoding](data, level)
+        key = f"{encoding}:{level}:{hashlib.blake2b(data, digest_size=16).hexdigest()}"
+        body = self.cache.get(key)
+        if body is MISSING:
+            body = ENCODERS[encoding](data, level)
+            self.cache.set(key, body)
+        return body
+
+    def __call__(self, response):
+        if (
+            response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        data = response.get_data()
+        encoding = self.choose(request.accept_encodings)
+        if len(data) < self.min_size or encoding is None:
+            return response
+
+        start = time.perf_counter()
+        body = self.compress(data, encoding)
+        record("compress", time.perf_counter() - start)
+        bytes_in.inc((encoding,), len(data))
+        bytes_out.inc((encoding,), len(body))
+
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        # A strong ETag names one exact byte sequence, so each encoding gets its own.
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
+
+
+_compressors = []
+
+
+def _metrics():
+    stats = [compressor.cache.stats() for compressor in _compressors if compressor.cache is not None]
+    return gauge_lines(
+        "compression_cache", "Precompressed body cache counters by kind.",
+        [((("kind", kind),), sum(s[kind] for s in stats)) for kind in ("size", "hits", "misses", "evictions")],
+    )
+
+
+registry.collectors.append(_metrics)
+
+
+def init_compression(app):
+    """Compress responses per COMPRESSION_* settings.
+
+    Registered after profiling so the time shows up as the "compress"
+    phase in Server-Timing (after_request hooks run in reverse order).
+    """
+    compressor = Compressor(
+        min_size=app.config.get("COMPRESSION_MIN_SIZE", 1024),
+        levels=app.config.get("COMPRESSION_LEVELS"),
+        encodings=app.config.get("COMPRESSION_ENCODINGS"),
+        cache_size=app.config.get("COMPRESSION_CACHE_SIZE", 256),
+    )
+    app.extensions["compressor"] = compressor
+    _compressors.append(compressor)
+    app.after_request(compressor)
@@ -0,0 +1,172 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+from sqlalchemy import event, func, select
+
+from compression import etag_variants
+from models import db, Restaurant, Pizza, RestaurantPizza, table_versions
+
+VERSIONED_TABLES = ("restaurants", "pizzas", "restaurant_pizzas")
+
+
+def _bump_sql(table):
+    return (
+        "INSERT INTO table_versions (name, version, updated_at) "
+        f"VALUES ('{table}', 1, strftime('%Y-%m-%d %H:%M:%f', 'now')) "
+        "ON CONFLICT(name) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at;"
+    )
+
+
+def version_trigger_ddl():
+    """Triggers bumping a table's table_versions row on every insert, update and delete.
+
+    Triggers rather than ORM events so Core bulk writes, foreign-key
+    cascades and the purge worker are all counted.
+    """
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_version_a{op[0].lower()} AFTER {op} ON {table} "
+        f"BEGIN {_bump_sql(table)} END"
+        for table in VERSIONED_TABLES
+        for op in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+
+def bump_versions(connection, tables=VERSIONED_TABLES):
+    """Bump ``tables`` by hand, for writes made while the triggers were suspended."""
+    for table in tables:
+        if table in VERSIONED_TABLES:
+            connection.exec_driver_sql(_bump_sql(table))
+
+
+def _create_triggers(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in version_trigger_ddl():
+        connection.exec_driver_sql(statement)
+    # create_all() may run against an existing database; only fill in missing rows.
+    for table in VERSIONED_TABLES:
+        connection.exec_driver_sql(
+            "INSERT OR IGNORE INTO table_versions (name, version, updated_at) "
+            f"VALUES ('{table}', 0, strftime('%Y-%m-%d %H:%M:%f', 'now'))")
+
+
+# The migration installs the triggers on existing databases; this covers db.create_all().
+event.listen(db.metadata, "after_create", _create_triggers)
+
+
+def collection_version(model):
+    """(write counter, time of the last write) for a whole table.
+
+    One primary-key lookup in table_versions rather than an aggregate
+    over the table, so it stays cheap next to a keyset page or a cache hit.
+    """
+    row = db.session.execute(
+        select(table_versions.c.version, table_versions.c.updated_at)
+        .where(table_versions.c.name == model.__tablename__)
+    ).first()
+    return tuple(row) if row else (0, None)
+
+
+def restaurants_version():
+    """Version of GET /restaurants; with include=, also of the menus and pizzas it embeds."""
+    version = tuple(collection_version(Restaurant))
+    if request.args.get("include"):
+        version += tuple(collection_version(RestaurantPizza)) + tuple(collection_version(Pizza))
+    return version
+
+
+def restaurant_version(id):
+    """Version of GET /restaurants/<id>: the restaurant, its menu rows and their pizzas.
+
+    Returns None when the restaurant doesn't exist. Only what ``include=``
+    embeds (by default, everything) is joined in.
+    """
+    include = request.args.get("include", "restaurant_pizzas.pizza")
+    columns = [Restaurant.updated_at]
+    if "restaurant_pizzas" in include:
+        columns += [func.count(RestaurantPizza.id), func.max(RestaurantPizza.updated_at)]
+    if "restaurant_pizzas.pizza" in include:
+        columns.append(func.max(Pizza.updated_at))
+
+    stmt = select(*columns).where(Restaurant.id == id).group_by(Restaurant.id)
+    if len(columns) > 1:
+        stmt = stmt.outerjoin(RestaurantPizza, RestaurantPizza.restaurant_id == Restaurant.id)
+    if len(columns) > 3:
+        stmt = stmt.outerjoin(Pizza, Pizza.id == RestaurantPizza.pizza_id)
+    row = db.session.execute(stmt).first()
+    return tuple(row) if row else None
+
+
+def pizza_version(id):
+    updated_at = db.session.execute(
+        select(Pizza.updated_at).where(Pizza.id == id)
+    ).scalar_one_or_none()
+    return (updated_at,) if updated_at else None
+
+
+def make_etag(version):
+    """Strong ETag over the resource version and the exact request variant."""
+    digest = hashlib.sha1(repr(version).encode())
+    digest.update(request.full_path.encode())
+    return digest.hexdigest()
+
+
+def last_modified(version):
+    stamps = [value for value in version if hasattr(value, "tzinfo")]
+    if not stamps:
+        return None
+    return max(stamps).replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def conditional(version_fn, modified_since=True):
+    """Answer If-None-Match / If-Modified-Since with 304 before running the view.
+
+    ``version_fn`` receives the view's keyword arguments and returns a
+    tuple that changes whenever the response body would; returning None
+    means the resource is missing and the view handles it.
+
+    Pass ``modified_since=False`` when the body can change without any
+    updated_at moving (a row deleted from a collection or menu): only
+    the ETag, which includes the row counts, is then trusted for 304s.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            version = version_fn(**kwargs)
+            if version is None:
+                return view(**kwargs)
+
+            etag = make_etag(version)
+            modified = last_modified(version)
+            # read_cache.cached checks its entries against this.
+            g.etag = etag
+
+            matched = etag
+            if request.if_none_match:
+                # The client may hold any encoding's variant (see compression.py).
+                matched = next(
+                    (variant for variant in etag_variants(etag) if request.if_none_match.contains(variant)), None)
+                not_modified = matched is not None
+            elif modified_since and request.if_modified_since and modified:
+                not_modified = modified <= request.if_modified_since
+            else:
+                not_modified = False
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+                etag = matched
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if modified:
+                response.last_modified = modified
+            # Let browsers keep the body but revalidate on every use.
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
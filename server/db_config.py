@@ -0,0 +1,108 @@
+import os
+from functools import partial
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+DATABASE = os.environ.get("DB_URI", f"sqlite:///{os.path.join(BASE_DIR, 'app.db')}")
+
+# PRAGMAs applied to every new SQLite connection, by profile (DB_PROFILE).
+#
+# production: WAL lets readers run alongside a writer, synchronous=NORMAL
+# only fsyncs at checkpoints (safe in WAL mode), busy_timeout makes writers
+# wait for the lock instead of failing with "database is locked".
+PROFILES = {
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "foreign_keys": "ON",
+        "cache_size": -64000,  # KiB, i.e. 64 MB of page cache per connection
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    "development": {
+        "busy_timeout": 5000,
+        "foreign_keys": "ON",
+    },
+}
+
+# journal_mode can't be changed on in-memory databases and is a no-op there.
+FILE_ONLY_PRAGMAS = ("journal_mode", "mmap_size")
+
+
+def _is_sqlite_file(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def engine_options(uri, env=os.environ):
+    """SQLALCHEMY_ENGINE_OPTIONS for ``uri``.
+
+    Pool sizes are per process, so with N gunicorn workers the database
+    sees up to N * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+    In-memory SQLite is left to Flask-SQLAlchemy's StaticPool.
+    """
+    url = make_url(uri)
+    if url.get_backend_name() == "sqlite" and not _is_sqlite_file(uri):
+        return {}
+
+    options = {
+        "pool_size": int(env.get("DB_POOL_SIZE", 5)),
+        "max_overflow": int(env.get("DB_MAX_OVERFLOW", 5)),
+        "pool_timeout": float(env.get("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(env.get("DB_POOL_RECYCLE", 3600)),
+    }
+    if url.get_backend_name() == "sqlite":
+        # Connections move between threads through the pool.
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+
+def set_sqlite_pragmas(pragmas, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def pragmas_for(url, profile):
+    """The PRAGMAs of ``profile`` that apply to the database at ``url``."""
+    pragmas = dict(PROFILES[profile])
+    if not _is_sqlite_file(url):
+        for name in FILE_ONLY_PRAGMAS:
+            pragmas.pop(name, None)
+    return pragmas
+
+
+def install_pragmas(engine, profile):
+    """Apply the ``profile`` PRAGMAs to each new connection of a SQLite ``engine``."""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", partial(set_sqlite_pragmas, pragmas_for(engine.url, profile)))
+
+
+def configure_engines(app, db):
+    """Install the connect-event hook applying the DB_PROFILE pragmas."""
+    profile = app.config.get("DB_PROFILE", "production")
+    with app.app_context():
+        for engine in db.engines.values():
+            install_pragmas(engine, profile)
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to ``info["read_bind"]`` when one is set.
+
+    replicas.read_replica sets it for the duration of a read-only view.
+    Flushes and every other statement still go to the primary, as does
+    everything in a session without a read bind.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        read_bind = self.info.get("read_bind")
+        if read_bind is not None and bind is None and not self._flushing and getattr(clause, "is_select", False):
+            return read_bind
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,131 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from bulk import insert_restaurant_pizzas_each
+from cache import invalidate_restaurants
+from models import db
+from profiling import Histogram, gauge_lines, registry
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+batch_sizes = registry.register(Histogram(
+    "group_commit_batch_size", "Rows per group-commit transaction.", ("table",), BATCH_SIZE_BUCKETS))
+commit_duration = registry.register(Histogram(
+    "group_commit_duration_seconds", "Insert plus commit time per group-commit batch.", ("table",)))
+
+
+class GroupCommitWriter:
+    """Coalesces single-row restaurant_pizza inserts into shared transactions.
+
+    Request threads submit() validated rows and wait on the returned
+    Future. One writer thread takes the first pending row, gathers more
+    for up to ``max_latency`` seconds or ``max_batch`` rows, inserts them
+    with one executemany and commits once, so N concurrent requests cost
+    one fsync and one write-lock acquisition instead of N. If the batch
+    fails, its rows are retried one savepoint each so a bad row only
+    fails its own request.
+
+    The thread starts on first use, so each forked worker gets its own.
+    Batching only happens across requests served concurrently by the same
+    process, so it needs threaded workers (GUNICORN_THREADS > 1); the
+    gunicorn config refuses to start sync workers with it enabled.
+    """
+
+    def __init__(self, app, max_batch=100, max_latency=0.005):
+        self.app, self.max_batch, self.max_latency = app, max_batch, max_latency
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, values):
+        """Queue a row for insertion; the Future resolves to its new id."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+        future = Future()
+        self._queue.put((values, future))
+        return future
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_latency
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Don't leave already-queued rows behind for another latency window.
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return [(values, future) for values, future in batch if future.set_running_or_notify_cancel()]
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                continue
+            start = time.perf_counter()
+            with self.app.app_context():
+                try:
+                    results = self._write([values for values, _ in batch])
+                except Exception as e:
+                    db.session.rollback()
+                    logger.exception("group commit of %d rows failed", len(batch))
+                    results = [e] * len(batch)
+            batch_sizes.observe(("restaurant_pizzas",), len(batch))
+            commit_duration.observe(("restaurant_pizzas",), time.perf_counter() - start)
+
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _write(self, rows):
+        """Ids (or the IntegrityError) for ``rows``, in order, after one commit."""
+        results = insert_restaurant_pizzas_each(list(enumerate(rows)))
+        db.session.commit()
+        invalidate_restaurants({
+            values["restaurant_id"] for values, result in zip(rows, results) if not isinstance(result, Exception)
+        })
+        return results
+
+
+_writers = []
+
+
+def _metrics():
+    return gauge_lines(
+        "group_commit_pending", "Rows waiting for the group-commit writer.",
+        [((("table", "restaurant_pizzas"),), sum(writer.pending() for writer in _writers))],
+    )
+
+
+registry.collectors.append(_metrics)
+
+
+def configure_group_commit(app):
+    """Attach the writer when GROUP_COMMIT_ENABLED is set."""
+    if app.config.get("GROUP_COMMIT_ENABLED"):
+        writer = GroupCommitWriter(
+            app,
+            max_batch=app.config.get("GROUP_COMMIT_MAX_BATCH", 100),
+            max_latency=app.config.get("GROUP_COMMIT_MAX_LATENCY_MS", 5) / 1000,
+        )
+        app.extensions["group_commit"] = writer
+        _writers.append(writer)
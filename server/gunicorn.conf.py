@@ -0,0 +1,50 @@
+"""gunicorn settings for production.
+
+    gunicorn -c server/gunicorn.conf.py
+
+Every setting can be overridden with the matching GUNICORN_* variable.
+"""
+import multiprocessing
+import os
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+wsgi_app = "wsgi:app"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5555")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 1))
+# Group commit batches the inserts of requests running at the same time in
+# one worker; a sync worker runs one request at a time, so every batch would
+# hold a single row and only add the writer's latency window to each POST.
+if os.environ.get("GROUP_COMMIT_ENABLED") == "1" and threads < 2:
+    raise RuntimeError("GROUP_COMMIT_ENABLED needs threaded workers; set GUNICORN_THREADS to 2 or more")
+# Import and warm the app once in the master; workers fork from it.
+preload_app = True
+# Keep-alive only takes effect with threads > 1 (gunicorn then uses gthread);
+# the sync worker closes every connection. Clients re-fetching large menus
+# save a TCP (and TLS, at the proxy) handshake per request when it is on.
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 0))
+accesslog = os.environ.get("GUNICORN_ACCESSLOG")
+
+
+def post_fork(server, worker):
+    # The pool was emptied before fork; close=False makes sure any connection
+    # object a worker inherited is dropped without closing the parent's socket.
+    from models import db
+    from wsgi import app
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+    if "replicas" in app.extensions:
+        app.extensions["replicas"].dispose(close=False)
+
+
+def when_ready(server):
+    from wsgi import IMPORT_SECONDS, STARTUP_SECONDS
+
+    server.log.info(
+        "startup %.1f ms (imports %.1f ms), %d workers",
+        STARTUP_SECONDS * 1000, IMPORT_SECONDS * 1000, workers,
+    )
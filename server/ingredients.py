@@ -0,0 +1,179 @@
+import threading
+
+from sqlalchemy import delete, event, func, insert, not_, select
+from sqlalchemy.orm import attributes
+
+from conditional import collection_version
+from models import db, Pizza, Ingredient, pizza_ingredients
+
+# Above this many matches the filter runs as SQL joins instead of an IN list.
+MAX_IN_IDS = 5000
+SYNC_CHUNK = 500
+
+
+def normalize(name):
+    return " ".join(name.split()).casefold()
+
+
+def parse_ingredients(text):
+    """Normalized, de-duplicated ingredient names from a comma-separated string."""
+    names = []
+    for part in (text or "").split(","):
+        name = normalize(part)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def parse_ingredient_args(args, key):
+    """All values of a repeatable, comma-separated query parameter."""
+    names = []
+    for value in args.getlist(key):
+        names.extend(name for name in parse_ingredients(value) if name not in names)
+    return names
+
+
+def _insert_ignore(connection, table):
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(table).on_conflict_do_nothing()
+
+
+def sync_pizza_ingredients(connection, pizzas):
+    """Rewrite pizza_ingredients for ``pizzas``, an iterable of (pizza_id, ingredients).
+
+    Runs on the caller's connection so it commits or rolls back with the
+    write that changed the pizzas. Writes that insert pizzas with Core
+    must call this themselves; ORM writes are covered by the events below.
+    """
+    pizzas = list(pizzas)
+    for start in range(0, len(pizzas), SYNC_CHUNK):
+        chunk = {pizza_id: parse_ingredients(text) for pizza_id, text in pizzas[start:start + SYNC_CHUNK]}
+        names = sorted({name for names in chunk.values() for name in names})
+        if names:
+            connection.execute(_insert_ignore(connection, Ingredient), [{"name": name} for name in names])
+        ids = dict(connection.execute(
+            select(Ingredient.name, Ingredient.id).where(Ingredient.name.in_(names))
+        ).all()) if names else {}
+
+        connection.execute(delete(pizza_ingredients).where(pizza_ingredients.c.pizza_id.in_(chunk)))
+        links = [
+            {"pizza_id": pizza_id, "ingredient_id": ids[name]}
+            for pizza_id, names in chunk.items()
+            for name in names
+        ]
+        if links:
+            connection.execute(insert(pizza_ingredients), links)
+    ingredient_index.mark_stale()
+
+
+def _after_insert(mapper, connection, target):
+    sync_pizza_ingredients(connection, [(target.id, target.ingredients)])
+
+
+def _after_update(mapper, connection, target):
+    if attributes.get_history(target, "ingredients").has_changes():
+        sync_pizza_ingredients(connection, [(target.id, target.ingredients)])
+
+
+event.listen(Pizza, "after_insert", _after_insert)
+event.listen(Pizza, "after_update", _after_update)
+event.listen(Pizza, "after_delete", lambda mapper, connection, target: ingredient_index.mark_stale())
+
+
+class IngredientIndex:
+    """In-memory inverted index: ingredient name -> bitset of pizza ids.
+
+    Bit ``n`` of a Python int is set when pizza ``n`` has the ingredient,
+    so a multi-ingredient query is a handful of big-int AND/ANDNOTs.
+    The index records the pizzas table version it was built from and is
+    rebuilt when that changes, which also picks up writes made by other
+    processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._bits = {}
+        self._all = 0
+
+    def mark_stale(self):
+        self._version = None
+
+    def _rebuild(self, version):
+        bits = {}
+        rows = db.session.execute(
+            select(Ingredient.name, pizza_ingredients.c.pizza_id)
+            .join_from(pizza_ingredients, Ingredient, Ingredient.id == pizza_ingredients.c.ingredient_id)
+        )
+        for name, pizza_id in rows:
+            bits[name] = bits.get(name, 0) | (1 << pizza_id)
+        everything = 0
+        for pizza_id in db.session.execute(select(Pizza.id)).scalars():
+            everything |= 1 << pizza_id
+        self._bits, self._all, self._version = bits, everything, version
+
+    def match(self, includes, excludes):
+        """Sorted ids of pizzas having every ``includes`` and none of ``excludes``."""
+        version = tuple(collection_version(Pizza))
+        with self._lock:
+            if version != self._version:
+                self._rebuild(version)
+            result = self._all
+            for name in includes:
+                result &= self._bits.get(name, 0)
+            for name in excludes:
+                result &= ~self._bits.get(name, 0)
+
+        ids = []
+        while result:
+            low = result & -result
+            ids.append(low.bit_length() - 1)
+            result ^= low
+        return ids
+
+
+ingredient_index = IngredientIndex()
+
+
+def _has_ingredients(names):
+    """Subquery of pizza ids having all of ``names`` (indexed join on pizza_ingredients)."""
+    return (
+        select(pizza_ingredients.c.pizza_id)
+        .join(Ingredient, Ingredient.id == pizza_ingredients.c.ingredient_id)
+        .where(Ingredient.name.in_(names))
+        .group_by(pizza_ingredients.c.pizza_id)
+        .having(func.count() == len(names))
+    )
+
+
+def _has_any_ingredient(names):
+    return (
+        select(pizza_ingredients.c.pizza_id)
+        .join(Ingredient, Ingredient.id == pizza_ingredients.c.ingredient_id)
+        .where(Ingredient.name.in_(names))
+    )
+
+
+def sql_filter(includes, excludes):
+    clauses = []
+    if includes:
+        clauses.append(Pizza.id.in_(_has_ingredients(includes)))
+    if excludes:
+        clauses.append(not_(Pizza.id.in_(_has_any_ingredient(excludes))))
+    return clauses
+
+
+def ingredient_filter(includes, excludes, use_index=True):
+    """WHERE clauses restricting pizzas by ingredient.
+
+    The bitset index answers the query when enabled and the match set is
+    small enough to pass as an IN list; otherwise the SQL joins do.
+    """
+    if use_index:
+        ids = ingredient_index.match(includes, excludes)
+        if len(ids) <= MAX_IN_IDS:
+            return [Pizza.id.in_(ids)]
+    return sql_filter(includes, excludes)
@@ -0,0 +1,63 @@
+import time
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+from profiling import record
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+class CompactJSONProvider(DefaultJSONProvider):
+    """stdlib JSON provider that emits compact output.
+
+    Responses are pretty printed only when ``compact`` is set to False or
+    the caller asks for it with ``?pretty=1``.
+    """
+
+    compact = True
+    # Schemas already emit fields in a stable order; sorting is wasted work.
+    sort_keys = False
+
+    def wants_pretty(self):
+        if self.compact is False:
+            return True
+        return has_request_context() and request.args.get("pretty", "").lower() in ("1", "true", "yes")
+
+    def encode(self, obj, pretty=False):
+        if pretty:
+            return self.dumps(obj, indent=2) + "\n"
+        return self.dumps(obj, separators=(",", ":"))
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        start = time.perf_counter()
+        body = self.encode(obj, pretty=self.wants_pretty())
+        record("serialize", time.perf_counter() - start)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+class OrjsonProvider(CompactJSONProvider):
+    """orjson-backed provider; encodes straight to bytes."""
+
+    def dumps(self, obj, **kwargs):
+        return self.encode(obj, pretty="indent" in kwargs).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def encode(self, obj, pretty=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(obj, default=self.default, option=option)
+
+
+def json_provider_class():
+    """Fastest provider available in this environment."""
+    return OrjsonProvider if orjson is not None else CompactJSONProvider
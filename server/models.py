@@ -1,31 +1,52 @@
+from datetime import datetime, timezone
+
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import MetaData, ForeignKey
 from sqlalchemy.orm import relationship, validates
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy_serializer import SerializerMixin
 
+from db_config import RoutingSession
+
 metadata = MetaData(
     naming_convention={
         "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
     }
 )
 
-db = SQLAlchemy(metadata=metadata)
+db = SQLAlchemy(metadata=metadata, session_options={"class_": RoutingSession})
+
+
+def utcnow():
+    """Naive UTC timestamp, as stored in the updated_at columns."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
 # Restaurant has many Pizzas through RestaurantPizza:
 class Restaurant(db.Model, SerializerMixin):
     __tablename__ = "restaurants"
+    # Partial index: only soft-deleted rows waiting for the purge worker are in it.
+    __table_args__ = (
+        db.Index("ix_restaurants_deleted_at", "deleted_at", sqlite_where=db.text("deleted_at IS NOT NULL")),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
     address = db.Column(db.String, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    # Set by a soft delete (SOFT_DELETE_ENABLED); such rows are hidden from
+    # every ORM query (see soft_delete.py) until the purge worker removes them.
+    deleted_at = db.Column(db.DateTime, nullable=True)
 
     # Relationship with RestaurantPizza -- 
     #restaurant model has relationship with pizza thru the restuarantpizza model
+    # passive_deletes: the database cascades the delete (ON DELETE CASCADE), so
+    # the ORM doesn't load the menu just to delete it row by row.
     restaurant_pizzas = db.relationship(
         "RestaurantPizza",
         back_populates="restaurant",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     # Proxy relationship to directly access pizzas through the restaurant
@@ -65,13 +86,15 @@ class Pizza(db.Model, SerializerMixin):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
     ingredients = db.Column(db.String, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow)
 
     # restaurant_pizzas relationship in the Pizza model.
 
     restaurant_pizzas = relationship(
         "RestaurantPizza",
         back_populates="pizza",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     # Serialization rules
@@ -81,16 +104,55 @@ class Pizza(db.Model, SerializerMixin):
         return f"<Pizza {self.name}, {self.ingredients}>"
 
 
+# Pizza.ingredients stays the source of truth (and the API output); these two
+# tables are a normalized copy kept in sync by ingredients.py for filtering.
+pizza_ingredients = db.Table(
+    "pizza_ingredients",
+    db.Column("pizza_id", db.Integer, ForeignKey("pizzas.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("ingredient_id", db.Integer, ForeignKey("ingredients.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key serves lookups by pizza; this one serves lookups by ingredient.
+    db.Index("ix_pizza_ingredients_ingredient_id_pizza_id", "ingredient_id", "pizza_id"),
+)
+
+
+class Ingredient(db.Model, SerializerMixin):
+    __tablename__ = "ingredients"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Normalized (whitespace-collapsed, casefolded) name; see ingredients.normalize.
+    name = db.Column(db.String, nullable=False, unique=True)
+
+    def __repr__(self):
+        return f"<Ingredient {self.name}>"
+
+
+MIN_PRICE = 1
+MAX_PRICE = 30
+
+
+def price_in_range(value):
+    """The price rule enforced by RestaurantPizza.validate_price."""
+    return MIN_PRICE <= value <= MAX_PRICE
+
+
 class RestaurantPizza(db.Model, SerializerMixin):
     __tablename__ = "restaurant_pizzas"
+    # restaurant_id leads the composite index so it also serves menu loads and
+    # the delete cascade; pizza_id needs its own for lookups from the pizza side.
+    # The pair is not unique: a restaurant may list the same pizza at several prices.
+    __table_args__ = (
+        db.Index("ix_restaurant_pizzas_restaurant_id_pizza_id", "restaurant_id", "pizza_id"),
+        db.Index("ix_restaurant_pizzas_pizza_id", "pizza_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     price = db.Column(db.Integer, nullable=False)
 
     # RestaurantPizza model has foreign keys restaurant_id and pizza_id, 
    
-    restaurant_id = db.Column(db.Integer, ForeignKey("restaurants.id"), nullable=False)
-    pizza_id = db.Column(db.Integer, ForeignKey("pizzas.id"), nullable=False)
+    restaurant_id = db.Column(db.Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=False)
+    pizza_id = db.Column(db.Integer, ForeignKey("pizzas.id", ondelete="CASCADE"), nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow)
 
     #relationships with the Restaurant and Pizza models is formed through these foreign keys
     restaurant = relationship("Restaurant", back_populates="restaurant_pizzas")
@@ -102,9 +164,41 @@ class RestaurantPizza(db.Model, SerializerMixin):
     # Validation for price to ensure the price of pizza is between 1-30
     @validates("price")
     def validate_price(self, key, value):
-        if value < 1 or value > 30:
+        if not price_in_range(value):
             raise ValueError("Price must be between 1 and 30")
         return value
 
     def __repr__(self):
         return f"<RestaurantPizza ${self.price}>"
+
+
+# Per-pizza and per-restaurant price aggregates over restaurant_pizzas,
+# maintained by the SQLite triggers in price_stats.py. A row exists only
+# while its pizza/restaurant has at least one menu entry.
+pizza_price_stats = db.Table(
+    "pizza_price_stats",
+    db.Column("pizza_id", db.Integer, primary_key=True, autoincrement=False),
+    db.Column("offers", db.Integer, nullable=False),
+    db.Column("price_sum", db.Integer, nullable=False),
+    db.Column("min_price", db.Integer, nullable=False),
+    db.Column("max_price", db.Integer, nullable=False),
+)
+
+restaurant_price_stats = db.Table(
+    "restaurant_price_stats",
+    db.Column("restaurant_id", db.Integer, primary_key=True, autoincrement=False),
+    db.Column("offers", db.Integer, nullable=False),
+    db.Column("price_sum", db.Integer, nullable=False),
+    db.Column("min_price", db.Integer, nullable=False),
+    db.Column("max_price", db.Integer, nullable=False),
+)
+
+# One row per table the read routes serve: a counter and the time of the
+# last write, bumped by the SQLite triggers in conditional.py on every
+# insert, update and delete, so a collection's version is a primary-key lookup.
+table_versions = db.Table(
+    "table_versions",
+    db.Column("name", db.String, primary_key=True),
+    db.Column("version", db.Integer, nullable=False),
+    db.Column("updated_at", db.DateTime, nullable=False),
+)
@@ -0,0 +1,98 @@
+from collections import namedtuple
+from urllib.parse import urlencode
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+
+from models import db
+
+MAX_LIMIT = 1000
+STREAM_BATCH_SIZE = 500
+
+Page = namedtuple("Page", ["limit", "after", "stream"])
+
+
+def parse_page_args(args):
+    """Read limit/after/stream from the query string.
+
+    Raises ValueError with a client-facing message on bad input.
+    """
+    limit = args.get("limit")
+    after = args.get("after")
+    stream = args.get("stream", "").lower() in ("1", "true", "yes")
+
+    if limit is not None:
+        if not limit.isdigit() or not (1 <= int(limit) <= MAX_LIMIT):
+            raise ValueError(f"'limit' must be an integer between 1 and {MAX_LIMIT}")
+        limit = int(limit)
+
+    if after is not None:
+        if not after.isdigit():
+            raise ValueError("'after' must be a non-negative integer")
+        after = int(after)
+
+    return Page(limit, after, stream)
+
+
+def next_link(**params):
+    """``Link`` header value for the next page: this request's query string
+    (filters, fieldsets, repeated parameters and all) with ``params`` replaced.
+    """
+    args = request.args.copy()
+    for key, value in params.items():
+        args[key] = str(value)
+    return f'<{request.base_url}?{urlencode(list(args.items(multi=True)))}>; rel="next"'
+
+
+def paginated_response(stmt, key_column, serialize, page):
+    """Run a keyset-paginated (or streamed) query and build the response.
+
+    ``stmt`` is a select() that the caller has not ordered or limited;
+    ``key_column`` is the unique, indexed column used as the cursor and
+    must appear under its own name in what ``serialize`` returns.
+    Without ``limit`` the whole result is returned, matching the
+    unpaginated behaviour clients already rely on.
+    """
+    stmt = stmt.order_by(key_column)
+    if page.after is not None:
+        stmt = stmt.where(key_column > page.after)
+
+    if page.stream:
+        return stream_response(stmt, serialize)
+
+    if page.limit is None:
+        rows = db.session.execute(stmt).all()
+        return jsonify([serialize(row) for row in rows]), 200
+
+    # Fetch one extra row to learn whether there is a next page without a COUNT.
+    rows = db.session.execute(stmt.limit(page.limit + 1)).all()
+    has_next = len(rows) > page.limit
+    items = [serialize(row) for row in rows[:page.limit]]
+
+    response = jsonify(items)
+    if has_next:
+        next_cursor = items[-1][key_column.key]
+        response.headers["Link"] = next_link(limit=page.limit, after=next_cursor)
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return response, 200
+
+
+def stream_response(stmt, serialize):
+    """Stream a JSON array without holding the full result in memory."""
+    result = db.session.execute(
+        stmt.execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield "["
+        first = True
+        for partition in result.partitions():
+            chunk = ",".join(dumps(serialize(row)) for row in partition)
+            if not first:
+                chunk = "," + chunk
+            first = False
+            yield chunk
+        yield "]"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
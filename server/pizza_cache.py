@@ -0,0 +1,148 @@
+import threading
+import time
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from conditional import collection_version
+from models import db, Pizza
+from profiling import gauge_lines, registry
+from serializers import PIZZA, select_schemas
+
+
+def _query_pizza(id):
+    row = db.session.execute(select_schemas(PIZZA).where(Pizza.id == id)).first()
+    return PIZZA.dump(row) if row else None
+
+
+class PizzaCache:
+    """Process-wide ``{id: pizza}`` snapshot of the pizzas table.
+
+    Pizzas are few and rarely change, so validating a ``pizza_id`` and
+    echoing the pizza back shouldn't cost a query per write. The snapshot
+    records the table version (row count, newest updated_at) it was
+    loaded from. Pizza writes in this process mark it stale at once;
+    writes by other workers are noticed when the version is re-read,
+    at most every ``max_age`` seconds. Within a request the snapshot is
+    pinned on ``g``, so every lookup in it sees the same table.
+
+    Ids missing from the snapshot are looked up in the database before
+    being reported missing, so a pizza another worker just created is
+    never rejected.
+    """
+
+    def __init__(self, max_age=5.0):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._version = None
+        self._checked_at = float("-inf")
+        self.hits = self.misses = self.loads = 0
+
+    def mark_stale(self):
+        self._checked_at = float("-inf")
+
+    def _load(self, version):
+        # The version is read first: a write landing in between leaves an
+        # older stamp on newer rows, which only costs an extra reload.
+        self._rows = {row[0]: PIZZA.dump(row) for row in db.session.execute(select_schemas(PIZZA))}
+        self._version = version
+        self.loads += 1
+
+    def warm(self):
+        with self._lock:
+            self._load(tuple(collection_version(Pizza)))
+            self._checked_at = time.monotonic()
+
+    def snapshot(self):
+        """The current ``{id: pizza}`` mapping; don't modify it."""
+        if has_request_context() and "pizza_rows" in g:
+            return g.pizza_rows
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at >= self.max_age:
+                version = tuple(collection_version(Pizza))
+                if version != self._version:
+                    self._load(version)
+                self._checked_at = now
+            rows = self._rows
+        if has_request_context():
+            g.pizza_rows = rows
+        return rows
+
+    def get(self, id):
+        """The pizza dict for ``id``, or None if there is no such pizza."""
+        if isinstance(id, str) and id.isdigit():
+            id = int(id)
+        pizza = self.snapshot().get(id)
+        if pizza is not None:
+            self.hits += 1
+            return pizza
+
+        self.misses += 1
+        pizza = _query_pizza(id)
+        if pizza is not None:
+            self.mark_stale()
+        return pizza
+
+    def stats(self):
+        return {"size": len(self._rows), "hits": self.hits, "misses": self.misses, "loads": self.loads}
+
+
+_caches = []
+
+
+def _mark_all_stale():
+    for cache in _caches:
+        cache.mark_stale()
+
+
+def _on_change(mapper, connection, target):
+    _mark_all_stale()
+    # Another request can reload the pre-commit table between flush and
+    # commit, so mark stale again once the write is visible.
+    session = Session.object_session(target)
+    if session is not None:
+        session.info["pizza_cache_stale"] = True
+
+
+def _after_commit(session):
+    if session.info.pop("pizza_cache_stale", False):
+        _mark_all_stale()
+
+
+def _after_rollback(session):
+    session.info.pop("pizza_cache_stale", None)
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Pizza, _event, _on_change)
+
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_rollback", _after_rollback)
+
+
+def _metrics():
+    stats = [cache.stats() for cache in _caches]
+    return gauge_lines(
+        "pizza_cache", "Pizza lookup cache counters by kind.",
+        [((("kind", kind),), sum(s[kind] for s in stats)) for kind in ("size", "hits", "misses", "loads")],
+    )
+
+
+registry.collectors.append(_metrics)
+
+
+def configure_pizza_cache(app):
+    """Attach a PizzaCache when PIZZA_CACHE_ENABLED is set; wsgi.py warms it."""
+    if app.config.get("PIZZA_CACHE_ENABLED"):
+        cache = PizzaCache(max_age=app.config.get("PIZZA_CACHE_MAX_AGE", 5.0))
+        app.extensions["pizza_cache"] = cache
+        _caches.append(cache)
+
+
+def lookup_pizza(id):
+    """The pizza dict for ``id`` (or None), from the app's PizzaCache if it has one."""
+    cache = current_app.extensions.get("pizza_cache")
+    return cache.get(id) if cache is not None else _query_pizza(id)
@@ -0,0 +1,214 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, func, select
+
+from models import db, Restaurant, Pizza, RestaurantPizza, pizza_price_stats, restaurant_price_stats
+
+CHEAPEST_LIMIT = 5
+
+# (summary table, grouping column of restaurant_pizzas)
+SUMMARIES = (
+    ("pizza_price_stats", "pizza_id"),
+    ("restaurant_price_stats", "restaurant_id"),
+)
+
+
+def _add(table, key, row):
+    return (
+        f"INSERT INTO {table} ({key}, offers, price_sum, min_price, max_price) "
+        f"VALUES ({row}.{key}, 1, {row}.price, {row}.price, {row}.price) "
+        f"ON CONFLICT({key}) DO UPDATE SET offers = offers + 1, "
+        f"price_sum = price_sum + excluded.price_sum, "
+        f"min_price = MIN(min_price, excluded.min_price), "
+        f"max_price = MAX(max_price, excluded.max_price);"
+    )
+
+
+def _remove(table, key, row):
+    # The row goes with the last offer. Otherwise sum and count are adjusted in
+    # place and min/max only recomputed (an indexed lookup on restaurant_pizzas)
+    # when the removed price was the extreme.
+    return (
+        f"DELETE FROM {table} WHERE {key} = {row}.{key} AND offers <= 1; "
+        f"UPDATE {table} SET offers = offers - 1, price_sum = price_sum - {row}.price, "
+        f"min_price = CASE WHEN {row}.price > min_price THEN min_price "
+        f"ELSE (SELECT MIN(price) FROM restaurant_pizzas WHERE {key} = {row}.{key}) END, "
+        f"max_price = CASE WHEN {row}.price < max_price THEN max_price "
+        f"ELSE (SELECT MAX(price) FROM restaurant_pizzas WHERE {key} = {row}.{key}) END "
+        f"WHERE {key} = {row}.{key};"
+    )
+
+
+def trigger_ddl():
+    """Triggers on restaurant_pizzas keeping both summary tables current.
+
+    Triggers rather than ORM events so Core bulk inserts, the seed
+    command and foreign-key cascades are all covered.
+    """
+    adds = " ".join(_add(table, key, "new") for table, key in SUMMARIES)
+    removes = " ".join(_remove(table, key, "old") for table, key in SUMMARIES)
+    return [
+        "CREATE TRIGGER IF NOT EXISTS restaurant_pizzas_stats_ai AFTER INSERT ON restaurant_pizzas "
+        f"BEGIN {adds} END",
+        "CREATE TRIGGER IF NOT EXISTS restaurant_pizzas_stats_ad AFTER DELETE ON restaurant_pizzas "
+        f"BEGIN {removes} END",
+        "CREATE TRIGGER IF NOT EXISTS restaurant_pizzas_stats_au "
+        "AFTER UPDATE OF price, pizza_id, restaurant_id ON restaurant_pizzas "
+        f"BEGIN {removes} {adds} END",
+    ]
+
+
+def _aggregate_sql(key):
+    return (
+        f"SELECT {key}, COUNT(*), SUM(price), MIN(price), MAX(price) "
+        f"FROM restaurant_pizzas GROUP BY {key}"
+    )
+
+
+def rebuild(connection):
+    """Recompute both summary tables from restaurant_pizzas."""
+    for table, key in SUMMARIES:
+        connection.exec_driver_sql(f"DELETE FROM {table}")
+        connection.exec_driver_sql(
+            f"INSERT INTO {table} ({key}, offers, price_sum, min_price, max_price) {_aggregate_sql(key)}")
+
+
+def check(connection):
+    """{summary table: sorted keys whose stored row differs from a fresh aggregate}."""
+    drift = {}
+    for table, key in SUMMARIES:
+        stored = f"SELECT {key}, offers, price_sum, min_price, max_price FROM {table}"
+        keys = connection.exec_driver_sql(
+            f"SELECT {key} FROM ({stored} EXCEPT {_aggregate_sql(key)}) "
+            f"UNION SELECT {key} FROM ({_aggregate_sql(key)} EXCEPT {stored})"
+        ).scalars().all()
+        if keys:
+            drift[table] = sorted(keys)
+    return drift
+
+
+def _create_triggers(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in trigger_ddl():
+        connection.exec_driver_sql(statement)
+    rebuild(connection)
+
+
+# The migration installs the triggers on existing databases; this covers db.create_all().
+event.listen(db.metadata, "after_create", _create_triggers)
+
+
+def _stats(row):
+    if row is None:
+        return {"offers": 0, "min_price": None, "max_price": None, "avg_price": None}
+    return {
+        "offers": row.offers,
+        "min_price": row.min_price,
+        "max_price": row.max_price,
+        "avg_price": round(row.price_sum / row.offers, 2),
+    }
+
+
+def _hidden_offers(pizza_id):
+    """Offers of ``pizza_id`` by soft-deleted restaurants not purged yet (a partial-index lookup)."""
+    return db.session.execute(
+        select(func.count())
+        .select_from(Restaurant)
+        .join(RestaurantPizza, RestaurantPizza.restaurant_id == Restaurant.id)
+        .where(Restaurant.deleted_at.is_not(None), RestaurantPizza.pizza_id == pizza_id)
+        .execution_options(include_deleted=True)
+    ).scalar()
+
+
+def _visible_summary(pizza_id):
+    # The summary tables count every menu row; while a soft-deleted restaurant
+    # awaits the purge, aggregate the rows the ORM still shows instead.
+    return db.session.execute(
+        select(
+            func.count().label("offers"),
+            func.sum(RestaurantPizza.price).label("price_sum"),
+            func.min(RestaurantPizza.price).label("min_price"),
+            func.max(RestaurantPizza.price).label("max_price"),
+        )
+        .select_from(RestaurantPizza)
+        .join(Restaurant, Restaurant.id == RestaurantPizza.restaurant_id)
+        .where(RestaurantPizza.pizza_id == pizza_id)
+    ).one()
+
+
+def pizza_prices(pizza_id):
+    """Price summary for a pizza and its cheapest offers; None if the pizza doesn't exist.
+
+    Both follow the same visibility rules: restaurants that are soft-deleted
+    but not yet purged count towards neither.
+    """
+    row = db.session.execute(
+        select(Pizza.id, pizza_price_stats)
+        .outerjoin(pizza_price_stats, pizza_price_stats.c.pizza_id == Pizza.id)
+        .where(Pizza.id == pizza_id)
+    ).first()
+    if row is None:
+        return None
+    if row.offers is not None and _hidden_offers(pizza_id):
+        row = _visible_summary(pizza_id)
+
+    stats = _stats(row if row.offers else None)
+    cheapest = []
+    if stats["offers"]:
+        cheapest = [
+            {"restaurant_id": restaurant_id, "name": name, "price": price}
+            for restaurant_id, name, price in db.session.execute(
+                select(Restaurant.id, Restaurant.name, RestaurantPizza.price)
+                .join(Restaurant, Restaurant.id == RestaurantPizza.restaurant_id)
+                .where(RestaurantPizza.pizza_id == pizza_id, RestaurantPizza.price == stats["min_price"])
+                .order_by(Restaurant.id)
+                .limit(CHEAPEST_LIMIT)
+            )
+        ]
+    return {"pizza_id": pizza_id, **stats, "cheapest": cheapest}
+
+
+def restaurant_stats(restaurant_id):
+    """Menu size and price summary for a restaurant; None if it doesn't exist."""
+    row = db.session.execute(
+        select(Restaurant.id, restaurant_price_stats)
+        .outerjoin(restaurant_price_stats, restaurant_price_stats.c.restaurant_id == Restaurant.id)
+        .where(Restaurant.id == restaurant_id)
+    ).first()
+    if row is None:
+        return None
+    return {"restaurant_id": restaurant_id, **_stats(row if row.offers is not None else None)}
+
+
+@click.group("price-stats")
+def price_stats_command():
+    """Maintain the pizza/restaurant price summary tables."""
+
+
+@price_stats_command.command("rebuild")
+@with_appcontext
+def rebuild_command():
+    """Recompute the summaries from restaurant_pizzas."""
+    with db.engine.begin() as connection:
+        rebuild(connection)
+        counts = {
+            table: connection.execute(select(func.count()).select_from(db.metadata.tables[table])).scalar()
+            for table, _ in SUMMARIES
+        }
+    click.echo(", ".join(f"{table}: {count:,} rows" for table, count in counts.items()))
+
+
+@price_stats_command.command("check")
+@with_appcontext
+def check_command():
+    """Compare the summaries with a fresh aggregate; exit 1 on drift."""
+    with db.engine.connect() as connection:
+        drift = check(connection)
+    if not drift:
+        click.echo("price stats are consistent")
+        return
+    for table, keys in drift.items():
+        shown = ", ".join(map(str, keys[:20])) + (", ..." if len(keys) > 20 else "")
+        click.echo(f"{table}: {len(keys)} rows differ ({shown})")
+    raise SystemExit(1)
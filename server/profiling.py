@@ -0,0 +1,190 @@
+import bisect
+import cProfile
+import logging
+import os
+import re
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Seconds. Covers a cache hit (~0.5 ms) up to a pathological export.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label tuple."""
+
+    def __init__(self, name, help, labels, buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            counts, total = self._series.get(label_values, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._series[label_values] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for label_values, (counts, total) in series:
+            labels = ",".join(f'{key}="{value}"' for key, value in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name, self.help, self.labels = name, help, labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            labels = ",".join(f'{key}="{value}"' for key, value in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+
+class Registry:
+    """Metrics served at /metrics.
+
+    ``collectors`` are callables returning extra exposition lines, for
+    values owned elsewhere (cache counters, writer queue stats, ...).
+    Metrics are per process; with several workers each scrape sees one.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Wall time per request.", ("method", "route", "status")))
+db_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Total SQL time per request.", ("method", "route")))
+db_statements = registry.register(Counter(
+    "db_statements_total", "SQL statements executed while serving requests.", ("method", "route")))
+
+
+def gauge_lines(name, help, values):
+    """Exposition lines for gauges sharing a name; ``values`` is [(((key, value), ...), number)]."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    for labels, value in values:
+        rendered = ",".join(f'{key}="{val}"' for key, val in labels)
+        lines.append(f"{name}{{{rendered}}} {value}")
+    return lines
+
+
+def record(phase, seconds):
+    """Add ``seconds`` to a named phase of the current request's timings."""
+    if has_request_context() and "timings" in g:
+        g.timings[phase] = g.timings.get(phase, 0.0) + seconds
+
+
+def _route():
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    if has_request_context() and "timings" in g:
+        g.timings["db"] = g.timings.get("db", 0.0) + elapsed
+        g.statements += 1
+
+
+def instrument_engine(engine):
+    """Count and time ``engine``'s statements into the current request's db timing."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def init_profiling(app, db):
+    """Install request timing, SQL instrumentation and the /metrics endpoint.
+
+    PROFILE_SLOW_REQUEST_MS turns on cProfile for every request and keeps
+    the stats (in PROFILE_DIR) of those slower than the threshold.
+    """
+    slow_ms = app.config.get("PROFILE_SLOW_REQUEST_MS")
+    profile_dir = app.config.get("PROFILE_DIR", "profiles")
+
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+        g.timings = {}
+        g.statements = 0
+        if slow_ms:
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def stop_timer(response):
+        if "request_start" not in g:
+            return response
+        total = time.perf_counter() - g.request_start
+        method, route = request.method, _route()
+
+        request_duration.observe((method, route, str(response.status_code)), total)
+        db_duration.observe((method, route), g.timings.get("db", 0.0))
+        db_statements.inc((method, route), g.statements)
+
+        parts = [f'db;dur={g.timings.get("db", 0.0) * 1000:.2f};desc="{g.statements} queries"']
+        parts += [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in g.timings.items() if phase != "db"]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        response.headers["Server-Timing"] = ", ".join(parts)
+
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            if total * 1000 >= float(slow_ms):
+                os.makedirs(profile_dir, exist_ok=True)
+                name = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+                path = os.path.join(profile_dir, f"{int(time.time() * 1000)}-{method}-{name}.prof")
+                profiler.dump_stats(path)
+                logger.warning("slow request %s %s took %.1f ms; profile written to %s",
+                               method, request.full_path, total * 1000, path)
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
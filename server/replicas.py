@@ -0,0 +1,198 @@
+import itertools
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, request
+from sqlalchemy import create_engine, func, select
+
+from db_config import engine_options, install_pragmas
+from models import db, table_versions
+from profiling import Counter, gauge_lines, instrument_engine, registry
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("round_robin", "least_lag")
+# Set on responses to writes; while it's in the future, reads go to the primary.
+STICKY_COOKIE = "db_primary_until"
+
+reads = registry.register(Counter(
+    "db_replica_reads_total", "Read-only requests by the database they were sent to.", ("target",)))
+
+
+def _newest_write(engine):
+    """Time of the last write to the tables the read routes serve, or None.
+
+    Read from table_versions, which has one row per table, so the probe
+    costs the same on a large database as on an empty one.
+    """
+    with engine.connect() as connection:
+        return connection.execute(select(func.max(table_versions.c.updated_at))).scalar()
+
+
+class ReplicaSet:
+    """Replica engines, and the choice of one for each read-only request.
+
+    The engines are kept here rather than in SQLALCHEMY_BINDS so that
+    create_all() and migrations only ever touch the primary.
+
+    Lag is how far a replica's last table_versions write trails the
+    primary's, which works for any replication scheme (copied SQLite
+    files, litestream, streaming Postgres standbys). Replicas further
+    behind than ``max_lag`` seconds, or failing, are skipped; with none
+    left, reads go to the primary.
+
+    The first request measures the lags itself; after that a background
+    thread re-measures them every ``interval`` seconds, off the request
+    path. The thread starts on first use, so each forked worker gets its
+    own, and dispose() stops it (the warm-up does, in the gunicorn master).
+    """
+
+    def __init__(self, engines, policy="round_robin", max_lag=5.0, interval=1.0):
+        if policy not in POLICIES:
+            raise ValueError(f"READ_REPLICA_POLICY must be one of {', '.join(POLICIES)}")
+        self.engines = dict(engines)
+        self.names = list(self.engines)
+        self.policy, self.max_lag, self.interval = policy, max_lag, interval
+        self.lags = {}
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._monitor = None
+        self._stop = threading.Event()
+
+    def refresh(self):
+        primary = _newest_write(db.engines[None])
+        lags = {}
+        for name in self.names:
+            try:
+                stamp = _newest_write(self.engines[name])
+            except Exception:
+                logger.warning("replica %s is unavailable", name, exc_info=True)
+                lags[name] = float("inf")
+                continue
+            if primary is None or (stamp is not None and stamp >= primary):
+                lags[name] = 0.0
+            else:
+                lags[name] = (primary - stamp).total_seconds() if stamp is not None else float("inf")
+        self.lags = lags
+
+    def _watch(self, app, stop):
+        while not stop.wait(self.interval):
+            with app.app_context():
+                try:
+                    self.refresh()
+                except Exception:
+                    logger.warning("measuring replica lag failed", exc_info=True)
+
+    def _start_monitor(self):
+        with self._lock:
+            if self._monitor is None or not self._monitor.is_alive():
+                self._stop = threading.Event()
+                self._monitor = threading.Thread(
+                    target=self._watch, args=(current_app._get_current_object(), self._stop),
+                    name="replica-lag", daemon=True)
+                self._monitor.start()
+
+    def choose(self):
+        """Name of the replica to read from, or None for the primary."""
+        if not self.lags:
+            # Requests arriving before the first measurement wait for it.
+            with self._lock:
+                if not self.lags:
+                    self.refresh()
+        if self._monitor is None or not self._monitor.is_alive():
+            self._start_monitor()
+
+        lags = self.lags
+        healthy = [name for name in self.names if lags.get(name, float("inf")) <= self.max_lag]
+        if not healthy:
+            return None
+        if self.policy == "least_lag":
+            return min(healthy, key=lags.__getitem__)
+        return healthy[next(self._turn) % len(healthy)]
+
+    def dispose(self, close=True):
+        self._stop.set()
+        for engine in self.engines.values():
+            engine.dispose(close=close)
+
+
+def sticky():
+    """True while this client's own recent write may not have reached the replicas."""
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_replica(view):
+    """Run a read-only view against a replica when READ_REPLICA_URIS is set.
+
+    Goes outermost, so conditional-request versions come from the same
+    database as the body, and so does the ETag that read-cache entries
+    are checked against: a body cached from a lagging replica stops being
+    served once the database answering the request has moved on. Clients
+    that wrote recently read from the primary.
+    """
+    @wraps(view)
+    def wrapper(**kwargs):
+        replicas = current_app.extensions.get("replicas")
+        if replicas is None:
+            return view(**kwargs)
+
+        name = None if sticky() else replicas.choose()
+        reads.inc((name or "primary",))
+        if name is None:
+            return view(**kwargs)
+
+        db.session.info["read_bind"] = replicas.engines[name]
+        try:
+            return view(**kwargs)
+        finally:
+            db.session.info.pop("read_bind", None)
+    return wrapper
+
+
+def _mark_writes(response):
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        window = current_app.config["READ_YOUR_WRITES_SECONDS"]
+        response.set_cookie(
+            STICKY_COOKIE, f"{time.time() + window:.3f}", max_age=int(window) + 1, httponly=True, samesite="Lax")
+    return response
+
+
+_replica_sets = []
+
+
+def _metrics():
+    return gauge_lines(
+        "db_replica_lag_seconds", "Measured replica lag; inf when unreachable.",
+        [((("replica", name),), lag) for replicas in _replica_sets for name, lag in replicas.lags.items()],
+    )
+
+
+registry.collectors.append(_metrics)
+
+
+def configure_replicas(app):
+    """Route @read_replica views to the READ_REPLICA_URIS databases, if any."""
+    uris = app.config.get("READ_REPLICA_URIS")
+    if not uris:
+        return
+    profile = app.config.get("DB_PROFILE", "production")
+    engines = {}
+    for n, uri in enumerate(uris):
+        engines[f"replica_{n}"] = create_engine(uri, **engine_options(uri))
+        install_pragmas(engines[f"replica_{n}"], profile)
+        if app.config.get("PROFILING_ENABLED"):
+            instrument_engine(engines[f"replica_{n}"])
+    replicas = ReplicaSet(
+        engines,
+        policy=app.config.get("READ_REPLICA_POLICY", "round_robin"),
+        max_lag=app.config.get("READ_REPLICA_MAX_LAG", 5.0),
+        interval=app.config.get("READ_REPLICA_CHECK_INTERVAL", 1.0),
+    )
+    app.extensions["replicas"] = replicas
+    _replica_sets.append(replicas)
+    app.after_request(_mark_writes)
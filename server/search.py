@@ -0,0 +1,151 @@
+import re
+from collections import namedtuple
+
+from sqlalchemy import event, text
+
+from models import db, Restaurant, Pizza
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_TERMS = 16
+
+# FTS5 external-content index per searchable table: the index stores only
+# tokens and reads column values back from the table itself. Column order
+# matters for the bm25() weights below. ``visible`` re-applies the filters
+# the ORM adds on its own (soft_delete.py), which this raw SQL bypasses.
+SearchTable = namedtuple("SearchTable", ["type", "table", "columns", "weights", "visible"])
+SEARCH_TABLES = (
+    SearchTable("restaurant", "restaurants", ("name", "address"), (10.0, 1.0), "t.deleted_at IS NULL"),
+    SearchTable("pizza", "pizzas", ("name", "ingredients"), (10.0, 2.0), None),
+)
+TYPES = tuple(search_table.type for search_table in SEARCH_TABLES)
+
+
+def fts_ddl(table, columns):
+    """Statements creating ``{table}_fts`` and the triggers keeping it in sync.
+
+    Idempotent. ``prefix`` adds indexes for 2- and 3-character prefixes so
+    type-ahead queries don't scan the whole term list.
+    """
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        # Only re-index when a searchable column changes, not on every updated_at bump.
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+    ]
+
+
+def _create_fts(search_table, target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    fts = f"{search_table.table}_fts"
+    for statement in fts_ddl(search_table.table, search_table.columns):
+        connection.exec_driver_sql(statement)
+    connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _drop_fts(search_table, target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {search_table.table}_fts")
+
+
+def rebuild_indexes(connection, command="rebuild"):
+    """Run an FTS5 ``'rebuild'`` (or ``'delete-all'``) on every search index.
+
+    For bulk loads that bypass the triggers (seeding.py).
+    """
+    for search_table in SEARCH_TABLES:
+        fts = f"{search_table.table}_fts"
+        connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('{command}')")
+
+
+# The migration creates these for existing databases; the events cover
+# db.create_all() (tests, benchmarks, fresh installs).
+for _search_table, _model in zip(SEARCH_TABLES, (Restaurant, Pizza)):
+    event.listen(_model.__table__, "after_create",
+                 lambda target, connection, _st=_search_table, **kw: _create_fts(_st, target, connection))
+    event.listen(_model.__table__, "before_drop",
+                 lambda target, connection, _st=_search_table, **kw: _drop_fts(_st, target, connection))
+
+
+def match_expression(query):
+    """An FTS5 MATCH expression requiring every word of ``query`` as a prefix.
+
+    Words are quoted, so FTS5 operators and syntax characters in user
+    input are searched for literally instead of raising syntax errors.
+    Raises ValueError when ``query`` has no searchable words.
+    """
+    terms = re.findall(r"\w+", query or "")[:MAX_TERMS]
+    if not terms:
+        raise ValueError("'q' must contain at least one word")
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def parse_search_args(args):
+    """(match expression, types, limit, offset) from the query string.
+
+    Raises ValueError with a client-facing message on bad input.
+    """
+    expression = match_expression(args.get("q"))
+
+    types = TYPES
+    if args.get("type"):
+        types = tuple(args["type"].split(","))
+        if not set(types) <= set(TYPES):
+            raise ValueError(f"'type' must be one or more of {', '.join(TYPES)}")
+
+    limit = args.get("limit", str(DEFAULT_LIMIT))
+    if not limit.isdigit() or not (1 <= int(limit) <= MAX_LIMIT):
+        raise ValueError(f"'limit' must be an integer between 1 and {MAX_LIMIT}")
+    offset = args.get("offset", "0")
+    if not offset.isdigit():
+        raise ValueError("'offset' must be a non-negative integer")
+
+    return expression, types, int(limit), int(offset)
+
+
+def _search_sql(types):
+    selects = []
+    for search_table in SEARCH_TABLES:
+        if search_table.type not in types:
+            continue
+        fts = f"{search_table.table}_fts"
+        weights = ", ".join(str(weight) for weight in search_table.weights)
+        detail = search_table.columns[1]
+        selects.append(
+            f"SELECT '{search_table.type}' AS type, t.id AS id, t.name AS name, t.{detail} AS detail, "
+            f"bm25({fts}, {weights}) AS score "
+            f"FROM {fts} JOIN {search_table.table} AS t ON t.id = {fts}.rowid "
+            f"WHERE {fts} MATCH :expression"
+            + (f" AND {search_table.visible}" if search_table.visible else "")
+        )
+    # bm25() is lower-is-better; type and id break ties so pages are stable.
+    return text(" UNION ALL ".join(selects) + " ORDER BY score, type, id LIMIT :limit OFFSET :offset")
+
+
+def search(expression, types=TYPES, limit=DEFAULT_LIMIT, offset=0):
+    """Ranked matches across the searchable tables, best first.
+
+    Returns up to ``limit`` dicts shaped like the table's own serializer
+    plus ``type``, and whether another page follows.
+    """
+    rows = db.session.execute(
+        _search_sql(types), {"expression": expression, "limit": limit + 1, "offset": offset}
+    ).all()
+    details = {search_table.type: search_table.columns[1] for search_table in SEARCH_TABLES}
+    results = [
+        {"type": row.type, "id": row.id, "name": row.name, details[row.type]: row.detail}
+        for row in rows[:limit]
+    ]
+    return results, len(rows) > limit
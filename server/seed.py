@@ -2,15 +2,14 @@
 
 from app import app
 from models import db, Restaurant, Pizza, RestaurantPizza
+from seeding import truncate
 
 with app.app_context():
 
     # This will delete any existing rows
     # so you can run the seed file multiple times without having duplicate entries in your database
     print("Deleting data...")
-    Pizza.query.delete()
-    Restaurant.query.delete()
-    RestaurantPizza.query.delete()
+    truncate()
 
     print("Creating restaurants...")
     shack = Restaurant(name="Karen's Pizza Shack", address='address1')
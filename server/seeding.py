@@ -0,0 +1,211 @@
+import random
+import time
+from contextlib import contextmanager
+from multiprocessing import Pool
+
+import click
+from faker import Faker
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, insert, select
+
+import price_stats
+import search
+from cache import read_cache
+from conditional import bump_versions
+from ingredients import sync_pizza_ingredients
+from models import db, Restaurant, Pizza, RestaurantPizza, Ingredient, pizza_ingredients, MIN_PRICE, MAX_PRICE
+
+INGREDIENTS = ["Tomato Sauce", "Cheese", "Pepperoni", "Ricotta", "Red peppers", "Mustard",
+               "Basil", "Mushrooms", "Olives", "Onions", "Ham", "Pineapple"]
+
+# Child tables first so the foreign keys are never violated.
+TRUNCATE_ORDER = (RestaurantPizza, pizza_ingredients, Ingredient, Pizza, Restaurant)
+
+
+def _faker(seed, table, chunk):
+    # Seeded per chunk so the data doesn't depend on how chunks are spread over processes.
+    fake = Faker()
+    fake.seed_instance(f"{seed}:{table}:{chunk}")
+    return fake, random.Random(f"{seed}:{table}:{chunk}")
+
+
+def restaurant_rows(task):
+    seed, chunk, start, count = task
+    fake, _ = _faker(seed, "restaurants", chunk)
+    return [{"name": fake.company(), "address": fake.address()} for _ in range(count)]
+
+
+def pizza_rows(task):
+    # Explicit ids so each chunk's pizza_ingredients can be written alongside it.
+    seed, chunk, start, count, pizza_base = task
+    fake, rng = _faker(seed, "pizzas", chunk)
+    return [
+        {
+            "id": pizza_base + start + i,
+            "name": fake.first_name(),
+            "ingredients": ", ".join(["Dough"] + rng.sample(INGREDIENTS, 3)),
+        }
+        for i in range(count)
+    ]
+
+
+def _sync_pizza_rows(conn, rows):
+    sync_pizza_ingredients(conn, [(row["id"], row["ingredients"]) for row in rows])
+
+
+def restaurant_pizza_rows(task):
+    """Menus for restaurants [start, start + count): ``menu_size`` pizzas each."""
+    seed, chunk, start, count, menu_size, restaurant_base, pizza_base, pizzas = task
+    _, rng = _faker(seed, "restaurant_pizzas", chunk)
+    return [
+        {
+            "restaurant_id": restaurant_base + r,
+            "pizza_id": pizza_base + (r + p) % pizzas,
+            "price": rng.randint(MIN_PRICE, MAX_PRICE),
+        }
+        for r in range(start, start + count)
+        for p in range(menu_size)
+    ]
+
+
+def _chunks(total, size):
+    for chunk, start in enumerate(range(0, total, size)):
+        yield chunk, start, min(size, total - start)
+
+
+@contextmanager
+def triggers_suspended(catch_up):
+    """Drop the triggers on the seeded tables (FTS index, price summaries,
+    table versions) for the duration, then restore them and run ``catch_up(connection)``.
+
+    Per-row triggers cost more than the inserts themselves, and any
+    trigger on a table turns SQLite's DELETE-without-WHERE truncate into
+    a row-by-row delete. Meant for the offline seed command: writes made
+    meanwhile by anything else aren't reflected until the catch-up.
+    """
+    tables = tuple(getattr(model, "__table__", model).name for model in TRUNCATE_ORDER)
+    triggers = []
+    with db.engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            triggers = conn.exec_driver_sql(
+                f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' "
+                f"AND tbl_name IN ({', '.join('?' * len(tables))})", tables).all()
+        for name, _ in triggers:
+            conn.exec_driver_sql(f'DROP TRIGGER "{name}"')
+    try:
+        yield
+    finally:
+        if triggers:
+            with db.engine.begin() as conn:
+                for _, sql in triggers:
+                    conn.exec_driver_sql(sql)
+                catch_up(conn)
+
+
+def _clear_derived(conn):
+    search.rebuild_indexes(conn, "delete-all")
+    price_stats.rebuild(conn)  # from the now empty restaurant_pizzas, i.e. cleared
+    bump_versions(conn)
+
+
+def _rebuild_derived(conn):
+    search.rebuild_indexes(conn)
+    price_stats.rebuild(conn)
+    bump_versions(conn)
+
+
+def truncate():
+    """Delete every row, children first.
+
+    With the triggers out of the way SQLite's DELETE without WHERE is a
+    truncate; the search indexes and price summaries are cleared after.
+    """
+    db.session.commit()
+    with triggers_suspended(_clear_derived):
+        for model in TRUNCATE_ORDER:
+            db.session.execute(delete(model))
+        db.session.commit()
+
+
+def _insert_chunks(model, generate, tasks, pool, after=None):
+    rows_written = 0
+    batches = pool.imap(generate, tasks) if pool else map(generate, tasks)
+    for rows in batches:
+        if not rows:  # e.g. --menu-size 0; an empty executemany would insert one default row
+            continue
+        # One transaction per chunk keeps the WAL and the write lock short.
+        with db.engine.begin() as conn:
+            conn.execute(insert(model), rows)
+            if after:
+                after(conn, rows)
+        rows_written += len(rows)
+    return rows_written
+
+
+def bulk_seed(restaurants, pizzas, menu_size, chunk_size=10000, workers=1, seed=0, report=print):
+    """Insert synthetic data with chunked Core executemany.
+
+    New ids follow the current maximum, so seeding into a non-empty
+    database appends. The search indexes and price summaries are rebuilt
+    once at the end instead of by per-row triggers. Returns
+    {table: (rows, seconds)}.
+    """
+    restaurant_base = (db.session.execute(select(func.max(Restaurant.id))).scalar() or 0) + 1
+    pizza_base = (db.session.execute(select(func.max(Pizza.id))).scalar() or 0) + 1
+    db.session.commit()
+
+    menu_chunk = max(1, chunk_size // max(menu_size, 1))
+    plan = [
+        (Restaurant, restaurant_rows,
+         [(seed, chunk, start, count) for chunk, start, count in _chunks(restaurants, chunk_size)], None),
+        (Pizza, pizza_rows,
+         [(seed, chunk, start, count, pizza_base) for chunk, start, count in _chunks(pizzas, chunk_size)],
+         _sync_pizza_rows),
+        (RestaurantPizza, restaurant_pizza_rows,
+         [(seed, chunk, start, count, menu_size, restaurant_base, pizza_base, pizzas)
+          for chunk, start, count in _chunks(restaurants if pizzas else 0, menu_chunk)], None),
+    ]
+
+    stats = {}
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        with triggers_suspended(_rebuild_derived):
+            for model, generate, tasks, after in plan:
+                start = time.perf_counter()
+                rows = _insert_chunks(model, generate, tasks, pool, after)
+                seconds = time.perf_counter() - start
+                stats[model.__tablename__] = (rows, seconds)
+                report(f"{model.__tablename__}: {rows:,} rows in {seconds:.2f}s "
+                       f"({rows / seconds if seconds else 0:,.0f} rows/sec)")
+            start = time.perf_counter()
+        report(f"search indexes and price summaries rebuilt in {time.perf_counter() - start:.2f}s")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return stats
+
+
+@click.command("seed")
+@click.option("--restaurants", default=1000, show_default=True, help="Restaurants to create.")
+@click.option("--pizzas", default=200, show_default=True, help="Pizzas to create.")
+@click.option("--menu-size", default=20, show_default=True, help="restaurant_pizzas per restaurant.")
+@click.option("--chunk-size", default=10000, show_default=True, help="Rows per insert transaction.")
+@click.option("--workers", default=1, show_default=True, help="Processes generating rows.")
+@click.option("--seed", default=0, show_default=True, help="Faker/random seed.")
+@click.option("--truncate/--append", "do_truncate", default=True, show_default=True,
+              help="Empty the tables first.")
+@with_appcontext
+def seed_command(restaurants, pizzas, menu_size, chunk_size, workers, seed, do_truncate):
+    """Bulk-load synthetic restaurants, pizzas and menus."""
+    started = time.perf_counter()
+    if do_truncate:
+        truncate()
+        click.echo(f"truncated in {time.perf_counter() - started:.2f}s")
+
+    stats = bulk_seed(restaurants, pizzas, menu_size, chunk_size, workers, seed, report=click.echo)
+
+    read_cache.backend.clear()
+    total_rows = sum(rows for rows, _ in stats.values())
+    seconds = time.perf_counter() - started
+    click.echo(f"total: {total_rows:,} rows in {seconds:.2f}s ({total_rows / seconds:,.0f} rows/sec)")
@@ -0,0 +1,104 @@
+import re
+
+from flask import g, request
+from sqlalchemy import select
+
+from models import Restaurant, Pizza, RestaurantPizza
+
+
+class Schema:
+    """Field list for one model, compiled to the columns it selects.
+
+    Routes select ``schema.columns`` directly so the database hands back
+    Row tuples; ``dump`` turns a slice of such a row into a dict without
+    building ORM objects or touching the session's identity map.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = tuple(fields)
+        self.columns = tuple(
+            getattr(model, field).label(f"{model.__tablename__}_{field}")
+            for field in self.fields
+        )
+        self._subsets = {}
+
+    def __len__(self):
+        return len(self.fields)
+
+    def subset(self, fields):
+        """This schema narrowed to ``fields`` (plus ``id``, always), in declared order."""
+        keep = tuple(field for field in self.fields if field == "id" or field in fields)
+        if keep == self.fields:
+            return self
+        if keep not in self._subsets:
+            self._subsets[keep] = Schema(self.model, keep)
+        return self._subsets[keep]
+
+    def dump(self, row, start=0):
+        return dict(zip(self.fields, row[start:start + len(self.fields)]))
+
+
+RESTAURANT = Schema(Restaurant, ("id", "name", "address"))
+PIZZA = Schema(Pizza, ("id", "name", "ingredients"))
+RESTAURANT_PIZZA = Schema(RestaurantPizza, ("id", "price", "pizza_id", "restaurant_id"))
+
+# Resource type names used in ``fields[<type>]`` query parameters.
+SCHEMAS = {"restaurant": RESTAURANT, "pizza": PIZZA, "restaurant_pizza": RESTAURANT_PIZZA}
+FIELDS_PARAM = re.compile(r"fields\[(\w+)\]")
+
+
+def parse_fieldsets(args):
+    """{type: Schema} with each type narrowed by its ``fields[type]=a,b`` parameter.
+
+    Raises ValueError with a client-facing message on bad input.
+    """
+    schemas = dict(SCHEMAS)
+    for key in args:
+        match = FIELDS_PARAM.fullmatch(key)
+        if not match:
+            continue
+        type_ = match.group(1)
+        if type_ not in SCHEMAS:
+            raise ValueError(f"'{key}': unknown type '{type_}'")
+        fields = [field.strip() for field in args[key].split(",") if field.strip()]
+        unknown = [field for field in fields if field not in SCHEMAS[type_].fields]
+        if unknown:
+            raise ValueError(f"'{key}': unknown field(s) {', '.join(unknown)}")
+        schemas[type_] = SCHEMAS[type_].subset(fields)
+    return schemas
+
+
+def request_schemas():
+    """parse_fieldsets() for the current request, parsed once and kept on ``g``."""
+    if "schemas" not in g:
+        g.schemas = parse_fieldsets(request.args)
+    return g.schemas
+
+
+def select_schemas(*schemas):
+    """select() over the columns of several schemas, in order."""
+    return select(*(column for schema in schemas for column in schema.columns))
+
+
+def menu_stmt(restaurant_ids, item_schema=RESTAURANT_PIZZA, pizza_schema=PIZZA):
+    """restaurant_pizzas rows with their pizza joined, for the given restaurants.
+
+    With ``pizza_schema=None`` the pizzas table isn't joined at all.
+    """
+    if pizza_schema is None:
+        stmt = select_schemas(item_schema).select_from(RestaurantPizza)
+    else:
+        stmt = (
+            select_schemas(item_schema, pizza_schema)
+            .join_from(RestaurantPizza, Pizza, RestaurantPizza.pizza_id == Pizza.id)
+        )
+    return stmt.where(RestaurantPizza.restaurant_id.in_(restaurant_ids)).order_by(RestaurantPizza.id)
+
+
+def dump_menu_item(row, item_schema=RESTAURANT_PIZZA, pizza_schema=PIZZA):
+    """Dump a row from ``menu_stmt`` into the nested restaurant_pizza shape."""
+    item = item_schema.dump(row)
+    if pizza_schema is not None:
+        item["pizza"] = pizza_schema.dump(row, len(item_schema))
+    return item
@@ -0,0 +1,126 @@
+import logging
+import threading
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from models import db, Restaurant, utcnow
+from profiling import Counter, registry
+
+logger = logging.getLogger(__name__)
+
+PURGE_BATCH_SIZE = 100
+
+purged_rows = registry.register(Counter(
+    "soft_delete_purged_total", "Soft-deleted rows removed by the purge worker.", ("table",)))
+
+
+def _hide_deleted(execute_state):
+    # Applied to every ORM SELECT, including joins and session.get(), so a
+    # soft-deleted restaurant is gone everywhere the moment it is marked.
+    # Pass execution_options(include_deleted=True) to see those rows.
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(Restaurant, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+        )
+
+
+event.listen(Session, "do_orm_execute", _hide_deleted)
+
+
+def soft_delete_stmt(id):
+    """UPDATE marking restaurant ``id`` deleted; returns its id unless it was missing or already deleted."""
+    return (
+        update(Restaurant)
+        .where(Restaurant.id == id, Restaurant.deleted_at.is_(None))
+        .values(deleted_at=utcnow())
+        .returning(Restaurant.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def soft_delete_restaurant(id):
+    """Mark a restaurant deleted in the current transaction; False if there was none."""
+    return db.session.execute(soft_delete_stmt(id)).first() is not None
+
+
+def purge(batch_size=PURGE_BATCH_SIZE):
+    """Hard-delete soft-deleted restaurants; their menus go with them (ON DELETE CASCADE).
+
+    Each batch is its own short transaction so the SQLite write lock is
+    released between batches. Returns the number of restaurants removed.
+    """
+    total = 0
+    while True:
+        ids = db.session.execute(
+            select(Restaurant.id)
+            .where(Restaurant.deleted_at.is_not(None))
+            .limit(batch_size)
+            .execution_options(include_deleted=True)
+        ).scalars().all()
+        if not ids:
+            return total
+        db.session.execute(
+            delete(Restaurant).where(Restaurant.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        total += len(ids)
+
+
+class PurgeWorker:
+    """Background thread purging soft-deleted restaurants.
+
+    The thread starts on the first notify() rather than with the app so
+    it runs in each gunicorn worker (threads don't survive the fork).
+    After a notify it purges right away; otherwise it wakes every
+    ``interval`` seconds to catch rows left by other processes.
+    """
+
+    def __init__(self, app, interval=60.0, batch_size=PURGE_BATCH_SIZE):
+        self.app, self.interval, self.batch_size = app, interval, batch_size
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def notify(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="restaurant-purge", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                with self.app.app_context():
+                    purged = purge(self.batch_size)
+            except Exception:
+                logger.exception("purging soft-deleted restaurants failed")
+                continue
+            if purged:
+                purged_rows.inc((Restaurant.__tablename__,), purged)
+                logger.info("purged %d soft-deleted restaurants", purged)
+
+
+def configure_soft_delete(app):
+    """Attach the purge worker when SOFT_DELETE_ENABLED is set."""
+    if app.config.get("SOFT_DELETE_ENABLED"):
+        app.extensions["purge_worker"] = PurgeWorker(
+            app, app.config.get("PURGE_INTERVAL", 60.0), app.config.get("PURGE_BATCH_SIZE", PURGE_BATCH_SIZE))
+
+
+@click.command("purge-deleted")
+@click.option("--batch-size", default=PURGE_BATCH_SIZE, show_default=True, help="Restaurants per transaction.")
+@with_appcontext
+def purge_command(batch_size):
+    """Hard-delete soft-deleted restaurants now."""
+    click.echo(f"purged {purge(batch_size):,} restaurants")
@@ -1,6 +1,7 @@
 from models import Restaurant, RestaurantPizza, Pizza
 from app import app, db
 from faker import Faker
+from sqlalchemy import event
 
 
 class TestApp:
@@ -32,6 +33,48 @@ class TestApp:
             for restaurant in response:
                 assert 'restaurant_pizzas' not in restaurant
 
+    def test_restaurants_keyset_pagination(self):
+        '''pages through restaurants with limit/after and a next cursor on GET /restaurants.'''
+        with app.app_context():
+            fake = Faker()
+            db.session.add_all([
+                Restaurant(name=fake.name(), address=fake.address())
+                for _ in range(3)
+            ])
+            db.session.commit()
+            ids = [restaurant.id for restaurant in Restaurant.query.order_by(Restaurant.id)]
+
+            after = ids[-4] if len(ids) > 3 else 0
+
+            client = app.test_client()
+            response = client.get(f'/restaurants?limit=2&after={after}')
+            assert response.status_code == 200
+            page = response.json
+            assert len(page) == 2
+            assert response.headers['X-Next-Cursor'] == str(page[-1]['id'])
+            assert 'rel="next"' in response.headers['Link']
+
+            response = client.get(f'/restaurants?limit=2&after={ids[-2]}')
+            assert [restaurant['id'] for restaurant in response.json] == [ids[-1]]
+            assert 'Link' not in response.headers
+
+            response = client.get('/restaurants?limit=0')
+            assert response.status_code == 400
+            assert response.json['errors']
+
+    def test_restaurants_stream(self):
+        '''streams every restaurant as one JSON array with GET /restaurants?stream=1.'''
+        with app.app_context():
+            fake = Faker()
+            db.session.add(Restaurant(name=fake.name(), address=fake.address()))
+            db.session.commit()
+            ids = [restaurant.id for restaurant in Restaurant.query.order_by(Restaurant.id)]
+
+            response = app.test_client().get('/restaurants?stream=1')
+            assert response.status_code == 200
+            assert response.content_type == 'application/json'
+            assert [restaurant['id'] for restaurant in response.json] == ids
+
     def test_restaurants_id(self):
         '''retrieves one restaurant using its ID with GET request to /restaurants/<int:id>.'''
 
@@ -51,6 +94,47 @@ class TestApp:
             assert response['address'] == restaurant.address
             assert 'restaurant_pizzas' in response
 
+    def test_restaurants_id_statement_count(self):
+        '''loads a restaurant and its menu with a fixed number of statements regardless of menu size.'''
+
+        with app.app_context():
+            fake = Faker()
+            statement_counts = []
+            for menu_size in (1, 25):
+                restaurant = Restaurant(name=fake.name(), address=fake.address())
+                pizzas = [
+                    Pizza(name=fake.name(), ingredients=fake.sentence())
+                    for _ in range(menu_size)
+                ]
+                db.session.add(restaurant)
+                db.session.add_all(pizzas)
+                db.session.add_all([
+                    RestaurantPizza(restaurant=restaurant, pizza=pizza, price=5)
+                    for pizza in pizzas
+                ])
+                db.session.commit()
+                restaurant_id = restaurant.id
+                db.session.remove()
+
+                statements = []
+
+                def count(conn, cursor, statement, *args):
+                    statements.append(statement)
+
+                event.listen(db.engine, "before_cursor_execute", count)
+                try:
+                    response = app.test_client().get(
+                        f'/restaurants/{restaurant_id}')
+                finally:
+                    event.remove(db.engine, "before_cursor_execute", count)
+
+                assert response.status_code == 200
+                assert len(response.json['restaurant_pizzas']) == menu_size
+                statement_counts.append(len(statements))
+
+            # version check for the ETag, the restaurant, its menu
+            assert statement_counts[0] == statement_counts[1] == 3
+
     def test_returns_404_if_no_restaurant_to_get(self):
         '''returns an error message and 404 status code with GET request to /restaurants/<int:id> by a non-existent ID.'''
 
@@ -113,6 +197,23 @@ class TestApp:
             for pizza in response:
                 assert 'restaurant_pizzas' not in pizza
 
+    def test_pizzas_id(self):
+        '''retrieves one pizza using its ID with GET request to /pizzas/<int:id>.'''
+        with app.app_context():
+            fake = Faker()
+            pizza = Pizza(name=fake.name(), ingredients=fake.sentence())
+            db.session.add(pizza)
+            db.session.commit()
+
+            response = app.test_client().get(f'/pizzas/{pizza.id}')
+            assert response.status_code == 200
+            assert response.json == {
+                'id': pizza.id, 'name': pizza.name, 'ingredients': pizza.ingredients}
+
+            response = app.test_client().get('/pizzas/0')
+            assert response.status_code == 404
+            assert response.json['error'] == "Pizza not found"
+
     def test_creates_restaurant_pizzas(self):
         '''creates one restaurant_pizzas using a pizza_id, restaurant_id, and price with a POST request to /restaurant_pizzas.'''
 
@@ -189,3 +290,69 @@ class TestApp:
 
             assert response.status_code == 400
             assert response.json['errors'] == ["validation errors"]
+
+    def test_creates_restaurant_with_menu(self):
+        '''creates a restaurant, its restaurant_pizzas and any missing pizzas with a POST request to /restaurants_pizza.'''
+
+        with app.app_context():
+            fake = Faker()
+            pizza = Pizza(name=fake.name(), ingredients=fake.sentence())
+            db.session.add(pizza)
+            db.session.commit()
+
+            response = app.test_client().post('/restaurants_pizza', json={
+                "name": "Nested Pizzeria",
+                "address": "1 Nested Way",
+                "restaurant_pizzas": [
+                    {"price": 4, "pizza": {"id": pizza.id}},
+                    {"price": 6, "pizza": {"id": 0, "name": "Fresh", "ingredients": "Dough"}},
+                ],
+            })
+
+            assert response.status_code == 201
+            body = response.json
+            restaurant = db.session.get(Restaurant, body['id'])
+            assert restaurant.name == "Nested Pizzeria"
+            assert [rp['price'] for rp in body['restaurant_pizzas']] == [4, 6]
+            assert body['restaurant_pizzas'][0]['pizza']['id'] == pizza.id
+            created = db.session.get(Pizza, body['restaurant_pizzas'][1]['pizza']['id'])
+            assert created.name == "Fresh"
+            assert sorted(rp.id for rp in restaurant.restaurant_pizzas) == [
+                rp['id'] for rp in body['restaurant_pizzas']]
+
+    def test_create_restaurant_with_invalid_menu_is_atomic(self):
+        '''writes nothing when any nested item in a POST request to /restaurants_pizza is invalid.'''
+
+        with app.app_context():
+            fake = Faker()
+            pizza = Pizza(name=fake.name(), ingredients=fake.sentence())
+            db.session.add(pizza)
+            db.session.commit()
+            name = fake.name()
+
+            response = app.test_client().post('/restaurants_pizza', json={
+                "name": name,
+                "address": "2 Nested Way",
+                "restaurant_pizzas": [
+                    {"price": 4, "pizza": {"id": pizza.id}},
+                    {"price": 40, "pizza": {"id": pizza.id}},
+                ],
+            })
+
+            assert response.status_code == 400
+            assert response.json['errors']
+            assert Restaurant.query.filter_by(name=name).count() == 0
+
+    def test_create_restaurant_with_non_integer_pizza_id(self):
+        '''rejects nested pizza ids that aren't integers in a POST request to /restaurants_pizza.'''
+
+        with app.app_context():
+            for pizza_id in ([1], "1", None, 1.5, True):
+                response = app.test_client().post('/restaurants_pizza', json={
+                    "name": "Bad Ids",
+                    "address": "3 Nested Way",
+                    "restaurant_pizzas": [{"price": 4, "pizza": {"id": pizza_id, "name": "A", "ingredients": "B"}}],
+                })
+
+                assert response.status_code == 400
+                assert response.json['errors']
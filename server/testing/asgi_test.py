@@ -0,0 +1,176 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import delete, select
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("greenlet")
+
+from app import app as wsgi_app
+from models import db, Restaurant, Pizza, RestaurantPizza
+from faker import Faker
+
+
+def call(method, path, body=None):
+    '''Drive the ASGI app directly and return (status, parsed body).'''
+    status, _, data = request(method, path, body)
+    return status, data
+
+
+def request(method, path, body=None):
+    '''Drive the ASGI app directly and return (status, headers, parsed body).'''
+    from asgi import app, engine
+
+    query = b""
+    if "?" in path:
+        path, query = path.split("?", 1)
+        query = query.encode()
+    scope = {"type": "http", "method": method, "path": path, "query_string": query,
+             "headers": [(b"host", b"localhost")]}
+    messages = [{"type": "http.request", "body": json.dumps(body).encode() if body is not None else b""}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        await app(scope, receive, send)
+        await engine.dispose()
+
+    asyncio.run(run())
+    status = sent[0]["status"]
+    headers = {name.decode(): value.decode() for name, value in sent[0]["headers"]}
+    data = b"".join(message.get("body", b"") for message in sent[1:])
+    return status, headers, json.loads(data) if data else None
+
+
+class TestASGIApp:
+    '''ASGI entry point in asgi.py'''
+
+    def test_matches_wsgi_restaurant(self):
+        '''returns the same restaurant payload as the WSGI app.'''
+        with wsgi_app.app_context():
+            fake = Faker()
+            restaurant = Restaurant(name=fake.name(), address=fake.address())
+            pizza = Pizza(name=fake.name(), ingredients=fake.sentence())
+            db.session.add_all([restaurant, pizza,
+                                RestaurantPizza(restaurant=restaurant, pizza=pizza, price=12)])
+            db.session.commit()
+            restaurant_id = restaurant.id
+
+        status, body = call("GET", f"/restaurants/{restaurant_id}")
+        assert status == 200
+        assert body == wsgi_app.test_client().get(f"/restaurants/{restaurant_id}").json
+
+        status, body = call("GET", "/restaurants/0")
+        assert status == 404
+        assert body == {"error": "Restaurant not found"}
+
+    def test_paginated_pizzas(self):
+        '''pages through pizzas with limit/after.'''
+        with wsgi_app.app_context():
+            db.session.add_all([Pizza(name="Async", ingredients="Dough") for _ in range(2)])
+            db.session.commit()
+
+        status, headers, body = request("GET", "/pizzas?limit=1&sort=id&sort=name")
+        assert status == 200
+        assert len(body) == 1
+        expected = wsgi_app.test_client().get("/pizzas?limit=1&sort=id&sort=name").headers
+        assert headers["link"] == expected["Link"]
+        assert headers["x-next-cursor"] == expected["X-Next-Cursor"] == str(body[0]["id"])
+        status, body = call("GET", "/pizzas?stream=1")
+        assert [pizza["id"] for pizza in body] == [
+            pizza["id"] for pizza in wsgi_app.test_client().get("/pizzas").json]
+
+    def test_create_and_delete(self):
+        '''creates a restaurant_pizza and deletes its restaurant.'''
+        with wsgi_app.app_context():
+            fake = Faker()
+            restaurant = Restaurant(name=fake.name(), address=fake.address())
+            pizza = Pizza(name=fake.name(), ingredients=fake.sentence())
+            db.session.add_all([restaurant, pizza])
+            db.session.commit()
+            restaurant_id, pizza_id = restaurant.id, pizza.id
+
+        status, body = call("POST", "/restaurant_pizzas",
+                            {"price": 3, "pizza_id": pizza_id, "restaurant_id": restaurant_id})
+        assert status == 201
+        assert body["pizza"]["id"] == pizza_id
+        assert body["restaurant"]["id"] == restaurant_id
+
+        status, body = call("POST", "/restaurant_pizzas",
+                            {"price": 31, "pizza_id": pizza_id, "restaurant_id": restaurant_id})
+        assert status == 400
+
+        assert call("DELETE", f"/restaurants/{restaurant_id}")[0] == 204
+        assert call("GET", f"/restaurants/{restaurant_id}")[0] == 404
+
+    def test_soft_delete(self, monkeypatch):
+        '''with SOFT_DELETE_ENABLED, DELETE marks the restaurant and every read hides it.'''
+        import asgi
+
+        monkeypatch.setattr(asgi, "SOFT_DELETE_ENABLED", True)
+        with wsgi_app.app_context():
+            fake = Faker()
+            restaurant = Restaurant(name=fake.name(), address=fake.address())
+            db.session.add(restaurant)
+            db.session.commit()
+            restaurant_id = restaurant.id
+
+        assert call("DELETE", f"/restaurants/{restaurant_id}")[0] == 204
+        assert call("DELETE", f"/restaurants/{restaurant_id}")[0] == 404
+        assert call("GET", f"/restaurants/{restaurant_id}")[0] == 404
+        assert restaurant_id not in [r["id"] for r in call("GET", "/restaurants")[1]]
+
+        with wsgi_app.app_context():
+            deleted_at = db.session.execute(
+                select(Restaurant.deleted_at).where(Restaurant.id == restaurant_id)
+                .execution_options(include_deleted=True)
+            ).scalar_one()
+            assert deleted_at is not None
+            db.session.execute(delete(Restaurant).where(Restaurant.id == restaurant_id))
+            db.session.commit()
+
+    def test_query_parameters_match_wsgi(self):
+        '''fields[...], include=, ingredient=/exclude= and repeated parameters read as in the WSGI app.'''
+        with wsgi_app.app_context():
+            restaurant = Restaurant(name="Parity", address="1 Async St")
+            pizzas = [Pizza(name="Parity A", ingredients="Dough, Basil"),
+                      Pizza(name="Parity B", ingredients="Dough, Anchovy")]
+            db.session.add_all([restaurant, *pizzas,
+                                RestaurantPizza(restaurant=restaurant, pizza=pizzas[0], price=7)])
+            db.session.commit()
+            restaurant_id = restaurant.id
+            pizza_ids = f"{pizzas[1].id},{pizzas[0].id}"
+
+        client = wsgi_app.test_client()
+        for path in [
+            f"/restaurants/{restaurant_id}?fields[restaurant]=name&include=restaurant_pizzas",
+            f"/restaurants/{restaurant_id}?fields[pizza]=name&fields[restaurant_pizza]=price",
+            "/restaurants?fields[restaurant]=address&limit=2",
+            "/pizzas?ingredient=basil&exclude=anchovy",
+            "/pizzas?ingredient=dough&fields[pizza]=name",
+            "/pizzas?limit=1&limit=50",
+        ]:
+            status, body = call("GET", path)
+            expected = client.get(path)
+            assert (status, body) == (expected.status_code, expected.json), path
+        assert len(call("GET", "/pizzas?limit=1&limit=50")[1]) == 1
+
+        for path in [
+            f"/restaurants?ids={restaurant_id},0&include=restaurant_pizzas.pizza",
+            f"/restaurants?ids=0,{restaurant_id}&fields[restaurant]=name",
+            f"/pizzas?ids={pizza_ids},0",
+        ]:
+            status, body = call("GET", path)
+            expected = client.get(path)
+            assert (status, body) == (expected.status_code, expected.json), path
+        assert call("GET", f"/restaurants?ids={restaurant_id},0")[1]["missing"] == [0]
+
+        for path in ["/pizzas?fields[nope]=id", "/pizzas?ids=x", "/restaurants?include=restaurant_pizzas",
+                     f"/restaurants/{restaurant_id}?include=nope"]:
+            assert call("GET", path)[0] == client.get(path).status_code == 400, path
@@ -0,0 +1,66 @@
+import re
+
+import pytest
+
+from models import db, Restaurant, Pizza, RestaurantPizza
+
+
+@pytest.fixture
+def client(app_factory):
+    app = app_factory(READ_CACHE_ENABLED=False)
+    with app.app_context():
+        restaurants = [Restaurant(name=f"Shack {i}", address=f"{i} Main St") for i in range(1, 4)]
+        pizzas = [Pizza(name=f"Pizza {i}", ingredients="Dough, Cheese") for i in range(1, 4)]
+        db.session.add_all([*restaurants, *pizzas])
+        db.session.flush()
+        # Every restaurant lists pizza 1; restaurant 3 also lists pizzas 2 and 3.
+        db.session.add_all([RestaurantPizza(restaurant=r, pizza=pizzas[0], price=5) for r in restaurants])
+        db.session.add_all([RestaurantPizza(restaurant=restaurants[2], pizza=p, price=9) for p in pizzas[1:]])
+        db.session.commit()
+    return app.test_client()
+
+
+def queries(response):
+    return int(re.search(r'desc="(\d+) queries"', response.headers["Server-Timing"]).group(1))
+
+
+class TestBatchReads:
+    '''GET /restaurants?ids= and GET /pizzas?ids='''
+
+    def test_restaurants_in_request_order(self, client):
+        '''returns the requested restaurants in order and lists unknown ids.'''
+        response = client.get('/restaurants?ids=3,99,1,3')
+        assert response.status_code == 200
+        assert [r["id"] for r in response.json["restaurants"]] == [3, 1]
+        assert response.json["missing"] == [99]
+        assert "pizzas" not in response.json
+
+    def test_sideloads_pizzas_once(self, client):
+        '''include=restaurant_pizzas.pizza embeds menus and lists each pizza once.'''
+        response = client.get('/restaurants?ids=1,2,3&include=restaurant_pizzas.pizza')
+        body = response.json
+
+        assert [item["pizza_id"] for item in body["restaurants"][2]["restaurant_pizzas"]] == [1, 2, 3]
+        assert body["restaurants"][0]["restaurant_pizzas"] == [
+            {"id": 1, "price": 5, "pizza_id": 1, "restaurant_id": 1}]
+        assert body["pizzas"] == [
+            {"id": i, "name": f"Pizza {i}", "ingredients": "Dough, Cheese"} for i in (1, 2, 3)]
+
+    def test_constant_queries(self, client):
+        '''the query count doesn't grow with the number of ids.'''
+        one = client.get('/restaurants?ids=1&include=restaurant_pizzas.pizza')
+        three = client.get('/restaurants?ids=1,2,3&include=restaurant_pizzas.pizza')
+        assert queries(one) == queries(three)
+
+    def test_pizzas(self, client):
+        '''GET /pizzas?ids= resolves pizzas in request order.'''
+        response = client.get('/pizzas?ids=2,1,7')
+        assert [p["id"] for p in response.json["pizzas"]] == [2, 1]
+        assert response.json["missing"] == [7]
+
+    def test_bad_input(self, client):
+        '''malformed ids and unknown or id-less includes are 400s.'''
+        assert client.get('/restaurants?ids=1,x').status_code == 400
+        assert client.get('/restaurants?ids=').status_code == 400
+        assert client.get('/restaurants?ids=1&include=owner').status_code == 400
+        assert client.get('/restaurants?include=restaurant_pizzas').status_code == 400
@@ -0,0 +1,94 @@
+import json
+
+from sqlalchemy import delete
+
+import app as app_module
+from app import app
+from bulk import validate_records
+from models import db, Restaurant, Pizza, RestaurantPizza
+from faker import Faker
+
+
+class TestBatchRestaurantPizzas:
+    '''POST /restaurant_pizzas/batch in app.py'''
+
+    def setup_records(self):
+        fake = Faker()
+        pizza = Pizza(name=fake.name(), ingredients=fake.sentence())
+        restaurant = Restaurant(name=fake.name(), address=fake.address())
+        db.session.add_all([pizza, restaurant])
+        db.session.commit()
+        return pizza, restaurant
+
+    def test_creates_valid_and_reports_invalid(self):
+        '''inserts valid records and returns per-item errors for the rest.'''
+        with app.app_context():
+            pizza, restaurant = self.setup_records()
+
+            response = app.test_client().post('/restaurant_pizzas/batch', json=[
+                {"price": 5, "pizza_id": pizza.id, "restaurant_id": restaurant.id},
+                {"price": 31, "pizza_id": pizza.id, "restaurant_id": restaurant.id},
+                {"price": 6, "pizza_id": 0, "restaurant_id": restaurant.id},
+                {"price": "7", "pizza_id": pizza.id, "restaurant_id": restaurant.id},
+                {"price": 8, "pizza_id": pizza.id, "restaurant_id": restaurant.id},
+            ])
+
+            assert response.status_code == 207
+            body = response.json
+            assert [item['index'] for item in body['created']] == [0, 4]
+            assert [item['index'] for item in body['errors']] == [1, 2, 3]
+            assert body['errors'][1]['errors'] == ["pizza 0 not found"]
+
+            prices = [rp.price for rp in RestaurantPizza.query.filter_by(
+                restaurant_id=restaurant.id).order_by(RestaurantPizza.id)]
+            assert prices == [5, 8]
+            assert [item['id'] for item in body['created']] == [
+                rp.id for rp in RestaurantPizza.query.filter_by(
+                    restaurant_id=restaurant.id).order_by(RestaurantPizza.id)]
+
+    def test_ndjson(self):
+        '''accepts an NDJSON body and returns 201 when every record is valid.'''
+        with app.app_context():
+            pizza, restaurant = self.setup_records()
+            body = "\n".join(
+                json.dumps({"price": price, "pizza_id": pizza.id, "restaurant_id": restaurant.id})
+                for price in (1, 30)
+            )
+
+            response = app.test_client().post(
+                '/restaurant_pizzas/batch', data=body, content_type='application/x-ndjson')
+
+            assert response.status_code == 201
+            assert response.json['errors'] == []
+            assert len(response.json['created']) == 2
+
+    def test_rejects_non_array(self):
+        '''returns 400 when the body is neither a JSON array nor NDJSON.'''
+        response = app.test_client().post('/restaurant_pizzas/batch', json={"price": 5})
+        assert response.status_code == 400
+        assert response.json['errors']
+
+    def test_rows_failing_constraints_reported(self, monkeypatch):
+        '''a restaurant deleted between validation and insert fails only its own rows.'''
+        with app.app_context():
+            pizza, kept = self.setup_records()
+            _, gone = self.setup_records()
+            kept_id, gone_id = kept.id, gone.id
+
+            def validate_then_delete(records):
+                # Another request removes the restaurant once its rows have passed.
+                result = validate_records(records)
+                db.session.execute(delete(Restaurant).where(Restaurant.id == gone_id))
+                db.session.commit()
+                return result
+
+            monkeypatch.setattr(app_module, "validate_records", validate_then_delete)
+            response = app.test_client().post('/restaurant_pizzas/batch', json=[
+                {"price": 5, "pizza_id": pizza.id, "restaurant_id": kept_id},
+                {"price": 6, "pizza_id": pizza.id, "restaurant_id": gone_id},
+            ])
+
+            assert response.status_code == 207
+            assert [item['index'] for item in response.json['created']] == [0]
+            assert response.json['errors'] == [{"index": 1, "errors": ["restaurant or pizza no longer exists"]}]
+            assert RestaurantPizza.query.filter_by(restaurant_id=kept_id).count() == 1
@@ -0,0 +1,99 @@
+from app import app
+from cache import LRUTTLCache, MISSING, read_cache
+from models import db, Restaurant, Pizza
+from faker import Faker
+from sqlalchemy import update
+
+
+class TestLRUTTLCache:
+    '''Class LRUTTLCache in cache.py'''
+
+    def test_evicts_least_recently_used(self):
+        '''evicts the least recently used entry once maxsize is exceeded.'''
+        cache = LRUTTLCache(maxsize=2, ttl=60)
+        cache.set("a", b"1")
+        cache.set("b", b"2")
+        assert cache.get("a") == b"1"
+        cache.set("c", b"3")
+
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == b"1"
+        assert cache.stats()["evictions"] == 1
+
+    def test_expires_entries(self):
+        '''treats entries older than ttl as misses.'''
+        cache = LRUTTLCache(maxsize=2, ttl=0)
+        cache.set("a", b"1")
+        assert cache.get("a") is MISSING
+        assert cache.stats()["expirations"] == 1
+
+
+class TestReadCache:
+    '''Read-through cache on the GET routes in app.py'''
+
+    def test_hit_then_invalidated_by_write(self):
+        '''serves a repeated GET /restaurants/<int:id> from cache until a restaurant_pizza is added.'''
+        with app.app_context():
+            fake = Faker()
+            restaurant = Restaurant(name=fake.name(), address=fake.address())
+            pizza = Pizza(name=fake.name(), ingredients=fake.sentence())
+            db.session.add_all([restaurant, pizza])
+            db.session.commit()
+
+            client = app.test_client()
+            assert client.get(f'/restaurants/{restaurant.id}').headers['X-Cache'] == 'MISS'
+            response = client.get(f'/restaurants/{restaurant.id}')
+            assert response.headers['X-Cache'] == 'HIT'
+            assert response.json['restaurant_pizzas'] == []
+
+            response = client.post('/restaurant_pizzas', json={
+                "price": 7, "pizza_id": pizza.id, "restaurant_id": restaurant.id})
+            assert response.status_code == 201
+
+            response = client.get(f'/restaurants/{restaurant.id}')
+            assert response.headers['X-Cache'] == 'MISS'
+            assert [rp['price'] for rp in response.json['restaurant_pizzas']] == [7]
+
+    def test_delete_invalidates(self):
+        '''stops serving a deleted restaurant from cache.'''
+        with app.app_context():
+            fake = Faker()
+            restaurant = Restaurant(name=fake.name(), address=fake.address())
+            db.session.add(restaurant)
+            db.session.commit()
+
+            client = app.test_client()
+            client.get(f'/restaurants/{restaurant.id}')
+            client.get('/restaurants')
+            assert client.delete(f'/restaurants/{restaurant.id}').status_code == 204
+
+            assert client.get(f'/restaurants/{restaurant.id}').status_code == 404
+            assert restaurant.id not in [r['id'] for r in client.get('/restaurants').json]
+
+    def test_stats(self):
+        '''reports hit, miss and eviction counters at GET /cache/stats.'''
+        response = app.test_client().get('/cache/stats')
+        assert response.status_code == 200
+        assert response.json == read_cache.stats()
+        for counter in ("hits", "misses", "evictions"):
+            assert counter in response.json
+
+    def test_write_by_another_worker(self):
+        '''an entry another process's write made stale isn't served under the new ETag.'''
+        with app.app_context():
+            fake = Faker()
+            restaurant = Restaurant(name=fake.name(), address=fake.address())
+            db.session.add(restaurant)
+            db.session.commit()
+
+            client = app.test_client()
+            client.get(f'/restaurants/{restaurant.id}')
+            assert client.get(f'/restaurants/{restaurant.id}').headers['X-Cache'] == 'HIT'
+
+            # A Core update skips this process's invalidation hooks, like a write on another worker.
+            db.session.execute(update(Restaurant).where(Restaurant.id == restaurant.id).values(name="Renamed"))
+            db.session.commit()
+
+            response = client.get(f'/restaurants/{restaurant.id}')
+            assert response.headers['X-Cache'] == 'MISS'
+            assert response.json['name'] == "Renamed"
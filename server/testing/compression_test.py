@@ -0,0 +1,68 @@
+import gzip
+
+import pytest
+
+from compression import ENCODERS
+from models import db, Restaurant, Pizza, RestaurantPizza
+
+
+@pytest.fixture
+def app(app_factory):
+    app = app_factory(COMPRESSION_MIN_SIZE=500)
+    with app.app_context():
+        restaurant = Restaurant(name="Karen's Pizza Shack", address="1 Main St")
+        pizzas = [Pizza(name=f"Pizza {i}", ingredients="Dough, Tomato Sauce, Cheese") for i in range(30)]
+        db.session.add_all([restaurant, *pizzas])
+        db.session.flush()
+        db.session.add_all([RestaurantPizza(restaurant=restaurant, pizza=pizza, price=10) for pizza in pizzas])
+        db.session.commit()
+    return app
+
+
+class TestCompression:
+    '''negotiated response compression in compression.py'''
+
+    def test_gzip_round_trip(self, app):
+        '''large JSON is gzipped with its own ETag and Vary: Accept-Encoding.'''
+        client = app.test_client()
+        plain = client.get('/restaurants/1')
+        compressed = client.get('/restaurants/1', headers={"Accept-Encoding": "gzip"})
+
+        assert "Content-Encoding" not in plain.headers
+        assert compressed.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in compressed.headers["Vary"]
+        assert gzip.decompress(compressed.data) == plain.data
+        assert len(compressed.data) < len(plain.data)
+        assert compressed.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+
+    def test_revalidates_compressed_variant(self, app):
+        '''If-None-Match with an encoding's ETag still gets a 304.'''
+        client = app.test_client()
+        first = client.get('/restaurants/1', headers={"Accept-Encoding": "gzip"})
+        second = client.get('/restaurants/1', headers={
+            "Accept-Encoding": "gzip", "If-None-Match": first.headers["ETag"]})
+        assert second.status_code == 304
+        assert second.headers["ETag"] == first.headers["ETag"]
+
+    def test_threshold_and_identity(self, app):
+        '''small bodies and clients without a usable encoding are sent as-is.'''
+        client = app.test_client()
+        assert "Content-Encoding" not in client.get('/pizzas/1', headers={"Accept-Encoding": "gzip"}).headers
+        assert "Content-Encoding" not in client.get(
+            '/restaurants/1', headers={"Accept-Encoding": "identity"}).headers
+
+    def test_prefers_client_quality(self, app):
+        '''the client's q-values pick the encoding.'''
+        if "br" not in ENCODERS:
+            pytest.skip("brotli not installed")
+        response = app.test_client().get('/restaurants/1', headers={"Accept-Encoding": "gzip;q=0.5, br"})
+        assert response.headers["Content-Encoding"] == "br"
+
+    def test_reuses_compressed_bodies(self, app):
+        '''identical bodies are compressed once.'''
+        client = app.test_client()
+        cache = app.extensions["compressor"].cache
+        client.get('/restaurants/1?limit=1', headers={"Accept-Encoding": "gzip"})
+        hits = cache.hits
+        client.get('/restaurants/1?limit=1', headers={"Accept-Encoding": "gzip"})
+        assert cache.hits == hits + 1
@@ -0,0 +1,112 @@
+from sqlalchemy import insert
+
+from app import app
+from conditional import collection_version
+from models import db, Restaurant, Pizza, RestaurantPizza
+from faker import Faker
+
+
+class TestConditionalRequests:
+    '''ETag and Last-Modified handling on the GET routes in app.py'''
+
+    def test_etag_304_until_menu_changes(self):
+        '''returns 304 for a matching If-None-Match on /restaurants/<int:id> until its menu changes.'''
+        with app.app_context():
+            fake = Faker()
+            restaurant = Restaurant(name=fake.name(), address=fake.address())
+            pizza = Pizza(name=fake.name(), ingredients=fake.sentence())
+            db.session.add_all([restaurant, pizza])
+            db.session.commit()
+
+            client = app.test_client()
+            response = client.get(f'/restaurants/{restaurant.id}')
+            etag = response.headers['ETag']
+            assert response.status_code == 200
+            assert response.headers['Last-Modified']
+
+            response = client.get(
+                f'/restaurants/{restaurant.id}', headers={'If-None-Match': etag})
+            assert response.status_code == 304
+            assert response.data == b''
+
+            db.session.add(RestaurantPizza(restaurant=restaurant, pizza=pizza, price=9))
+            db.session.commit()
+
+            response = client.get(
+                f'/restaurants/{restaurant.id}', headers={'If-None-Match': etag})
+            assert response.status_code == 200
+            assert response.headers['ETag'] != etag
+
+    def test_if_modified_since(self):
+        '''returns 304 for If-Modified-Since at or after Last-Modified on /pizzas/<int:id>.'''
+        with app.app_context():
+            fake = Faker()
+            pizza = Pizza(name=fake.name(), ingredients=fake.sentence())
+            db.session.add(pizza)
+            db.session.commit()
+
+            client = app.test_client()
+            last_modified = client.get(f'/pizzas/{pizza.id}').headers['Last-Modified']
+            response = client.get(
+                f'/pizzas/{pizza.id}', headers={'If-Modified-Since': last_modified})
+            assert response.status_code == 304
+
+            response = client.get(
+                f'/pizzas/{pizza.id}', headers={'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'})
+            assert response.status_code == 200
+
+    def test_collection_etag_changes_on_delete(self):
+        '''changes the /restaurants ETag when a restaurant is deleted.'''
+        with app.app_context():
+            fake = Faker()
+            restaurant = Restaurant(name=fake.name(), address=fake.address())
+            db.session.add(restaurant)
+            db.session.commit()
+
+            client = app.test_client()
+            etag = client.get('/restaurants').headers['ETag']
+            client.delete(f'/restaurants/{restaurant.id}')
+
+            response = client.get('/restaurants', headers={'If-None-Match': etag})
+            assert response.status_code == 200
+            assert response.headers['ETag'] != etag
+
+    def test_collection_ignores_if_modified_since(self):
+        '''a delete leaves max(updated_at) alone, so /restaurants doesn't answer If-Modified-Since with 304.'''
+        with app.app_context():
+            fake = Faker()
+            older = Restaurant(name=fake.name(), address=fake.address())
+            db.session.add(older)
+            db.session.commit()
+            db.session.add(Restaurant(name=fake.name(), address=fake.address()))
+            db.session.commit()
+
+            older_id = older.id
+
+            client = app.test_client()
+            last_modified = client.get('/restaurants').headers['Last-Modified']
+            client.delete(f'/restaurants/{older_id}')
+
+            response = client.get('/restaurants', headers={'If-Modified-Since': last_modified})
+            assert response.status_code == 200
+            assert older_id not in [r["id"] for r in response.json]
+
+    def test_collection_version_is_a_lookup(self):
+        '''collection versions come from one table_versions row, bumped by Core writes too.'''
+        with app.app_context():
+            version = collection_version(Pizza)
+            db.session.execute(insert(Pizza), [{"name": "Core", "ingredients": "Dough"}] * 3)
+            db.session.commit()
+            assert collection_version(Pizza)[0] == version[0] + 3
+
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            db.event.listen(db.engine, "before_cursor_execute", listener)
+            try:
+                collection_version(Restaurant)
+            finally:
+                db.event.remove(db.engine, "before_cursor_execute", listener)
+            plan = db.session.connection().exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + statements[0], ("restaurants",)).all()
+            assert [row[-1] for row in plan] == [
+                "SEARCH table_versions USING INDEX sqlite_autoindex_table_versions_1 (name=?)"]
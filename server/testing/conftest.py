@@ -1,9 +1,26 @@
 #!/usr/bin/env python3
 
+import pytest
+
+from app import create_app
+from models import db
+
+
 def pytest_itemcollected(item):
     par = item.parent.obj
     node = item.obj
     pref = par.__doc__.strip() if par.__doc__ else par.__class__.__name__
     suf = node.__doc__.strip() if node.__doc__ else node.__name__
     if pref or suf:
-        item._nodeid = ' '.join((pref, suf))
\ No newline at end of file
+        item._nodeid = ' '.join((pref, suf))
+
+
+@pytest.fixture
+def app_factory(tmp_path):
+    '''create_app(config) over a SQLite file in tmp_path, with the tables created'''
+    def make(database="app.db", **config):
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / database}", **config}, migrations=False)
+        with app.app_context():
+            db.create_all()
+        return app
+    return make
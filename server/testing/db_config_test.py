@@ -0,0 +1,24 @@
+from app import app
+from db_config import engine_options
+from models import db
+from sqlalchemy import text
+
+
+class TestDBConfig:
+    '''SQLite engine profile in db_config.py'''
+
+    def test_pragmas_applied(self):
+        '''applies the production PRAGMAs to every pooled connection.'''
+        with app.app_context():
+            pragma = lambda name: db.session.execute(text(f"PRAGMA {name}")).scalar()
+            assert pragma("journal_mode") == "wal"
+            assert pragma("foreign_keys") == 1
+            assert pragma("synchronous") == 1
+            assert pragma("busy_timeout") == 5000
+
+    def test_engine_options(self):
+        '''sizes the pool for file databases and leaves in-memory SQLite alone.'''
+        options = engine_options("sqlite:////tmp/app.db", env={"DB_POOL_SIZE": "3"})
+        assert options["pool_size"] == 3
+        assert options["connect_args"] == {"check_same_thread": False}
+        assert engine_options("sqlite://") == {}
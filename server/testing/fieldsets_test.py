@@ -0,0 +1,90 @@
+import pytest
+
+from models import db, Restaurant, Pizza, RestaurantPizza
+
+
+@pytest.fixture
+def app(app_factory):
+    app = app_factory(READ_CACHE_ENABLED=False)
+    with app.app_context():
+        restaurant = Restaurant(name="Karen's Pizza Shack", address="1 Main St")
+        pizza = Pizza(name="Cheese", ingredients="Dough, Cheese")
+        db.session.add_all([restaurant, pizza])
+        db.session.flush()
+        db.session.add(RestaurantPizza(restaurant=restaurant, pizza=pizza, price=10))
+        db.session.commit()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def statements(app, client, url):
+    '''the SQL run for ``url``'''
+    seen = []
+    with app.app_context():
+        engine = db.engine
+    listener = lambda conn, cursor, statement, *args: seen.append(statement)
+    db.event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.get(url)
+    finally:
+        db.event.remove(engine, "before_cursor_execute", listener)
+    return response, seen
+
+
+class TestFieldsets:
+    '''fields[type]= and include= on the read endpoints'''
+
+    def test_sparse_list(self, client):
+        '''fields[restaurant] narrows list items; id is always kept.'''
+        response = client.get('/restaurants?fields[restaurant]=name')
+        assert response.status_code == 200
+        assert response.json == [{"id": 1, "name": "Karen's Pizza Shack"}]
+
+    def test_sparse_pizza(self, client):
+        '''fields[pizza] applies to GET /pizzas, /pizzas/<id> and ?ids='''
+        assert client.get('/pizzas?fields[pizza]=name').json == [{"id": 1, "name": "Cheese"}]
+        assert client.get('/pizzas/1?fields[pizza]=ingredients').json == {"id": 1, "ingredients": "Dough, Cheese"}
+        assert client.get('/pizzas?ids=1&fields[pizza]=name').json["pizzas"] == [{"id": 1, "name": "Cheese"}]
+
+    def test_columns_pushed_down(self, app, client):
+        '''unrequested columns aren't selected.'''
+        response, seen = statements(app, client, '/restaurants/1?fields[restaurant]=name&include=')
+        assert response.json == {"id": 1, "name": "Karen's Pizza Shack"}
+        assert not any("restaurants.address" in statement for statement in seen)
+
+    def test_include_controls_joins(self, app, client):
+        '''include=restaurant_pizzas embeds the menu without joining pizzas.'''
+        response, seen = statements(
+            app, client, '/restaurants/1?include=restaurant_pizzas&fields[restaurant_pizza]=price')
+        assert response.json["restaurant_pizzas"] == [{"id": 1, "price": 10}]
+        assert not any("JOIN pizzas" in statement for statement in seen)
+
+        response, seen = statements(app, client, '/restaurants/1?include=')
+        assert "restaurant_pizzas" not in response.json
+        assert not any("restaurant_pizzas" in statement for statement in seen)
+
+    def test_default_shape_unchanged(self, client):
+        '''without parameters GET /restaurants/<id> embeds the full menu.'''
+        item = client.get('/restaurants/1').json["restaurant_pizzas"][0]
+        assert item == {
+            "id": 1, "price": 10, "pizza_id": 1, "restaurant_id": 1,
+            "pizza": {"id": 1, "name": "Cheese", "ingredients": "Dough, Cheese"},
+        }
+
+    def test_batch_sparse_menus(self, client):
+        '''sparse restaurant_pizza fields still group menus and sideload pizzas.'''
+        response = client.get(
+            '/restaurants?ids=1&include=restaurant_pizzas.pizza'
+            '&fields[restaurant_pizza]=price&fields[pizza]=name')
+        assert response.json["restaurants"][0]["restaurant_pizzas"] == [{"id": 1, "price": 10}]
+        assert response.json["pizzas"] == [{"id": 1, "name": "Cheese"}]
+
+    def test_rejects_unknown(self, client):
+        '''unknown types and fields are a 400.'''
+        assert client.get('/restaurants?fields[restaurant]=nope').status_code == 400
+        assert client.get('/pizzas/1?fields[topping]=name').status_code == 400
+        assert client.get('/restaurants/1?include=pizzas').status_code == 400
@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from group_commit import batch_sizes
+from models import db, Restaurant, Pizza, RestaurantPizza
+
+
+@pytest.fixture
+def app(app_factory):
+    app = app_factory(READ_CACHE_ENABLED=False, GROUP_COMMIT_ENABLED=True, GROUP_COMMIT_MAX_LATENCY_MS=50)
+    with app.app_context():
+        db.session.add_all([Restaurant(name="Karen's", address="1 Main St"),
+                            Pizza(name="Emma", ingredients="Dough, Cheese")])
+        db.session.commit()
+    return app
+
+
+class TestGroupCommit:
+    '''GROUP_COMMIT_ENABLED and the writer in group_commit.py'''
+
+    def test_concurrent_posts_share_batches(self, app):
+        '''concurrent POST /restaurant_pizzas are committed together with the usual response.'''
+        responses = []
+
+        def post(price):
+            responses.append(app.test_client().post(
+                '/restaurant_pizzas', json={"price": price, "pizza_id": 1, "restaurant_id": 1}))
+
+        before = sum(batch_sizes._series.get(("restaurant_pizzas",), ([0], 0))[0])
+        threads = [threading.Thread(target=post, args=(price,)) for price in range(1, 21)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert [response.status_code for response in responses] == [201] * 20
+        assert len({response.json["id"] for response in responses}) == 20
+        assert responses[0].json["pizza"] == {"id": 1, "name": "Emma", "ingredients": "Dough, Cheese"}
+        with app.app_context():
+            assert db.session.scalar(select(func.count(RestaurantPizza.id))) == 20
+
+        batches = sum(batch_sizes._series[("restaurant_pizzas",)][0]) - before
+        assert batches < 20
+        assert 'group_commit_batch_size_bucket' in app.test_client().get('/metrics').text
+
+    def test_bad_row_fails_alone(self, app):
+        '''a row violating a constraint fails only its own future.'''
+        writer = app.extensions["group_commit"]
+        good = writer.submit({"price": 5, "pizza_id": 1, "restaurant_id": 1})
+        bad = writer.submit({"price": 5, "pizza_id": 1, "restaurant_id": 999})
+
+        assert isinstance(good.result(timeout=5), int)
+        with pytest.raises(IntegrityError):
+            bad.result(timeout=5)
+        with app.app_context():
+            assert db.session.scalar(select(func.count(RestaurantPizza.id))) == 1
+
+    def test_timeout(self, app, monkeypatch):
+        '''a row still queued after GROUP_COMMIT_TIMEOUT is a 503.'''
+        app.config["GROUP_COMMIT_TIMEOUT"] = 0.01
+        monkeypatch.setattr(app.extensions["group_commit"], "submit", lambda values: Future())
+        response = app.test_client().post('/restaurant_pizzas', json={"price": 5, "pizza_id": 1, "restaurant_id": 1})
+        assert response.status_code == 503
+        assert response.json == {"errors": ["write queue timed out"]}
@@ -0,0 +1,129 @@
+from sqlalchemy import func, select
+
+from ingredients import normalize, parse_ingredients
+from models import db, Pizza, Ingredient, pizza_ingredients
+
+PIZZAS = [
+    ("Margherita", "Dough, Tomato Sauce, Cheese"),
+    ("Pepperoni", "Dough, Tomato  Sauce, cheese, Pepperoni"),
+    ("Marinara", "Dough, tomato sauce, Basil"),
+    ("Diavola", "Dough, PEPPERONI, Red peppers"),
+]
+
+
+def ingredient_app(app_factory, **config):
+    app = app_factory(READ_CACHE_ENABLED=False, **config)
+    with app.app_context():
+        db.session.add_all([Pizza(name=name, ingredients=text) for name, text in PIZZAS])
+        db.session.commit()
+    return app
+
+
+def names_of(response):
+    return [pizza["name"] for pizza in response.json]
+
+
+class TestParsing:
+    '''ingredient name normalization in ingredients.py'''
+
+    def test_normalize(self):
+        '''collapses whitespace and casefolds.'''
+        assert normalize("  Tomato   Sauce ") == "tomato sauce"
+        assert parse_ingredients("Dough, CHEESE,, cheese , Basil") == ["dough", "cheese", "basil"]
+        assert parse_ingredients(None) == []
+
+
+class TestIngredientSync:
+    '''pizza_ingredients follows Pizza.ingredients'''
+
+    def test_orm_writes_sync(self, app_factory):
+        '''inserting and updating a pizza rewrites its links; names are shared.'''
+        app = ingredient_app(app_factory)
+        with app.app_context():
+            assert db.session.scalar(select(func.count(Ingredient.id))) == 6
+
+            pizza = db.session.scalar(select(Pizza).where(Pizza.name == "Marinara"))
+            pizza.ingredients = "Dough, Garlic"
+            db.session.commit()
+
+            linked = db.session.scalars(
+                select(Ingredient.name)
+                .join(pizza_ingredients, pizza_ingredients.c.ingredient_id == Ingredient.id)
+                .where(pizza_ingredients.c.pizza_id == pizza.id)
+                .order_by(Ingredient.name)
+            ).all()
+            assert linked == ["dough", "garlic"]
+
+    def test_new_pizzas_from_restaurant_menu(self, app_factory):
+        '''pizzas created by POST /restaurants_pizza are searchable.'''
+        app = ingredient_app(app_factory)
+        client = app.test_client()
+        response = client.post('/restaurants_pizza', json={
+            "name": "Luigi's", "address": "1 Main St",
+            "restaurant_pizzas": [{"price": 10, "pizza": {"id": 999, "name": "Funghi", "ingredients": "Mushrooms"}}],
+        })
+        assert response.status_code == 201
+
+        assert names_of(client.get('/pizzas?ingredient=mushrooms')) == ["Funghi"]
+
+    def test_seed_populates_links(self, app_factory):
+        '''flask seed writes pizza_ingredients with each pizza chunk.'''
+        app = ingredient_app(app_factory)
+        result = app.test_cli_runner().invoke(args=[
+            'seed', '--restaurants', '3', '--pizzas', '12', '--menu-size', '2', '--chunk-size', '5'])
+        assert result.exit_code == 0, result.output
+        with app.app_context():
+            # "Dough" plus three sampled ingredients per pizza
+            assert db.session.scalar(select(func.count()).select_from(pizza_ingredients)) == 12 * 4
+
+
+class TestIngredientFilter:
+    '''GET /pizzas?ingredient=...&exclude=...'''
+
+    def test_include_and_exclude(self, app_factory):
+        '''matches all includes and no excludes, case-insensitively.'''
+        client = ingredient_app(app_factory).test_client()
+
+        assert names_of(client.get('/pizzas?ingredient=Pepperoni')) == ["Pepperoni", "Diavola"]
+        assert names_of(client.get('/pizzas?ingredient=tomato sauce,cheese')) == ["Margherita", "Pepperoni"]
+        assert names_of(client.get('/pizzas?ingredient=cheese&ingredient=pepperoni')) == ["Pepperoni"]
+        assert names_of(client.get('/pizzas?exclude=cheese')) == ["Marinara", "Diavola"]
+        assert names_of(client.get('/pizzas?ingredient=dough&exclude=pepperoni,basil')) == ["Margherita"]
+        assert names_of(client.get('/pizzas?ingredient=anchovies')) == []
+
+    def test_output_unchanged(self, app_factory):
+        '''pizzas keep the original ingredients string.'''
+        client = ingredient_app(app_factory).test_client()
+        response = client.get('/pizzas?ingredient=basil')
+        assert response.json == [{"id": 3, "name": "Marinara", "ingredients": "Dough, tomato sauce, Basil"}]
+
+    def test_next_link_keeps_filters(self, app_factory):
+        '''following the next Link pages through the filtered pizzas only.'''
+        client = ingredient_app(app_factory).test_client()
+        response = client.get('/pizzas?ingredient=cheese&ingredient=dough&fields[pizza]=name&limit=1')
+        names = names_of(response)
+        while "Link" in response.headers:
+            response = client.get(response.headers["Link"].split(">")[0].lstrip("<"))
+            names += names_of(response)
+        assert names == ["Margherita", "Pepperoni"]
+        assert list(response.json[0]) == ["id", "name"]
+
+    def test_sql_fallback_matches_index(self, app_factory):
+        '''the SQL join path returns the same pizzas as the bitset index.'''
+        indexed = ingredient_app(app_factory).test_client()
+        joined = ingredient_app(app_factory, INGREDIENT_INDEX_ENABLED=False).test_client()
+
+        for query in ('ingredient=pepperoni', 'ingredient=cheese&exclude=pepperoni',
+                      'exclude=dough', 'ingredient=tomato sauce&limit=1'):
+            assert names_of(indexed.get(f'/pizzas?{query}')) == names_of(joined.get(f'/pizzas?{query}'))
+
+    def test_index_sees_new_pizzas(self, app_factory):
+        '''the bitset index is rebuilt after pizzas change.'''
+        app = ingredient_app(app_factory)
+        client = app.test_client()
+        assert names_of(client.get('/pizzas?ingredient=basil')) == ["Marinara"]
+
+        with app.app_context():
+            db.session.add(Pizza(name="Pesto", ingredients="Dough, Basil"))
+            db.session.commit()
+        assert names_of(client.get('/pizzas?ingredient=basil')) == ["Marinara", "Pesto"]
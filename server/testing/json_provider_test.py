@@ -0,0 +1,36 @@
+from app import app
+from json_provider import CompactJSONProvider, OrjsonProvider, orjson
+import pytest
+
+
+class TestJSONProvider:
+    '''JSON providers in json_provider.py'''
+
+    def test_compact_by_default(self):
+        '''returns compact JSON unless ?pretty=1 is given.'''
+        client = app.test_client()
+
+        response = client.get('/pizzas?limit=1')
+        assert b'\n  ' not in response.data
+        assert b'": ' not in response.data
+
+        response = client.get('/pizzas?limit=1&pretty=1')
+        assert b'\n  ' in response.data
+
+    def test_stdlib_fallback(self):
+        '''encodes the same document with the stdlib provider.'''
+        provider = CompactJSONProvider(app)
+        payload = {"id": 1, "name": "Emma", "restaurant_pizzas": [{"price": 3}]}
+        with app.test_request_context('/'):
+            response = provider.response(payload)
+        assert response.get_data(as_text=True) == '{"id":1,"name":"Emma","restaurant_pizzas":[{"price":3}]}'
+        assert provider.loads(provider.dumps(payload)) == payload
+
+    @pytest.mark.skipif(orjson is None, reason="orjson not installed")
+    def test_orjson_matches_stdlib(self):
+        '''produces byte-identical compact output to the stdlib provider.'''
+        payload = [{"id": i, "name": f"Pizza {i}", "ingredients": "Dough, Cheese"} for i in range(5)]
+        stdlib = CompactJSONProvider(app).encode(payload).encode()
+        fast = OrjsonProvider(app).encode(payload)
+        assert fast == stdlib
+        assert OrjsonProvider(app).loads(fast) == payload
@@ -0,0 +1,47 @@
+import os
+
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import text
+
+from app import create_app
+from models import db
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), "..", "..", "migrations")
+
+
+class TestMigrations:
+    '''flask db upgrade over existing data'''
+
+    def test_upgrade_populated_baseline(self, tmp_path):
+        '''a populated baseline database upgrades to head with its rows intact.'''
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'baseline.db'}"})
+        with app.app_context():
+            upgrade(directory=MIGRATIONS, revision="930453bf4358")
+            db.session.execute(text("INSERT INTO restaurants (id, name, address) VALUES (1, 'Shack', '1 Main St')"))
+            db.session.execute(text("INSERT INTO pizzas (id, name, ingredients) VALUES (1, 'Cheese', 'Dough, Cheese')"))
+            db.session.execute(text(
+                "INSERT INTO restaurant_pizzas (id, price, restaurant_id, pizza_id) VALUES (1, 10, 1, 1)"))
+            db.session.commit()
+            db.session.close()
+
+            upgrade(directory=MIGRATIONS)
+
+            assert db.session.execute(text("SELECT count(*) FROM restaurant_pizzas")).scalar() == 1
+            assert db.session.execute(text("PRAGMA foreign_key_check")).all() == []
+            # Connections the app opens afterwards still enforce foreign keys.
+            assert db.session.execute(text("PRAGMA foreign_keys")).scalar() == 1
+
+    def test_downgrade_keeps_search_triggers(self, tmp_path):
+        '''dropping restaurants.deleted_at keeps the search index triggers on restaurants.'''
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'downgrade.db'}"})
+        with app.app_context():
+            upgrade(directory=MIGRATIONS)
+            downgrade(directory=MIGRATIONS, revision="0a9e5d3c71b4")
+            db.session.execute(text("INSERT INTO restaurants (name, address, updated_at) VALUES ('Shack', '1 Main St', CURRENT_TIMESTAMP)"))
+            db.session.commit()
+
+            assert db.session.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'restaurants' ORDER BY name"
+            )).scalars().all() == ["restaurants_fts_ad", "restaurants_fts_ai", "restaurants_fts_au"]
+            assert db.session.execute(text(
+                "SELECT rowid FROM restaurants_fts WHERE restaurants_fts MATCH 'shack'")).scalars().all() == [1]
@@ -2,6 +2,7 @@ import pytest
 from app import app
 from models import db, Restaurant, Pizza, RestaurantPizza
 from faker import Faker
+from sqlalchemy import text
 
 
 class TestRestaurantPizza:
@@ -62,3 +63,23 @@ class TestRestaurantPizza:
                     restaurant_id=restaurant.id, pizza_id=pizza.id, price=31)
                 db.session.add(restaurant_pizza)
                 db.session.commit()
+
+
+class TestRestaurantPizzaIndexes:
+    '''Indexes on restaurant_pizzas in models.py'''
+
+    def query_plan(self, stmt):
+        with app.app_context():
+            return " ".join(
+                row[-1] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {stmt}"), {"id": 1})
+            )
+
+    def test_menu_load_uses_index(self):
+        '''looks up restaurant_pizzas by restaurant_id through an index.'''
+        plan = self.query_plan("SELECT * FROM restaurant_pizzas WHERE restaurant_id = :id")
+        assert "USING INDEX ix_restaurant_pizzas_restaurant_id_pizza_id" in plan
+
+    def test_pizza_lookup_uses_index(self):
+        '''looks up restaurant_pizzas by pizza_id through an index.'''
+        plan = self.query_plan("SELECT id FROM restaurant_pizzas WHERE pizza_id = :id")
+        assert "ix_restaurant_pizzas_pizza_id" in plan
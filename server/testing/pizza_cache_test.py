@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import insert
+
+from models import db, Restaurant, Pizza
+
+
+@pytest.fixture
+def app(app_factory):
+    app = app_factory(PIZZA_CACHE_MAX_AGE=3600)
+    with app.app_context():
+        db.session.add_all([Restaurant(name="Karen's Pizza Shack", address="1 Main St"),
+                            Pizza(name="Cheese", ingredients="Dough, Cheese")])
+        db.session.commit()
+        app.extensions["pizza_cache"].warm()
+    return app
+
+
+def pizza_queries(app, client, body):
+    '''POST /restaurant_pizzas and the statements that read the pizzas table'''
+    seen = []
+    with app.app_context():
+        engine = db.engine
+    listener = lambda conn, cursor, statement, *args: seen.append(statement)
+    db.event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.post('/restaurant_pizzas', json=body)
+    finally:
+        db.event.remove(engine, "before_cursor_execute", listener)
+    return response, [statement for statement in seen if "FROM pizzas" in statement]
+
+
+class TestPizzaCache:
+    '''PizzaCache in pizza_cache.py'''
+
+    def test_validates_from_cache(self, app):
+        '''a warm cache answers the pizza lookup in create_restaurant_pizza.'''
+        response, queries = pizza_queries(
+            app, app.test_client(), {"price": 5, "pizza_id": 1, "restaurant_id": 1})
+        assert response.status_code == 201
+        assert response.json["pizza"] == {"id": 1, "name": "Cheese", "ingredients": "Dough, Cheese"}
+        assert queries == []
+
+    def test_unknown_pizza(self, app):
+        '''unknown ids are still a validation error.'''
+        response = app.test_client().post('/restaurant_pizzas', json={"price": 5, "pizza_id": 9, "restaurant_id": 1})
+        assert response.status_code == 400
+
+    def test_own_writes_mark_stale(self, app):
+        '''ORM writes to pizzas are seen by the next lookup.'''
+        with app.app_context():
+            db.session.get(Pizza, 1).name = "Four Cheese"
+            db.session.commit()
+        response = app.test_client().post('/restaurant_pizzas', json={"price": 5, "pizza_id": 1, "restaurant_id": 1})
+        assert response.json["pizza"]["name"] == "Four Cheese"
+
+    def test_falls_back_for_unseen_ids(self, app):
+        '''a pizza inserted behind the cache's back (another worker) is found.'''
+        with app.app_context():
+            db.session.execute(insert(Pizza).values(id=2, name="Margherita", ingredients="Dough"))
+            db.session.commit()
+        response = app.test_client().post('/restaurant_pizzas', json={"price": 5, "pizza_id": 2, "restaurant_id": 1})
+        assert response.status_code == 201
+        assert response.json["pizza"]["name"] == "Margherita"
+        assert app.extensions["pizza_cache"].misses == 1
@@ -0,0 +1,121 @@
+import pytest
+from sqlalchemy import delete, update
+
+from models import db, Restaurant, Pizza, RestaurantPizza, pizza_price_stats
+
+
+@pytest.fixture
+def app(app_factory):
+    app = app_factory(READ_CACHE_ENABLED=False)
+    with app.app_context():
+        db.session.add_all([
+            Restaurant(name="Karen's", address="1 Main St"),
+            Restaurant(name="Sanjay's", address="2 Main St"),
+            Restaurant(name="Kiki's", address="3 Main St"),
+            Pizza(name="Emma", ingredients="Dough, Cheese"),
+            Pizza(name="Geri", ingredients="Dough, Pepperoni"),
+        ])
+        db.session.flush()
+        db.session.add_all([
+            RestaurantPizza(restaurant_id=1, pizza_id=1, price=10),
+            RestaurantPizza(restaurant_id=2, pizza_id=1, price=4),
+            RestaurantPizza(restaurant_id=3, pizza_id=1, price=4),
+            RestaurantPizza(restaurant_id=1, pizza_id=2, price=20),
+        ])
+        db.session.commit()
+    return app
+
+
+class TestPriceEndpoints:
+    '''GET /pizzas/<id>/prices and GET /restaurants/<id>/stats'''
+
+    def test_pizza_prices(self, app):
+        '''returns min/max/avg across restaurants and the cheapest offers.'''
+        response = app.test_client().get('/pizzas/1/prices')
+        assert response.status_code == 200
+        assert response.json == {
+            "pizza_id": 1, "offers": 3, "min_price": 4, "max_price": 10, "avg_price": 6.0,
+            "cheapest": [
+                {"restaurant_id": 2, "name": "Sanjay's", "price": 4},
+                {"restaurant_id": 3, "name": "Kiki's", "price": 4},
+            ],
+        }
+
+    def test_restaurant_stats(self, app):
+        '''returns menu size and price range; empty menus have null prices.'''
+        client = app.test_client()
+        assert client.get('/restaurants/1/stats').json == {
+            "restaurant_id": 1, "offers": 2, "min_price": 10, "max_price": 20, "avg_price": 15.0}
+
+        client.post('/restaurants_pizza', json={"name": "Empty", "address": "4 Main St"})
+        assert client.get('/restaurants/4/stats').json == {
+            "restaurant_id": 4, "offers": 0, "min_price": None, "max_price": None, "avg_price": None}
+
+    def test_not_found(self, app):
+        '''unknown ids are 404s.'''
+        client = app.test_client()
+        assert client.get('/pizzas/99/prices').status_code == 404
+        assert client.get('/restaurants/99/stats').status_code == 404
+
+    def test_soft_deleted_restaurants_hidden(self, app):
+        '''offers of a soft-deleted restaurant awaiting the purge count in neither the summary nor cheapest.'''
+        with app.app_context():
+            db.session.execute(update(Restaurant).where(Restaurant.id == 2).values(deleted_at=db.func.now()))
+            db.session.commit()
+        client = app.test_client()
+        assert client.get('/pizzas/1/prices').json == {
+            "pizza_id": 1, "offers": 2, "min_price": 4, "max_price": 10, "avg_price": 7.0,
+            "cheapest": [{"restaurant_id": 3, "name": "Kiki's", "price": 4}],
+        }
+        assert client.get('/restaurants/2/stats').status_code == 404
+
+        with app.app_context():
+            db.session.execute(update(Restaurant).where(Restaurant.id != 1).values(deleted_at=db.func.now()))
+            db.session.commit()
+        assert client.get('/pizzas/1/prices').json == {
+            "pizza_id": 1, "offers": 1, "min_price": 10, "max_price": 10, "avg_price": 10.0,
+            "cheapest": [{"restaurant_id": 1, "name": "Karen's", "price": 10}],
+        }
+
+
+class TestIncrementalMaintenance:
+    '''the restaurant_pizzas triggers in price_stats.py'''
+
+    def test_deletes_and_updates(self, app):
+        '''removing the cheapest offer or repricing recomputes the extremes.'''
+        client = app.test_client()
+        with app.app_context():
+            db.session.execute(delete(RestaurantPizza).where(RestaurantPizza.restaurant_id.in_([2, 3])))
+            db.session.execute(update(RestaurantPizza).where(RestaurantPizza.pizza_id == 2).values(pizza_id=1))
+            db.session.commit()
+
+        assert client.get('/pizzas/1/prices').json["min_price"] == 10
+        assert client.get('/pizzas/1/prices').json["max_price"] == 20
+        assert client.get('/pizzas/2/prices').json["offers"] == 0
+
+        client.delete('/restaurants/1')
+        with app.app_context():
+            assert db.session.query(pizza_price_stats).count() == 0
+
+    def test_bulk_writes_and_check(self, app):
+        '''Core batch inserts are counted; check reports no drift, and rebuild repairs it.'''
+        client = app.test_client()
+        response = client.post('/restaurant_pizzas/batch', json=[
+            {"restaurant_id": 2, "pizza_id": 2, "price": 2},
+            {"restaurant_id": 3, "pizza_id": 2, "price": 30},
+        ])
+        assert response.status_code == 201
+        assert client.get('/pizzas/2/prices').json["offers"] == 3
+
+        runner = app.test_cli_runner()
+        assert runner.invoke(args=['price-stats', 'check']).exit_code == 0
+
+        with app.app_context():
+            db.session.execute(update(pizza_price_stats).values(min_price=0))
+            db.session.commit()
+        result = runner.invoke(args=['price-stats', 'check'])
+        assert result.exit_code == 1
+        assert 'pizza_price_stats: 2 rows differ' in result.output
+
+        assert runner.invoke(args=['price-stats', 'rebuild']).exit_code == 0
+        assert runner.invoke(args=['price-stats', 'check']).exit_code == 0
@@ -0,0 +1,47 @@
+import os
+
+from app import app, create_app
+from models import db, Restaurant
+from faker import Faker
+
+
+class TestProfiling:
+    '''Request instrumentation in profiling.py'''
+
+    def test_server_timing(self):
+        '''reports SQL time, statement count and total time in a Server-Timing header.'''
+        with app.app_context():
+            restaurant = Restaurant(name=Faker().name(), address='Main St')
+            db.session.add(restaurant)
+            db.session.commit()
+            restaurant_id = restaurant.id
+
+        response = app.test_client().get(f'/restaurants/{restaurant_id}')
+        timing = response.headers['Server-Timing']
+        assert 'desc="3 queries"' in timing
+        assert 'serialize;dur=' in timing
+        assert 'total;dur=' in timing
+
+    def test_metrics(self):
+        '''exposes per-route latency histograms and cache counters at /metrics.'''
+        client = app.test_client()
+        client.get('/pizzas')
+        response = client.get('/metrics')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        body = response.get_data(as_text=True)
+        assert '# TYPE http_request_duration_seconds histogram' in body
+        assert 'http_request_duration_seconds_count{method="GET",route="/pizzas",status="200"}' in body
+        assert 'db_statements_total{method="GET",route="/pizzas"}' in body
+        assert 'read_cache{backend="lru",kind="hits"}' in body
+
+    def test_slow_request_profile(self, tmp_path):
+        '''writes a cProfile dump for requests slower than PROFILE_SLOW_REQUEST_MS.'''
+        slow_app = create_app(
+            {"PROFILE_SLOW_REQUEST_MS": "0", "PROFILE_DIR": str(tmp_path)}, migrations=False)
+        slow_app.test_client().get('/pizzas?limit=1')
+
+        dumps = os.listdir(tmp_path)
+        assert len(dumps) == 1
+        assert dumps[0].endswith('-GET-pizzas.prof')
@@ -0,0 +1,131 @@
+import shutil
+import time
+
+import pytest
+
+from models import db, Restaurant
+from replicas import ReplicaSet
+
+
+@pytest.fixture
+def make_app(app_factory, tmp_path):
+    '''apps whose replicas are copies of the primary taken right after seeding'''
+    def make(replicas=1, **config):
+        seed = app_factory("primary.db")
+        with seed.app_context():
+            db.session.add(Restaurant(name="Karen's Pizza Shack", address="1 Main St"))
+            db.session.commit()
+            # Checkpoint the WAL into the file so the copies have the data.
+            db.session.execute(db.text("PRAGMA wal_checkpoint(TRUNCATE)"))
+            db.engine.dispose()
+
+        uris = []
+        for n in range(replicas):
+            shutil.copy(tmp_path / "primary.db", tmp_path / f"replica{n}.db")
+            uris.append(f"sqlite:///{tmp_path / f'replica{n}.db'}")
+        config = {"READ_CACHE_ENABLED": False, **config}
+        return app_factory("primary.db", READ_REPLICA_URIS=uris, **config)
+    return make
+
+
+def add_to_primary(app, name):
+    with app.app_context():
+        restaurant = Restaurant(name=name, address="2 Main St")
+        db.session.add(restaurant)
+        db.session.commit()
+        return restaurant.id
+
+
+class TestReplicas:
+    '''read replica routing in replicas.py'''
+
+    def test_reads_go_to_replica(self, make_app):
+        '''GET routes read from the replica, which hasn't seen the new row.'''
+        app = make_app()
+        id = add_to_primary(app, "Sanjay's Pizza")
+        client = app.test_client()
+        assert [r["name"] for r in client.get('/restaurants').json] == ["Karen's Pizza Shack"]
+        assert client.get(f'/restaurants/{id}').status_code == 404
+
+    def test_replica_statements_profiled(self, make_app):
+        '''statements run on a replica count towards Server-Timing.'''
+        app = make_app(PROFILING_ENABLED=True)
+        with app.app_context():
+            primary = db.engine
+        replica = app.extensions["replicas"].engines["replica_0"]
+        seen = {primary: [], replica: []}
+        listeners = {engine: (lambda conn, cursor, statement, *args, engine=engine: seen[engine].append(statement))
+                     for engine in seen}
+        for engine, listener in listeners.items():
+            db.event.listen(engine, "before_cursor_execute", listener)
+        response = app.test_client().get('/restaurants/1')
+        for engine, listener in listeners.items():
+            db.event.remove(engine, "before_cursor_execute", listener)
+
+        assert response.status_code == 200
+        assert len(seen[replica]) > 1
+        assert f'desc="{len(seen[primary]) + len(seen[replica])} queries"' in response.headers["Server-Timing"]
+
+    def test_read_your_writes(self, make_app):
+        '''after a write, that client reads from the primary; others don't.'''
+        app = make_app()
+        client = app.test_client()
+        response = client.post('/restaurants_pizza', json={"name": "Sanjay's Pizza", "address": "2 Main St"})
+        assert response.status_code == 201
+        id = response.json["id"]
+
+        assert client.get(f'/restaurants/{id}').status_code == 200
+        assert app.test_client().get(f'/restaurants/{id}').status_code == 404
+
+    def test_lagging_replica_skipped(self, make_app):
+        '''replicas behind by more than READ_REPLICA_MAX_LAG aren't used.'''
+        app = make_app(READ_REPLICA_MAX_LAG=0)
+        id = add_to_primary(app, "Sanjay's Pizza")
+        assert app.test_client().get(f'/restaurants/{id}').status_code == 200
+        assert app.extensions["replicas"].lags["replica_0"] > 0
+
+    def test_lag_measured_in_background(self, make_app):
+        '''after the first request, lags are re-measured by a background thread.'''
+        app = make_app(READ_REPLICA_CHECK_INTERVAL=0.01)
+        replicas = app.extensions["replicas"]
+        assert app.test_client().get('/restaurants/1').status_code == 200
+        assert replicas.lags == {"replica_0": 0.0}
+
+        add_to_primary(app, "Sanjay's Pizza")
+        deadline = time.monotonic() + 5
+        while replicas.lags["replica_0"] == 0.0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        replicas.dispose()
+        assert replicas.lags["replica_0"] > 0
+
+    def test_policies(self, make_app):
+        '''round_robin alternates healthy replicas; least_lag picks the freshest.'''
+        app = make_app(replicas=2)
+        engines = app.extensions["replicas"].engines
+        with app.app_context():
+            replicas = ReplicaSet(engines, interval=3600)
+            replicas.refresh()
+            assert {replicas.choose(), replicas.choose()} == {"replica_0", "replica_1"}
+
+            replicas = ReplicaSet(engines, policy="least_lag", interval=3600)
+            replicas.lags = {"replica_0": 2.0, "replica_1": 0.5}
+            assert replicas.choose() == "replica_1"
+
+    def test_cached_replica_read_expires_with_lag(self, make_app, tmp_path):
+        '''a body cached from a lagging replica isn't served once the replica catches up.'''
+        app = make_app(READ_CACHE_ENABLED=True)
+        with app.app_context():
+            db.session.get(Restaurant, 1).name = "Renamed"
+            db.session.commit()
+            db.session.execute(db.text("PRAGMA wal_checkpoint(TRUNCATE)"))
+
+        client = app.test_client()
+        response = client.get('/restaurants/1')
+        assert (response.headers['X-Cache'], response.json['name']) == ('MISS', "Karen's Pizza Shack")
+
+        # The replica catches up.
+        app.extensions["replicas"].dispose()
+        shutil.copy(tmp_path / "primary.db", tmp_path / "replica0.db")
+
+        response = client.get('/restaurants/1')
+        assert (response.headers['X-Cache'], response.json['name']) == ('MISS', "Renamed")
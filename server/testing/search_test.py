@@ -0,0 +1,77 @@
+import pytest
+
+from models import db, Restaurant, Pizza
+from search import match_expression
+
+
+@pytest.fixture
+def client(app_factory):
+    app = app_factory(READ_CACHE_ENABLED=False)
+    with app.app_context():
+        db.session.add_all([
+            Restaurant(name="Karen's Pizza Shack", address="1 Pepper Lane"),
+            Restaurant(name="Sanjay's Pizza", address="2 Main St"),
+            Restaurant(name="Kiki's Café", address="3 Pizza Plaza"),
+            Pizza(name="Pepperoni", ingredients="Dough, Tomato Sauce, Cheese, Pepperoni"),
+            Pizza(name="Margherita", ingredients="Dough, Tomato Sauce, Cheese, Basil"),
+        ])
+        db.session.commit()
+    yield app.test_client()
+
+
+class TestMatchExpression:
+    '''query parsing in search.py'''
+
+    def test_quotes_terms(self):
+        '''every word becomes a quoted prefix term; syntax characters are dropped.'''
+        assert match_expression('kar piz') == '"kar"* "piz"*'
+        assert match_expression('NEAR(" OR *') == '"NEAR"* "OR"*'
+        with pytest.raises(ValueError):
+            match_expression(' "* ')
+
+
+class TestSearch:
+    '''GET /search'''
+
+    def test_prefix_and_ranking(self, client):
+        '''matches word prefixes in every indexed column, best (name) matches first.'''
+        response = client.get('/search?q=pizz')
+        assert response.status_code == 200
+        results = [(item["type"], item["id"]) for item in response.json]
+        assert set(results) == {("restaurant", 1), ("restaurant", 2), ("restaurant", 3)}
+        # A name hit outranks an address hit.
+        assert results[-1] == ("restaurant", 3)
+
+        assert client.get('/search?q=pep&type=pizza').json[0] == {
+            "type": "pizza", "id": 1, "name": "Pepperoni",
+            "ingredients": "Dough, Tomato Sauce, Cheese, Pepperoni",
+        }
+
+    def test_all_terms_required_and_diacritics(self, client):
+        '''every word must match; accents are folded.'''
+        assert [item["name"] for item in client.get('/search?q=cheese basil').json] == ["Margherita"]
+        assert [item["name"] for item in client.get('/search?q=cafe').json] == ["Kiki's Café"]
+
+    def test_type_and_pagination(self, client):
+        '''type= restricts tables; limit/offset page with a next Link.'''
+        response = client.get('/search?q=dough&type=pizza&limit=1')
+        assert len(response.json) == 1 and response.json[0]["type"] == "pizza"
+        assert 'offset=1' in response.headers["Link"]
+
+        second = client.get('/search?q=dough&type=pizza&limit=1&offset=1')
+        assert second.json[0]["id"] != response.json[0]["id"]
+        assert "Link" not in second.headers
+
+    def test_index_follows_writes(self, client):
+        '''triggers keep the index in sync with inserts, updates and deletes.'''
+        client.post('/restaurants_pizza', json={"name": "Zeppelin Slices", "address": "9 Air Rd"})
+        assert [item["name"] for item in client.get('/search?q=zepp').json] == ["Zeppelin Slices"]
+
+        client.delete('/restaurants/2')
+        assert ("restaurant", 2) not in [(i["type"], i["id"]) for i in client.get('/search?q=pizza').json]
+
+    def test_bad_input(self, client):
+        '''missing q or bad parameters are 400s.'''
+        assert client.get('/search').status_code == 400
+        assert client.get('/search?q=pizza&type=pasta').status_code == 400
+        assert client.get('/search?q=pizza&limit=0').status_code == 400
@@ -0,0 +1,61 @@
+from sqlalchemy import text
+
+import price_stats
+from models import db, Restaurant, Pizza, RestaurantPizza
+from seeding import truncate
+
+
+class TestSeedCommand:
+    '''flask seed command in seeding.py'''
+
+    def test_seeds_requested_sizes(self, app_factory):
+        '''creates the requested number of rows in chunks and reports rows/sec.'''
+        app = app_factory()
+        result = app.test_cli_runner().invoke(args=[
+            'seed', '--restaurants', '25', '--pizzas', '7', '--menu-size', '3', '--chunk-size', '10'])
+
+        assert result.exit_code == 0, result.output
+        assert 'rows/sec' in result.output
+        with app.app_context():
+            assert Restaurant.query.count() == 25
+            assert Pizza.query.count() == 7
+            assert RestaurantPizza.query.count() == 75
+            assert db.session.get(Restaurant, 25).restaurant_pizzas[0].pizza is not None
+
+    def test_deterministic_and_truncates(self, app_factory):
+        '''produces the same rows for the same seed, including with worker processes.'''
+        app = app_factory()
+        runner = app.test_cli_runner()
+        snapshot = lambda: [(r.name, r.address) for r in Restaurant.query.order_by(Restaurant.id)]
+
+        runner.invoke(args=['seed', '--restaurants', '30', '--pizzas', '5', '--chunk-size', '8'])
+        with app.app_context():
+            first = snapshot()
+
+        result = runner.invoke(args=[
+            'seed', '--restaurants', '30', '--pizzas', '5', '--chunk-size', '8', '--workers', '2'])
+        assert result.exit_code == 0, result.output
+        with app.app_context():
+            assert snapshot() == first
+            assert Restaurant.query.count() == 30
+
+    def test_derived_tables_rebuilt(self, app_factory):
+        '''the search index and price summaries match the data after a seed and a truncate.'''
+        app = app_factory()
+        runner = app.test_cli_runner()
+        with app.app_context():
+            triggers = db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).all()
+
+        indexed = text("SELECT count(*) FROM pizzas_fts WHERE pizzas_fts MATCH 'dough'")
+
+        runner.invoke(args=['seed', '--restaurants', '20', '--pizzas', '5', '--menu-size', '2'])
+        with app.app_context(), db.engine.connect() as connection:
+            assert price_stats.check(connection) == {}
+            assert connection.execute(indexed).scalar() == 5
+            assert db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).all() == triggers
+
+        with app.app_context():
+            truncate()
+            with db.engine.connect() as connection:
+                assert connection.execute(indexed).scalar() == 0
+                assert connection.execute(text("SELECT count(*) FROM pizza_price_stats")).scalar() == 0
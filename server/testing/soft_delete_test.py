@@ -0,0 +1,93 @@
+import re
+import time
+
+from sqlalchemy import func, select
+
+from models import db, Restaurant, Pizza, RestaurantPizza
+from soft_delete import purge
+
+
+def menu_app(app_factory, **config):
+    app = app_factory(READ_CACHE_ENABLED=False, **config)
+    with app.app_context():
+        pizza = Pizza(name="Emma", ingredients="Dough, Cheese")
+        restaurants = [Restaurant(name=f"Shack {i}", address=f"{i} Main St") for i in range(2)]
+        db.session.add_all([pizza, *restaurants])
+        db.session.flush()
+        db.session.add_all([
+            RestaurantPizza(restaurant_id=restaurant.id, pizza_id=pizza.id, price=price % 30 + 1)
+            for restaurant in restaurants
+            for price in range(50)
+        ])
+        db.session.commit()
+    return app
+
+
+def menu_rows(restaurant_id):
+    return db.session.scalar(
+        select(func.count(RestaurantPizza.id)).where(RestaurantPizza.restaurant_id == restaurant_id))
+
+
+class TestCascadeDelete:
+    '''DELETE /restaurants/<id> with ON DELETE CASCADE'''
+
+    def test_constant_statements(self, app_factory):
+        '''removes the restaurant and its menu without loading the menu.'''
+        app = menu_app(app_factory)
+        response = app.test_client().delete('/restaurants/1')
+
+        assert response.status_code == 204
+        assert re.search(r'desc="1 queries"', response.headers["Server-Timing"])
+        with app.app_context():
+            assert db.session.get(Restaurant, 1) is None
+            assert menu_rows(1) == 0
+            assert menu_rows(2) == 50
+
+    def test_orm_delete_is_passive(self, app_factory):
+        '''deleting through the session leaves the menu to the database.'''
+        app = menu_app(app_factory)
+        with app.app_context():
+            db.session.delete(db.session.get(Restaurant, 2))
+            db.session.commit()
+            assert menu_rows(2) == 0
+
+
+class TestSoftDelete:
+    '''SOFT_DELETE_ENABLED and the purge worker in soft_delete.py'''
+
+    def test_hidden_then_purged(self, app_factory):
+        '''a soft-deleted restaurant disappears at once and is purged in the background.'''
+        app = menu_app(app_factory, SOFT_DELETE_ENABLED=True, PURGE_INTERVAL=3600)
+        client = app.test_client()
+
+        assert client.delete('/restaurants/1').status_code == 204
+        assert client.delete('/restaurants/1').status_code == 404
+        assert client.get('/restaurants/1').status_code == 404
+        assert [r["id"] for r in client.get('/restaurants').json] == [2]
+        assert client.get('/search?q=shack').json == [
+            {"type": "restaurant", "id": 2, "name": "Shack 1", "address": "1 Main St"}]
+
+        with app.app_context():
+            deadline = time.monotonic() + 5
+            while menu_rows(1) and time.monotonic() < deadline:
+                db.session.rollback()
+                time.sleep(0.01)
+            assert menu_rows(1) == 0
+            assert db.session.execute(
+                select(Restaurant.id).execution_options(include_deleted=True)
+            ).scalars().all() == [2]
+
+    def test_purge_command(self, app_factory):
+        '''flask purge-deleted removes rows left behind by another process.'''
+        app = menu_app(app_factory)
+        with app.app_context():
+            db.session.execute(Restaurant.__table__.update().values(deleted_at=func.current_timestamp()))
+            db.session.commit()
+            assert db.session.scalar(select(func.count(Restaurant.id))) == 0
+
+        result = app.test_cli_runner().invoke(args=['purge-deleted', '--batch-size', '1'])
+        assert result.exit_code == 0, result.output
+        assert 'purged 2 restaurants' in result.output
+        with app.app_context():
+            assert purge() == 0
+            assert db.session.scalar(select(func.count(RestaurantPizza.id))) == 0
@@ -0,0 +1,18 @@
+from app import create_app
+
+
+class TestCreateApp:
+    '''create_app in app.py'''
+
+    def test_without_migrations(self):
+        '''builds a working app without registering Flask-Migrate.'''
+        app = create_app(migrations=False)
+        assert 'migrate' not in app.extensions
+        response = app.test_client().get('/pizzas?limit=1')
+        assert response.status_code == 200
+
+    def test_config_override(self):
+        '''applies config overrides on top of the environment defaults.'''
+        app = create_app({"READ_CACHE_ENABLED": False}, migrations=False)
+        assert app.config["READ_CACHE_ENABLED"] is False
+        assert 'migrate' in create_app().extensions